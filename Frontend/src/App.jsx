@@ -1,4 +1,4 @@
-import React, { useState } from 'react';
+import React, { useEffect, useState } from 'react';
 import Navbar from './components/Navbar';
 import Controls from './components/Controls';
 import KPICard from './components/KPICard';
@@ -8,8 +8,17 @@ import usePredictionStore from './store/usePredictionStore';
 import { TrendingUp, TrendingDown, Minus, AlertTriangle, DollarSign, Target } from 'lucide-react';
 
 export default function App() {
-  const { prediction, isLoading, error, predict } = usePredictionStore();
+  const { prediction, latest, isLoading, error, predict, subscribeLatest } = usePredictionStore();
   const [activeTab, setActiveTab] = useState('recommendations');
+  const ticker = prediction?.ticker;
+
+  // Keep the shown ticker's price and latest prediction live; closes the stream on change/unmount
+  useEffect(() => {
+    if (!ticker || activeTab !== 'advanced') return undefined;
+    return subscribeLatest(ticker);
+  }, [ticker, activeTab, subscribeLatest]);
+
+  const live = latest && latest.ticker === ticker && latest.price !== undefined ? latest : null;
 
   // Handle stock selection from recommendations
   const handleStockSelect = (stock) => {
@@ -135,6 +144,14 @@ export default function App() {
                           {prediction.company_info.name} ({prediction.ticker})
                         </h2>
                         <p className="text-gray-600 dark:text-gray-400">{prediction.company_info.sector}</p>
+                        {live && (
+                          <p className="text-sm text-gray-600 dark:text-gray-400 mt-1 flex items-center gap-2">
+                            <span className="w-2 h-2 rounded-full bg-green-500 animate-pulse"></span>
+                            Live ${live.price}
+                            {live.predicted !== null && <span>· next close ${live.predicted}</span>}
+                            <span className="text-xs">({live.date})</span>
+                          </p>
+                        )}
                       </div>
                       <span className={`px-3 py-1 rounded-full text-sm font-medium ${getRiskColor(prediction.company_info.risk_level)}`}>
                         {prediction.company_info.risk_level} Risk
@@ -243,7 +260,7 @@ export default function App() {
                 </div>
 
                 {/* Chart */}
-                <PredictionChart history={prediction.history} />
+                <PredictionChart history={prediction.history} ticker={prediction.ticker} />
               </div>
             )}
           </div>
@@ -1,5 +1,6 @@
-import React, { useState } from 'react';
+import React, { useEffect, useState } from 'react';
 import usePredictionStore from '../store/usePredictionStore';
+import api from '../lib/api';
 
 const popularTickers = ['AAPL', 'TSLA', 'MSFT', 'NVDA', 'GOOG', 'BTC-USD'];
 const intervals = ['1d', '1h', '1wk'];
@@ -12,6 +13,34 @@ export default function Controls() {
   const [interval, setInterval] = useState('1d');
   const [useIndicators, setUseIndicators] = useState(true);
   const [lookback, setLookback] = useState(60);
+  const [suggestions, setSuggestions] = useState([]);
+  const [showSuggestions, setShowSuggestions] = useState(false);
+
+  // Symbol/company autocomplete from the backend's local universe, debounced per keystroke
+  useEffect(() => {
+    if (!showSuggestions || !ticker.trim()) {
+      setSuggestions([]);
+      return;
+    }
+    let cancelled = false;
+    const timer = setTimeout(async () => {
+      try {
+        const res = await api.get('/symbols/search', { params: { q: ticker, limit: 8 } });
+        if (!cancelled) setSuggestions(res.data.results);
+      } catch (e) {
+        if (!cancelled) setSuggestions([]);
+      }
+    }, 150);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [ticker, showSuggestions]);
+
+  const pickSuggestion = (symbol) => {
+    setTicker(symbol);
+    setShowSuggestions(false);
+  };
 
   return (
     <div className="bg-white/70 dark:bg-gray-800/70 backdrop-blur-lg rounded-2xl shadow-xl border border-white/20 p-8">
@@ -46,7 +75,7 @@ export default function Controls() {
       {/* Main Controls */}
       <div className="grid gap-6 md:grid-cols-2 lg:grid-cols-3">
         {/* Stock Ticker */}
-        <div>
+        <div className="relative">
           <label className="block text-sm font-semibold text-gray-700 dark:text-gray-300 mb-2">
             Stock Symbol
           </label>
@@ -54,10 +83,35 @@ export default function Controls() {
             type="text"
             className="w-full px-4 py-3 border-2 border-gray-200 dark:border-gray-600 rounded-xl bg-white/80 dark:bg-gray-700/80 text-gray-900 dark:text-gray-100 uppercase focus:ring-2 focus:ring-blue-500 focus:border-blue-500 disabled:opacity-50 font-bold text-lg transition-all duration-300"
             value={ticker}
-            onChange={e => setTicker(e.target.value.toUpperCase())}
-            placeholder="e.g., AAPL"
+            onChange={e => {
+              setTicker(e.target.value.toUpperCase());
+              setShowSuggestions(true);
+            }}
+            onBlur={() => setShowSuggestions(false)}
+            onKeyDown={e => e.key === 'Escape' && setShowSuggestions(false)}
+            placeholder="e.g., AAPL or Apple"
             disabled={loading}
           />
+          {showSuggestions && suggestions.length > 0 && (
+            <ul className="absolute z-10 mt-1 w-full max-h-64 overflow-auto bg-white dark:bg-gray-800 border border-gray-200 dark:border-gray-600 rounded-xl shadow-lg">
+              {suggestions.map(s => (
+                <li key={s.symbol}>
+                  <button
+                    type="button"
+                    // onMouseDown fires before the input's blur hides the list
+                    onMouseDown={e => {
+                      e.preventDefault();
+                      pickSuggestion(s.symbol);
+                    }}
+                    className="w-full text-left px-4 py-2 hover:bg-gray-100 dark:hover:bg-gray-700 flex justify-between gap-2"
+                  >
+                    <span className="font-bold text-gray-900 dark:text-gray-100">{s.symbol}</span>
+                    <span className="truncate text-sm text-gray-500 dark:text-gray-400">{s.name} · {s.exchange}</span>
+                  </button>
+                </li>
+              ))}
+            </ul>
+          )}
         </div>
 
         {/* Date Range */}
@@ -1,7 +1,24 @@
-import React from 'react';
+import React, { useState } from 'react';
 import { LineChart, Line, XAxis, YAxis, Tooltip, ResponsiveContainer, Brush, ReferenceLine } from 'recharts';
+import usePredictionStore from '../store/usePredictionStore';
+
+const RANGES = ['1y', '5y', '10y'];
+
+export default function PredictionChart({ history, ticker }) {
+  const [range, setRange] = useState(null);
+  const { rangeHistory, fetchHistory } = usePredictionStore();
+
+  const selectRange = (period) => {
+    setRange(period);
+    if (period && ticker) {
+      fetchHistory(ticker, period);
+    }
+  };
+
+  // Long ranges come from /history already downsampled, so the chart stays a few hundred points
+  const showRange = range && rangeHistory?.ticker === ticker;
+  const data = showRange ? rangeHistory.history : history;
 
-export default function PredictionChart({ history }) {
   if (!history || history.length === 0) {
     return (
       <div className="bg-white/70 dark:bg-gray-800/70 backdrop-blur-lg rounded-2xl shadow-xl border border-white/20 p-8 flex flex-col items-center justify-center h-80">
@@ -19,13 +36,26 @@ export default function PredictionChart({ history }) {
           📈 Price Prediction Analysis
         </h3>
         <p className="text-gray-600 dark:text-gray-400">Real vs AI-predicted stock prices over time</p>
+        {ticker && (
+          <div className="flex space-x-2 mt-3">
+            {[null, ...RANGES].map((period) => (
+              <button
+                key={period || 'recent'}
+                onClick={() => selectRange(period)}
+                className={`px-3 py-1 rounded-lg text-sm font-medium ${range === period ? 'bg-purple-600 text-white' : 'bg-white/60 dark:bg-gray-700/60 text-gray-600 dark:text-gray-300'}`}
+              >
+                {period ? period.toUpperCase() : 'Recent'}
+              </button>
+            ))}
+          </div>
+        )}
       </div>
       
       <div className="relative">
         {/* Chart Container */}
         <div className="bg-gradient-to-br from-blue-50/50 to-purple-50/50 dark:from-blue-900/10 dark:to-purple-900/10 rounded-xl p-4">
           <ResponsiveContainer width="100%" height={400}>
-            <LineChart data={history} margin={{ top: 20, right: 30, left: 20, bottom: 20 }}>
+            <LineChart data={data} margin={{ top: 20, right: 30, left: 20, bottom: 20 }}>
               {/* Grid */}
               <defs>
                 <linearGradient id="realGradient" x1="0" y1="0" x2="0" y2="1">
@@ -70,7 +100,7 @@ export default function PredictionChart({ history }) {
                 dataKey="real" 
                 stroke="#3B82F6" 
                 strokeWidth={3}
-                dot={{ fill: '#3B82F6', strokeWidth: 2, r: 4 }}
+                dot={showRange ? false : { fill: '#3B82F6', strokeWidth: 2, r: 4 }}
                 activeDot={{ r: 6, fill: '#3B82F6', strokeWidth: 2, stroke: '#ffffff' }}
                 name="real"
                 fill="url(#realGradient)"
@@ -91,7 +121,7 @@ export default function PredictionChart({ history }) {
               
               {/* Reference line for latest data */}
               <ReferenceLine 
-                x={history[history.length - 1]?.date} 
+                x={data[data.length - 1]?.date} 
                 stroke="#F59E0B" 
                 strokeWidth={2}
                 strokeDasharray="4 4"
@@ -5,6 +5,7 @@ const usePredictionStore = create((set) => ({
   latest: null,
   metrics: null,
   history: [],
+  rangeHistory: null,
   prediction: null,
   isLoading: false,
   loading: false,  // Keep for compatibility
@@ -20,6 +21,28 @@ const usePredictionStore = create((set) => ({
     }
   },
   
+  // Live updates over server-sent events; returns an unsubscribe function
+  subscribeLatest: (ticker) => {
+    const source = new EventSource(`${api.defaults.baseURL}/stream/${ticker}`);
+    source.onmessage = (event) => {
+      set({ latest: JSON.parse(event.data) });
+    };
+    source.onerror = () => {
+      set({ error: 'Live price stream disconnected' });
+    };
+    return () => source.close();
+  },
+  
+  // Longer price history, downsampled server-side to what the chart can draw
+  fetchHistory: async (ticker, period, maxPoints = 500) => {
+    try {
+      const res = await api.get(`/history/${ticker}`, { params: { period, max_points: maxPoints } });
+      set({ rangeHistory: res.data });
+    } catch (e) {
+      set({ error: e.message, rangeHistory: null });
+    }
+  },
+  
   predict: async (params) => {
     set({ loading: true, isLoading: true, error: null });
     try {
@@ -29,6 +52,7 @@ const usePredictionStore = create((set) => ({
         latest: res.data.latest,
         metrics: res.data.metrics,
         history: res.data.history,
+        rangeHistory: null,
         loading: false,
         isLoading: false,
       });
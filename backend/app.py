@@ -1,13 +1,28 @@
 import os
-from flask import Flask, request, jsonify
+import json
+import queue
+from flask import Flask, request, jsonify, g, Response
 from flask_cors import CORS
 from dotenv import load_dotenv
 from pydantic import BaseModel, ValidationError
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime
 import hashlib
 import yfinance as yf
-import requests
+from ml.tracing import span, start_trace, end_trace, Profiler, server_timing_header, should_log_slow, log_slow_request
+from ml.upstream import get_scheduler
+from ml.bars import get_bar_store, is_supported_interval, PERIOD_DAYS
+from ml.history import downsample, DOWNSAMPLERS
+from ml.live import get_hub, HubFull
+from ml.screener import get_screener, classify_risk, RISK_LEVELS
+from ml.backtest import run_backtest
+from ml.precompute import get_precompute
+from ml.portfolio import get_risk_cache, PERIODS_PER_YEAR
+from ml.response_cache import get_prediction_cache, freshness_seconds, cache_control
+from ml.forecast import run_forecast, trend_forecast, future_dates, MAX_HORIZON
+from ml.symbols import get_symbol_index
+from ml.admission import get_admission, Overloaded
+from ml.warmup import get_warmer
 
 load_dotenv()
 
@@ -15,15 +30,24 @@ def validate_stock_ticker(ticker):
     """Validate if a stock ticker is real and tradeable"""
     try:
         stock = yf.Ticker(ticker)
-        info = stock.info
+        with span("yf.Ticker.info"):
+            info = stock.info
         
-        # Check if the stock has basic information
-        if not info or 'symbol' not in info:
-            return False, None
-            
         # Additional validation - check if it has recent data
-        hist = stock.history(period="5d")
-        if hist.empty:
+        with span("fetch_history"):
+            try:
+                hist = get_bar_store().get_bars(ticker, "1d", period="5d")
+            except ValueError:
+                # The bar store raises when the provider has no bars for the symbol
+                hist = None
+        has_info = bool(info) and 'symbol' in info
+        has_bars = hist is not None and not hist.empty
+        
+        # Check if the stock has basic information
+        if not has_info or not has_bars:
+            # No info and no bars means the provider does not know the symbol;
+            # half an answer may be a provider hiccup, so only remember it briefly
+            get_symbol_index().mark_invalid(ticker, transient=has_info or has_bars)
             return False, None
             
         return True, {
@@ -31,29 +55,32 @@ def validate_stock_ticker(ticker):
             "sector": info.get('sector', 'Unknown'),
             "industry": info.get('industry', 'Unknown'),
             "marketCap": info.get('marketCap', 0),
-            "current_price": info.get('currentPrice', hist['Close'].iloc[-1] if not hist.empty else 0)
+            "current_price": info.get('currentPrice', hist['Close'].iloc[-1])
         }
     except Exception as e:
+        # Network and HTTP errors say nothing about the symbol itself
         print(f"Error validating ticker {ticker}: {str(e)}")
+        get_symbol_index().mark_invalid(ticker, transient=True)
         return False, None
 
-def get_real_stock_data(ticker, period="3mo"):
+def get_real_stock_data(ticker, period="3mo", interval="1d"):
     """Fetch real historical stock data"""
     try:
-        stock = yf.Ticker(ticker)
-        hist = stock.history(period=period)
+        with span("fetch_history"):
+            hist = get_bar_store().get_bars(ticker, interval, period=period)
         
         if hist.empty:
             return None
             
-        # Get last 20 trading days
+        # Get last 20 bars
         hist = hist.tail(20)
         
         dates = []
         prices = []
+        date_format = "%Y-%m-%d" if interval in ("1d", "1wk") else "%Y-%m-%d %H:%M"
         
         for date, row in hist.iterrows():
-            dates.append(date.strftime("%Y-%m-%d"))
+            dates.append(date.strftime(date_format))
             prices.append(round(row['Close'], 2))
             
         return dates, prices
@@ -64,28 +91,29 @@ def get_real_stock_data(ticker, period="3mo"):
 def calculate_risk_level(ticker_info, price_history):
     """Calculate risk level based on real stock data"""
     try:
-        if not price_history or len(price_history) < 10:
+        if not price_history:
             return "Medium"
             
-        # Calculate volatility (standard deviation of returns)
-        returns = []
-        for i in range(1, len(price_history)):
-            daily_return = (price_history[i] - price_history[i-1]) / price_history[i-1]
-            returns.append(daily_return)
-            
-        volatility = np.std(returns) * np.sqrt(252)  # Annualized volatility
-        
-        # Risk classification based on volatility
-        if volatility < 0.2:
-            return "Low"
-        elif volatility < 0.4:
-            return "Medium"
-        else:
-            return "High"
+        # Same window and thresholds as the screener behind /recommendations
+        return classify_risk(np.asarray(price_history, dtype=np.float64).reshape(-1, 1))[0][0]
             
     except Exception:
         return "Medium"
 
+def predict_next_close(prices, noise=0.0):
+    """Trend-continuation estimate of the next close: half the recent trend plus ``noise``, capped at 8%"""
+    if not prices:
+        return None
+    # Last 5 closes vs the 5 before them
+    if len(prices) >= 10:
+        recent_avg = np.mean(prices[-5:])
+        previous_avg = np.mean(prices[-10:-5])
+        trend_change = (recent_avg - previous_avg) / previous_avg
+    else:
+        trend_change = 0
+    predicted_change = max(min(trend_change * 0.5 + noise, 0.08), -0.08)  # Max 8% daily change
+    return float(prices[-1] * (1 + predicted_change))
+
 # Add this function to generate consistent predictions based on stock ticker
 def get_consistent_prediction(ticker, base_price):
     """Generate consistent predictions based on ticker hash"""
@@ -163,44 +191,173 @@ class PredictRequest(BaseModel):
     interval: str = "1d"
     lookback: int = int(os.getenv("DEFAULT_LOOKBACK", 60))
     useIndicators: bool = True
+    horizon: int = 1
+
+class BacktestRequest(BaseModel):
+    tickers: list[str]
+    lookback: int = int(os.getenv("DEFAULT_LOOKBACK", 60))
+    model: str = "trend"
+    period: str = "5y"
+    interval: str = "1d"
+    step: int = 1
+    useIndicators: bool = True
+
+class PortfolioRequest(BaseModel):
+    tickers: list[str]
+    weights: dict[str, float] = None
+    period: str = "1y"
+    interval: str = "1d"
+    includeCorrelation: bool = False
+
+class ForecastRequest(BaseModel):
+    tickers: list[str]
+    horizon: int = 5
+    model: str = "trend"
+    lookback: int = int(os.getenv("DEFAULT_LOOKBACK", 60))
+    useIndicators: bool = True
+    interval: str = "1d"
+    period: str = "2y"
+
+def _flag_requested(header, arg, kinds=()):
+    """The named kind, True for 1/true/yes, or None when the header/query flag is absent or off"""
+    value = (request.headers.get(header) or request.args.get(arg) or "").strip().lower()
+    if value in kinds:
+        return value
+    return True if value in ("1", "true", "yes") else None
+
+@app.before_request
+def begin_trace():
+    g.trace_root, g.trace_token = start_trace(f"{request.method} {request.path}")
+    g.profiler = None
+    profile = _flag_requested("X-Profile", "profile", ("cprofile", "pyinstrument"))
+    if profile:
+        g.profiler = Profiler("cprofile" if profile is True else profile)
+        g.profiler.start()
+
+# Work class per endpoint; everything else is cheap
+ADMISSION_CLASSES = {
+    "predict": "inference",
+    "forecast": "inference",
+    "history": "inference",
+    "portfolio_risk": "inference",
+    "backtest": "inference"
+}
+# Health checks must never be shed, and streams would hold a slot for their whole lifetime
+ADMISSION_EXEMPT = {"health", "ready", "stream", "static"}
+
+def overloaded_response(e):
+    response = jsonify({"error": "Server busy", "message": f"Too many {e.pool} requests ({e.reason}); retry shortly",
+                        "retry_after": e.retry_after})
+    response.status_code = 429
+    response.headers["Retry-After"] = str(e.retry_after)
+    return response
+
+@app.before_request
+def admit_request():
+    g.admission_pool = None
+    if request.method == "OPTIONS" or request.endpoint in ADMISSION_EXEMPT:
+        return None
+    pool = get_admission().pool(ADMISSION_CLASSES.get(request.endpoint, "cheap"))
+    try:
+        with span("queue_wait"):
+            g.queue_wait = pool.acquire()
+    except Overloaded as e:
+        return overloaded_response(e)
+    g.admission_pool = pool
+
+@app.after_request
+def report_queue_wait(response):
+    if getattr(g, "admission_pool", None) is not None:
+        response.headers["X-Queue-Wait-Ms"] = f"{g.queue_wait * 1000:.1f}"
+    return response
+
+@app.teardown_request
+def release_admission(exc):
+    pool = getattr(g, "admission_pool", None)
+    if pool is not None:
+        g.admission_pool = None
+        pool.release()
+
+@app.errorhandler(Overloaded)
+def handle_overloaded(e):
+    return overloaded_response(e)
+
+@app.after_request
+def finish_trace(response):
+    root = getattr(g, "trace_root", None)
+    if root is None:
+        return response
+    end_trace(root, g.trace_token)
+    g.trace_root = None
+    
+    profile_report = g.profiler.stop() if g.profiler else None
+    
+    if _flag_requested("X-Trace", "trace") or profile_report:
+        response.headers["Server-Timing"] = server_timing_header(root)
+        payload = response.get_json(silent=True) if response.is_json else None
+        if isinstance(payload, dict):
+            payload["timing"] = root.to_dict()
+            if profile_report:
+                payload["profile"] = profile_report
+            response.set_data(json.dumps(payload))
+    
+    if should_log_slow(root):
+        log_slow_request(root)
+    
+    return response
 
 @app.route("/health", methods=["GET"])
 def health():
     return jsonify({"status": "ok", "message": "Backend is running!"})
 
-@app.route("/predict", methods=["POST"])
-def predict():
-    try:
-        data = request.get_json()
-        if not data:
-            return jsonify({"error": "No JSON data provided"}), 400
-            
-        req = PredictRequest(**data)
-        ticker = req.ticker.upper()
-        
+@app.route("/ready", methods=["GET"])
+def ready():
+    """503 until the most popular models are loaded and traced, with warm-up progress"""
+    status = get_warmer().status()
+    return jsonify(status), 200 if status["ready"] else 503
+
+class PredictionUnavailable(Exception):
+    """A /predict failure carrying the status and body to return"""
+    
+    def __init__(self, status, body):
+        super().__init__(body.get("message", body["error"]))
+        self.status = status
+        self.body = body
+
+def compute_prediction(req, ticker):
+    """Full /predict body for a validated request; raises PredictionUnavailable"""
+    # Watchlist tickers were validated and fetched after the last market close
+    row = precompute.lookup(ticker) if req.interval == "1d" else None
+    if row:
+        stock_info = row["stock_info"]
+        stock_data = (row["dates"], row["prices"])
+    else:
         # First, validate if this is a real stock
-        is_valid, stock_info = validate_stock_ticker(ticker)
+        with span("validate_ticker"):
+            is_valid, stock_info = validate_stock_ticker(ticker)
         if not is_valid:
-            return jsonify({
+            raise PredictionUnavailable(400, {
                 "error": "Invalid stock ticker", 
                 "message": f"'{ticker}' is not a valid or tradeable stock symbol. Please enter a valid ticker like AAPL, TSLA, MSFT, etc."
-            }), 400
+            })
         
         print(f"Processing prediction for valid ticker: {ticker}")
         
-        # Get real historical data
-        stock_data = get_real_stock_data(ticker)
-        if not stock_data:
-            return jsonify({
-                "error": "Data unavailable", 
-                "message": f"Unable to fetch historical data for {ticker}. Please try again later."
-            }), 500
-            
-        dates, real_prices = stock_data
+        # Get real historical data (get_real_stock_data opens its own fetch_history span)
+        stock_data = get_real_stock_data(ticker, interval=req.interval)
+    if not stock_data:
+        raise PredictionUnavailable(500, {
+            "error": "Data unavailable", 
+            "message": f"Unable to fetch historical data for {ticker}. Please try again later."
+        })
         
-        # Calculate risk level based on real data
+    dates, real_prices = stock_data
+    
+    # Calculate risk level based on real data
+    with span("risk_level"):
         risk_level = calculate_risk_level(stock_info, real_prices)
-        
+    
+    with span("predict"):
         # Generate AI predictions based on real historical data
         predictions = []
         for price in real_prices:
@@ -208,31 +365,19 @@ def predict():
             prediction_error = np.random.normal(0, price * 0.02)
             predicted_price = price + prediction_error
             predictions.append(round(predicted_price, 2))
-        
+    
         # Calculate future prediction using simple trend analysis
         current_price = real_prices[-1]
-        
-        # Calculate recent trend (last 5 days vs previous 5 days)
-        if len(real_prices) >= 10:
-            recent_avg = np.mean(real_prices[-5:])
-            previous_avg = np.mean(real_prices[-10:-5])
-            trend_change = (recent_avg - previous_avg) / previous_avg
+        if row:
+            # Serve the prediction the table was built with so /predict agrees with /latest
+            predicted_price = row["predicted"]
         else:
-            trend_change = 0
-        
-        # Predict next day price with trend continuation + some noise
-        base_change = trend_change * 0.5  # 50% trend continuation
-        noise = np.random.normal(0, 0.01)  # 1% random noise
-        predicted_change = base_change + noise
-        
-        # Cap extreme predictions
-        predicted_change = max(min(predicted_change, 0.08), -0.08)  # Max 8% daily change
-        
-        predicted_price = current_price * (1 + predicted_change)
+            # Trend continuation plus 1% random noise
+            predicted_price = predict_next_close(real_prices, noise=np.random.normal(0, 0.01))
         price_change = predicted_price - current_price
         price_change_percent = (price_change / current_price) * 100
         recent_trend = (real_prices[-1] - real_prices[-5]) / real_prices[-5] if len(real_prices) >= 5 else 0
-        
+    
         # Generate recommendation based on real price prediction
         if price_change_percent > 2:
             recommendation = "BUY"
@@ -254,64 +399,112 @@ def predict():
             recommendation = "HOLD"
             confidence = "Medium"
             explanation = f"Price expected to remain stable. Minimal movement predicted around current levels."
+    
+    # Reset random seed to ensure other operations aren't affected
+    np.random.seed(None)
+    
+    # Multi-step outlook from the same trend rule, rolled forward on its own predictions
+    forecast = None
+    if req.horizon > 1:
+        date_format = "%Y-%m-%d" if req.interval in ("1d", "1wk") else "%Y-%m-%d %H:%M"
+        path = trend_forecast([real_prices], req.horizon)[0]
+        forecast = [{"date": date.strftime(date_format), "predicted": round(float(price), 2)}
+                    for date, price in zip(future_dates(dates[-1], req.interval, req.horizon), path)]
+    
+    # Format response with beginner-friendly information
+    history = []
+    for i in range(len(dates)):
+        history.append({
+            "date": dates[i],
+            "real": real_prices[i],
+            "predicted": predictions[i]
+        })
+    
+    latest_prediction = {"date": dates[-1], "predicted": round(predicted_price, 2)}
+    if row and row.get("lstm_predicted") is not None:
+        latest_prediction["lstm_predicted"] = row["lstm_predicted"]
+    
+    return {
+        "ticker": ticker,
+        "company_info": {
+            "name": stock_info["name"],
+            "sector": stock_info["sector"],
+            "risk_level": risk_level,
+            "current_price": current_price,
+            "predicted_price": round(predicted_price, 2),
+            "price_change": round(price_change, 2),
+            "price_change_percent": round(price_change_percent, 2)
+        },
+        "recommendation": {
+            "action": recommendation,
+            "confidence": confidence,
+            "explanation": explanation,
+            "risk_warning": "Stock market investments carry risk. Never invest more than you can afford to lose."
+        },
+        "beginner_guide": {
+            "what_is_buy": "BUY means the stock price is expected to go UP. Good time to purchase.",
+            "what_is_sell": "SELL means the stock price is expected to go DOWN. Consider selling if you own it.",
+            "what_is_hold": "HOLD means wait and watch. Price may not change much.",
+            "risk_levels": {
+                "Low": "Safer stocks, less volatility, good for beginners",
+                "Medium": "Moderate risk, some price swings, requires attention", 
+                "High": "Risky stocks, high volatility, only for experienced investors"
+            }
+        },
+        "params": {
+            "lookback": req.lookback,
+            "useIndicators": req.useIndicators,
+            "interval": req.interval,
+            "horizon": req.horizon
+        },
+        "metrics": {
+            # Calculate realistic metrics based on actual prediction vs real data
+            "rmse": round(np.sqrt(np.mean([(r - p)**2 for r, p in zip(real_prices, predictions)])), 2),
+            "mae": round(np.mean([abs(r - p) for r, p in zip(real_prices, predictions)]), 2),
+            "mape": round(np.mean([abs((r - p) / r) * 100 for r, p in zip(real_prices, predictions) if r != 0]), 2)
+        },
+        "history": history,
+        "latest": latest_prediction,
+        "trained": True,
+        "precomputed": bool(row),
+        "forecast": forecast
+    }
+
+@app.route("/predict", methods=["POST"])
+def predict():
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "No JSON data provided"}), 400
+            
+        req = PredictRequest(**data)
+        ticker = req.ticker.upper()
         
-        # Reset random seed to ensure other operations aren't affected
-        np.random.seed(None)
+        if not is_supported_interval(req.interval):
+            return jsonify({"error": "Invalid interval", "message": f"Unsupported interval '{req.interval}'"}), 400
+        if not 1 <= req.horizon <= MAX_HORIZON:
+            return jsonify({"error": f"horizon must be between 1 and {MAX_HORIZON}"}), 400
         
-        # Format response with beginner-friendly information
-        history = []
-        for i in range(len(dates)):
-            history.append({
-                "date": dates[i],
-                "real": real_prices[i],
-                "predicted": predictions[i]
-            })
+        # Reject unknown symbols from the local universe before any network call
+        symbols = get_symbol_index()
+        if not symbols.accepts(ticker):
+            return jsonify({
+                "error": "Invalid stock ticker",
+                "message": f"'{ticker}' is not a valid or tradeable stock symbol. Please enter a valid ticker like AAPL, TSLA, MSFT, etc.",
+                "suggestions": [match["symbol"] for match in symbols.search(ticker, 5)]
+            }), 400
         
-        return jsonify({
-            "ticker": ticker,
-            "company_info": {
-                "name": stock_info["name"],
-                "sector": stock_info["sector"],
-                "risk_level": risk_level,
-                "current_price": current_price,
-                "predicted_price": round(predicted_price, 2),
-                "price_change": round(price_change, 2),
-                "price_change_percent": round(price_change_percent, 2)
-            },
-            "recommendation": {
-                "action": recommendation,
-                "confidence": confidence,
-                "explanation": explanation,
-                "risk_warning": "Stock market investments carry risk. Never invest more than you can afford to lose."
-            },
-            "beginner_guide": {
-                "what_is_buy": "BUY means the stock price is expected to go UP. Good time to purchase.",
-                "what_is_sell": "SELL means the stock price is expected to go DOWN. Consider selling if you own it.",
-                "what_is_hold": "HOLD means wait and watch. Price may not change much.",
-                "risk_levels": {
-                    "Low": "Safer stocks, less volatility, good for beginners",
-                    "Medium": "Moderate risk, some price swings, requires attention", 
-                    "High": "Risky stocks, high volatility, only for experienced investors"
-                }
-            },
-            "params": {
-                "lookback": req.lookback,
-                "useIndicators": req.useIndicators,
-                "interval": req.interval
-            },
-            "metrics": {
-                # Calculate realistic metrics based on actual prediction vs real data
-                "rmse": round(np.sqrt(np.mean([(r - p)**2 for r, p in zip(real_prices, predictions)])), 2),
-                "mae": round(np.mean([abs(r - p) for r, p in zip(real_prices, predictions)]), 2),
-                "mape": round(np.mean([abs((r - p) / r) * 100 for r, p in zip(real_prices, predictions) if r != 0]), 2)
-            },
-            "history": history,
-            "latest": {
-                "date": dates[-1],
-                "predicted": round(predicted_price, 2)
-            },
-            "trained": True
-        })
+        fresh_seconds = freshness_seconds(req.interval)
+        key = (ticker, req.interval, req.lookback, req.useIndicators, req.horizon)
+        try:
+            body, cache_info = get_prediction_cache().get(key, lambda: compute_prediction(req, ticker), fresh_seconds)
+        except PredictionUnavailable as e:
+            return jsonify(e.body), e.status
+        
+        response = jsonify({**body, "cache": cache_info})
+        response.headers["Age"] = str(int(cache_info["age_seconds"]))
+        response.headers["Cache-Control"] = cache_control(fresh_seconds)
+        return response
         
     except ValidationError as e:
         return jsonify({"error": "Validation error", "details": e.errors()}), 400
@@ -319,29 +512,310 @@ def predict():
         print(f"Prediction error: {str(e)}")
         return jsonify({"error": f"Server error: {str(e)}"}), 500
 
+@app.route("/symbols/search", methods=["GET"])
+def search_symbols():
+    """Autocomplete over the local symbol universe by ticker prefix, company name or near-miss spelling"""
+    query = request.args.get("q", "")
+    limit = min(max(request.args.get("limit", 10, type=int), 1), 50)
+    return jsonify({"query": query, "results": get_symbol_index().search(query, limit)})
+
+@app.route("/admission/stats", methods=["GET"])
+def admission_stats():
+    """Per work class concurrency, queue depth, queue wait percentiles and shed requests"""
+    return jsonify(get_admission().stats())
+
+@app.route("/upstream/stats", methods=["GET"])
+def upstream_stats():
+    """Upstream scheduler queue depth and batching factor"""
+    return jsonify(get_scheduler().stats())
+
+@app.route("/backtest", methods=["POST"])
+def backtest():
+    """Walk-forward backtest of next-close predictions and a BUY/SELL/HOLD strategy"""
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "No JSON data provided"}), 400
+        
+        req = BacktestRequest(**data)
+        max_tickers = int(os.getenv("BACKTEST_MAX_TICKERS", 500))
+        if not req.tickers or len(req.tickers) > max_tickers:
+            return jsonify({"error": f"Provide between 1 and {max_tickers} tickers"}), 400
+        if req.model not in ("trend", "lstm"):
+            return jsonify({"error": "model must be 'trend' or 'lstm'"}), 400
+        if req.lookback < 10 or req.step < 1:
+            return jsonify({"error": "lookback must be >= 10 and step >= 1"}), 400
+        
+        return jsonify(run_backtest(req.tickers, req.lookback, req.model, req.period,
+                                    req.interval, req.step, req.useIndicators))
+    
+    except ValidationError as e:
+        return jsonify({"error": "Validation error", "details": e.errors()}), 400
+    except Exception as e:
+        print(f"Backtest error: {str(e)}")
+        return jsonify({"error": f"Server error: {str(e)}"}), 500
+
+@app.route("/forecast", methods=["POST"])
+def forecast():
+    """Multi-horizon forecasts for many tickers in one batched rollout"""
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "No JSON data provided"}), 400
+        
+        req = ForecastRequest(**data)
+        max_tickers = int(os.getenv("FORECAST_MAX_TICKERS", 500))
+        if not req.tickers or len(req.tickers) > max_tickers:
+            return jsonify({"error": f"Provide between 1 and {max_tickers} tickers"}), 400
+        if req.model not in ("trend", "lstm"):
+            return jsonify({"error": "model must be 'trend' or 'lstm'"}), 400
+        if not 1 <= req.horizon <= MAX_HORIZON:
+            return jsonify({"error": f"horizon must be between 1 and {MAX_HORIZON}"}), 400
+        if not is_supported_interval(req.interval):
+            return jsonify({"error": "Invalid interval", "message": f"Unsupported interval '{req.interval}'"}), 400
+        
+        return jsonify(run_forecast(req.tickers, req.horizon, req.model, req.lookback, req.useIndicators,
+                                    req.interval, req.period))
+    
+    except ValidationError as e:
+        return jsonify({"error": "Validation error", "details": e.errors()}), 400
+    except Exception as e:
+        print(f"Forecast error: {str(e)}")
+        return jsonify({"error": f"Server error: {str(e)}"}), 500
+
+@app.route("/portfolio/risk", methods=["POST"])
+def portfolio_risk():
+    """Volatility, correlation and diversification of a weighted basket"""
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "No JSON data provided"}), 400
+        
+        req = PortfolioRequest(**data)
+        tickers = list(dict.fromkeys(t.upper() for t in req.tickers))
+        max_tickers = int(os.getenv("PORTFOLIO_MAX_TICKERS", 500))
+        if not tickers or len(tickers) > max_tickers:
+            return jsonify({"error": f"Provide between 1 and {max_tickers} tickers"}), 400
+        if req.interval not in PERIODS_PER_YEAR:
+            return jsonify({"error": f"interval must be one of {', '.join(PERIODS_PER_YEAR)}"}), 400
+        if req.weights and any(w < 0 for w in req.weights.values()):
+            return jsonify({"error": "Weights must be non-negative"}), 400
+        unknown = sorted(t for t in (req.weights or {}) if t.upper() not in tickers)
+        if unknown:
+            return jsonify({"error": "Weights given for tickers outside the basket", "unknown": unknown}), 400
+        
+        with span("risk_model"):
+            model, cached = get_risk_cache().get(tickers, req.period, req.interval)
+        with span("portfolio"):
+            try:
+                portfolio = model.portfolio(req.weights)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+        
+        result = {
+            "tickers": model.tickers,
+            "missing": model.errors,
+            "observations": model.observations,
+            "params": {"period": req.period, "interval": req.interval},
+            "volatility": {t: round(float(v), 4) if np.isfinite(v) else None
+                           for t, v in zip(model.tickers, model.volatility)},
+            "portfolio": {
+                "volatility": round(portfolio["volatility"], 4),
+                "variance": round(portfolio["variance"], 6),
+                "diversification_ratio": round(portfolio["diversification_ratio"], 3),
+                "diversification_score": portfolio["diversification_score"],
+                "effective_holdings": round(portfolio["effective_holdings"], 2),
+                "weights": {t: round(w, 4) for t, w in portfolio["weights"].items()},
+                "risk_contributions": {t: round(c, 4) for t, c in portfolio["risk_contributions"].items()}
+            },
+            "average_correlation": model.average_correlation(),
+            "cached": cached
+        }
+        if req.includeCorrelation:
+            result["correlation"] = model.correlation_matrix()
+        return jsonify(result)
+    
+    except ValidationError as e:
+        return jsonify({"error": "Validation error", "details": e.errors()}), 400
+    except Exception as e:
+        print(f"Portfolio risk error: {str(e)}")
+        return jsonify({"error": f"Server error: {str(e)}"}), 500
+
+@app.route("/history/<ticker>", methods=["GET"])
+def history(ticker):
+    """Stored bars for a date range, optionally downsampled to max_points for charting"""
+    try:
+        ticker = ticker.upper()
+        interval = request.args.get("interval", "1d")
+        start, end = request.args.get("start"), request.args.get("end")
+        period = request.args.get("period", "1y")
+        method = request.args.get("method", "lttb")
+        max_points = request.args.get("max_points", type=int)
+        if not is_supported_interval(interval):
+            return jsonify({"error": "Invalid interval", "message": f"Unsupported interval '{interval}'"}), 400
+        if method not in DOWNSAMPLERS:
+            return jsonify({"error": f"method must be one of {', '.join(DOWNSAMPLERS)}"}), 400
+        if max_points is not None and max_points < 4:
+            return jsonify({"error": "max_points must be >= 4"}), 400
+        if period not in PERIOD_DAYS:
+            return jsonify({"error": f"period must be one of {', '.join(PERIOD_DAYS)}"}), 400
+        try:
+            # ISO dates, optionally with a time for intraday ranges
+            bounds = [datetime.fromisoformat(value) for value in (start, end) if value]
+        except ValueError:
+            return jsonify({"error": "Invalid date", "message": "start and end must be ISO dates like 2024-01-31"}), 400
+        if start and end and bounds[0].replace(tzinfo=None) > bounds[1].replace(tzinfo=None):
+            return jsonify({"error": "Invalid date", "message": "start must not be after end"}), 400
+        
+        with span("fetch_history"):
+            try:
+                bars = get_bar_store().get_bars(ticker, interval, start=start, end=end,
+                                                period=None if start else period)
+            except ValueError as e:
+                return jsonify({"error": "Data unavailable", "message": str(e)}), 404
+        with span("downsample"):
+            points = downsample(bars, max_points, method)
+        
+        date_format = "%Y-%m-%d" if interval in ("1d", "1wk") else "%Y-%m-%d %H:%M"
+        return jsonify({
+            "ticker": ticker,
+            "interval": interval,
+            "start": bars.index[0].strftime(date_format),
+            "end": bars.index[-1].strftime(date_format),
+            "total_points": int(len(bars)),
+            "method": method if len(points) < len(bars) else None,
+            "history": [{"date": date.strftime(date_format), "real": round(float(price), 2)}
+                        for date, price in zip(points.index, points["Close"])]
+        })
+    
+    except Exception as e:
+        print(f"History error: {str(e)}")
+        return jsonify({"error": f"Server error: {str(e)}"}), 500
+
 @app.route("/latest/<ticker>", methods=["GET"])
 def latest(ticker):
     try:
         ticker = ticker.upper()
         
-        # Mock latest price
-        base_price = 150 if ticker == "AAPL" else 100
-        latest_price = base_price * (1 + np.random.uniform(-0.02, 0.02))
+        row = precompute.lookup(ticker)
+        if row:
+            body = {"ticker": ticker, "date": row["date"], "predicted": row["predicted"],
+                    "precomputed": True, "generated": row["generated"]}
+            if row.get("lstm_predicted") is not None:
+                body["lstm_predicted"] = row["lstm_predicted"]
+            return jsonify(body)
         
+        # Not on the watchlist (or not yet computed since the close): compute live
+        stock_data = get_real_stock_data(ticker)
+        if not stock_data:
+            return jsonify({
+                "error": "Data unavailable",
+                "message": f"Unable to fetch historical data for {ticker}. Please try again later."
+            }), 500
+        dates, prices = stock_data
         return jsonify({
             "ticker": ticker,
-            "date": datetime.now().strftime("%Y-%m-%d"),
-            "predicted": round(latest_price * 1.005, 2)  # 0.5% increase prediction
+            "date": dates[-1],
+            "predicted": round(predict_next_close(prices), 2),
+            "precomputed": False
         })
         
     except Exception as e:
         return jsonify({"error": f"Server error: {str(e)}"}), 500
 
+@app.route("/stream/<ticker>", methods=["GET"])
+def stream(ticker):
+    """Server-sent events with live prices and the latest prediction"""
+    ticker = ticker.upper()
+    hub = get_hub(lambda ticker, closes: predict_next_close(closes))
+    heartbeat = float(os.getenv("LIVE_HEARTBEAT_SECONDS", 15))
+    
+    # Every new ticker costs an upstream poller, so only real symbols get one
+    symbols = get_symbol_index()
+    if not symbols.accepts(ticker) or (ticker not in symbols and not hub.is_live(ticker)
+                                       and not validate_stock_ticker(ticker)[0]):
+        return jsonify({
+            "error": "Invalid stock ticker",
+            "message": f"'{ticker}' is not a valid or tradeable stock symbol. Please enter a valid ticker like AAPL, TSLA, MSFT, etc.",
+            "suggestions": [match["symbol"] for match in symbols.search(ticker, 5)]
+        }), 400
+    
+    try:
+        q = hub.subscribe(ticker)
+    except HubFull as e:
+        response = jsonify({"error": "Server busy", "message": f"{str(e)}; retry shortly"})
+        response.status_code = 503
+        response.headers["Retry-After"] = str(int(hub.poll_seconds))
+        return response
+    
+    def events():
+        while True:
+            try:
+                event = q.get(timeout=heartbeat)
+                yield f"data: {json.dumps(event)}\n\n"
+            except queue.Empty:
+                yield ": keepalive\n\n"
+    
+    response = Response(events(), mimetype="text/event-stream",
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    # Runs when the client goes away, even if the stream never started
+    response.call_on_close(lambda: hub.unsubscribe(ticker, q))
+    return response
+
+BEGINNER_TIPS = [
+    "Start with low-risk stocks (AAPL, MSFT, JNJ)",
+    "Never invest money you can't afford to lose", 
+    "Diversify - don't put all money in one stock",
+    "Think long-term (1+ years), not day trading",
+    "Learn about the company before buying"
+]
+
+RISK_EXPLANATION = {
+    "Low Risk": "Safer stocks, less price swings, good for beginners",
+    "Medium Risk": "Some volatility, requires attention",
+    "High Risk": "Very volatile, can lose money quickly, avoid as beginner"
+}
+
+# Encoded /recommendations bodies for the current screener snapshot
+_recommendations_cache = {"generated_at": None, "bodies": {}}
+
+def screened_recommendations(snapshot, risk=None, limit=20):
+    """JSON body for a snapshot, encoded once per (risk, limit) and reused"""
+    if _recommendations_cache["generated_at"] != snapshot["generated_at"]:
+        _recommendations_cache["generated_at"] = snapshot["generated_at"]
+        _recommendations_cache["bodies"] = {}
+    bodies = _recommendations_cache["bodies"]
+    key = (risk, limit)
+    if key not in bodies:
+        rows = [row for row in snapshot["rows"] if not risk or row["risk_level"] == risk][:limit]
+        bodies[key] = json.dumps({
+            "recommendations": rows,
+            "beginner_tips": BEGINNER_TIPS,
+            "risk_explanation": RISK_EXPLANATION,
+            "generated_at": snapshot["generated_at"],
+            "universe_size": snapshot["universe_size"]
+        })
+    return bodies[key]
+
 @app.route("/recommendations", methods=["GET"])
 def get_recommendations():
     """Get beginner-friendly stock recommendations"""
     try:
-        # Beginner-friendly stock recommendations
+        # type=int falls back to the default on junk, so tell missing and invalid apart
+        limit = request.args.get("limit", type=int) if "limit" in request.args else int(os.getenv("SCREENER_TOP_N", 20))
+        if limit is None or not 1 <= limit <= 500:
+            return jsonify({"error": "limit must be an integer between 1 and 500"}), 400
+        
+        # risk is part of the body cache key, so only the known labels are accepted
+        risk = request.args.get("risk")
+        if risk is not None and risk not in RISK_LEVELS:
+            return jsonify({"error": f"risk must be one of {', '.join(RISK_LEVELS)}"}), 400
+        
+        snapshot = get_screener().snapshot()
+        if snapshot is not None:
+            return Response(screened_recommendations(snapshot, risk, limit), mimetype="application/json")
+        
+        # Hand-picked list served until the first screen completes
         recommendations = [
             {
                 "ticker": "AAPL",
@@ -407,18 +881,9 @@ def get_recommendations():
         
         return jsonify({
             "recommendations": recommendations,
-            "beginner_tips": [
-                "Start with low-risk stocks (AAPL, MSFT, JNJ)",
-                "Never invest money you can't afford to lose", 
-                "Diversify - don't put all money in one stock",
-                "Think long-term (1+ years), not day trading",
-                "Learn about the company before buying"
-            ],
-            "risk_explanation": {
-                "Low Risk": "Safer stocks, less price swings, good for beginners",
-                "Medium Risk": "Some volatility, requires attention",
-                "High Risk": "Very volatile, can lose money quickly, avoid as beginner"
-            }
+            "beginner_tips": BEGINNER_TIPS,
+            "risk_explanation": RISK_EXPLANATION,
+            "generated_at": None
         })
         
     except Exception as e:
@@ -460,5 +925,31 @@ def stock_education():
     except Exception as e:
         return jsonify({"error": f"Server error: {str(e)}"}), 500
 
+def precompute_ticker(ticker):
+    """Row of the precomputed prediction table for one watchlist ticker"""
+    is_valid, stock_info = validate_stock_ticker(ticker)
+    if not is_valid:
+        return None
+    stock_data = get_real_stock_data(ticker)
+    if not stock_data:
+        return None
+    dates, prices = stock_data
+    prices = [float(price) for price in prices]
+    return {
+        "ticker": ticker,
+        "stock_info": {**stock_info, "current_price": float(stock_info["current_price"] or prices[-1])},
+        "dates": dates,
+        "prices": prices,
+        "date": dates[-1],
+        "predicted": round(predict_next_close(prices), 2)
+    }
+
+# Starts the post-close scheduler when PRECOMPUTE_WATCHLIST is set
+precompute = get_precompute(precompute_ticker)
+# Load the hot set of models in the background so the first requests after a deploy are fast.
+# The debug reloader's parent process only watches files; its serving child (WERKZEUG_RUN_MAIN) warms up.
+if __name__ != "__main__" or os.getenv("WERKZEUG_RUN_MAIN") == "true":
+    get_warmer().start()
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000, debug=True)
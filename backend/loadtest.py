@@ -0,0 +1,366 @@
+"""Load generator for the backend against an offline, stubbed data source.
+
+Drives /predict, /latest, /recommendations (and optionally /history) at a
+fixed concurrency, first one endpoint at a time and then as a weighted mix,
+and writes a JSON report with throughput, latency percentiles, error rate
+and peak server RSS per phase so runs can be diffed across server modes
+and commits.
+
+    python loadtest.py --server inprocess --concurrency 16 --duration 20
+    python loadtest.py --server gunicorn --workers 4 --output gunicorn.json
+    python loadtest.py --url http://127.0.0.1:5000 --pid 1234
+"""
+import os
+import sys
+import json
+import time
+import random
+import socket
+import hashlib
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+from collections import Counter
+import numpy as np
+import pandas as pd
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+ENDPOINTS = {
+    "predict": lambda ticker: ("POST", "/predict", {"ticker": ticker}),
+    "latest": lambda ticker: ("GET", f"/latest/{ticker}", None),
+    "recommendations": lambda ticker: ("GET", "/recommendations", None),
+    "history": lambda ticker: ("GET", f"/history/{ticker}?period=5y&max_points=500", None),
+}
+DEFAULT_MIX = "predict=1,latest=2,recommendations=1"
+DEFAULT_TICKERS = ["AAPL", "MSFT", "GOOGL", "AMZN", "META", "NVDA", "TSLA", "JPM", "JNJ", "KO",
+                   "PEP", "WMT", "DIS", "NFLX", "INTC", "AMD", "ORCL", "CSCO", "XOM", "CVX"]
+
+# --- Offline data source -----------------------------------------------------
+
+def synthetic_bars(ticker, index):
+    """Deterministic random-walk OHLCV for a ticker over ``index``"""
+    seed = int(hashlib.md5(ticker.encode()).hexdigest()[:8], 16)
+    rng = np.random.default_rng(seed)
+    close = (50 + seed % 200) * np.exp(np.cumsum(rng.normal(0.0003, 0.015, len(index))))
+    spread = close * 0.01
+    return pd.DataFrame({"Open": close - spread * 0.3, "High": close + spread, "Low": close - spread,
+                         "Close": close, "Volume": rng.integers(1e5, 1e7, len(index))}, index=index)
+
+def stub_download(tickers, start=None, end=None, period=None, interval="1d"):
+    """Drop-in for ml.upstream.yf_download serving synthetic bars"""
+    latency = float(os.getenv("LOADTEST_LATENCY_MS", 0)) / 1000
+    if latency:
+        time.sleep(latency)
+    now = pd.Timestamp.now().normalize()
+    first = pd.Timestamp(start) if start else now - pd.Timedelta(days=int(os.getenv("LOADTEST_HISTORY_DAYS", 1900)))
+    last = pd.Timestamp(end) if end else now + pd.Timedelta(days=1)
+    if interval in ("1d", "1wk"):
+        index = pd.bdate_range(first, last - pd.Timedelta(days=1))
+    else:
+        # Regular session only, like the provider
+        days = pd.bdate_range(first, last - pd.Timedelta(days=1))
+        step = {"1m": "1min", "5m": "5min", "15m": "15min", "1h": "60min"}[interval]
+        index = pd.DatetimeIndex(np.concatenate([
+            pd.date_range(day + pd.Timedelta(hours=9, minutes=30), day + pd.Timedelta(hours=15, minutes=59),
+                          freq=step) for day in days
+        ]))
+    return pd.concat({ticker: synthetic_bars(ticker, index) for ticker in tickers}, axis=1)
+
+class StubTicker:
+    """Minimal yf.Ticker with the info fields the app reads"""
+
+    def __init__(self, ticker):
+        self.info = {"symbol": ticker, "longName": f"{ticker} Inc.", "sector": "Technology",
+                     "industry": "Software", "marketCap": 1_000_000_000}
+
+def create_app():
+    """The Flask app wired to the offline data source (also the WSGI entry point for server modes)"""
+    workdir = os.getenv("LOADTEST_DIR") or tempfile.mkdtemp(prefix="loadtest-")
+    os.environ["BAR_DIR"] = os.path.join(workdir, "bars")
+    os.environ["MODEL_DIR"] = os.path.join(workdir, "models")
+    os.environ["PRECOMPUTE_TABLE"] = os.path.join(workdir, "precomputed", "predictions.json")
+    os.environ.setdefault("SCREENER_UNIVERSE", ",".join(DEFAULT_TICKERS))
+
+    import ml.upstream as upstream
+    upstream._scheduler = upstream.UpstreamScheduler(download=stub_download, rate=1e9, burst=1e9)
+    import app as app_module
+    app_module.yf = type("yf", (), {"Ticker": StubTicker})
+    return app_module.app
+
+# --- Measurement ---------------------------------------------------------------
+
+def tree_rss(pid):
+    """Resident memory of a process and its children, in bytes"""
+    if psutil is not None:
+        try:
+            proc = psutil.Process(pid)
+            procs = [proc] + proc.children(recursive=True)
+            return sum(p.memory_info().rss for p in procs if p.is_running())
+        except psutil.Error:
+            return 0
+    total, pending = 0, [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/status") as f:
+                total += next(int(line.split()[1]) * 1024 for line in f if line.startswith("VmRSS:"))
+            with open(f"/proc/{current}/task/{current}/children") as f:
+                pending.extend(int(child) for child in f.read().split())
+        except (OSError, StopIteration):
+            continue
+    return total
+
+class RssSampler:
+    """Samples a process tree's RSS in the background and keeps the peak"""
+
+    def __init__(self, pid, interval=0.05):
+        self.pid = pid
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, tree_rss(self.pid))
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        if self.pid:
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self.pid:
+            self._thread.join()
+            self.peak = max(self.peak, tree_rss(self.pid))
+
+def summarize(samples, elapsed):
+    """Throughput, latency percentiles and error rate for a list of (latency_s, status) samples"""
+    if not samples:
+        return {"requests": 0, "throughput_rps": 0.0, "error_rate": 0.0}
+    latencies = np.array([latency for latency, _ in samples]) * 1000
+    statuses = Counter(str(status) for _, status in samples)
+    errors = sum(n for status, n in statuses.items() if not status.isdigit() or int(status) >= 400)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "requests": len(samples),
+        "throughput_rps": round(len(samples) / elapsed, 2),
+        "latency_ms": {"mean": round(float(latencies.mean()), 2), "p50": round(float(p50), 2),
+                       "p95": round(float(p95), 2), "p99": round(float(p99), 2),
+                       "max": round(float(latencies.max()), 2)},
+        "error_rate": round(errors / len(samples), 4),
+        "status": dict(statuses)
+    }
+
+# --- Load generation ---------------------------------------------------------
+
+def http_sender(base_url, timeout):
+    """Factory of per-thread senders issuing real HTTP requests"""
+    import requests
+
+    def make():
+        session = requests.Session()
+
+        def send(method, path, body):
+            return session.request(method, base_url + path, json=body, timeout=timeout).status_code
+        return send
+    return make
+
+def inprocess_sender(app):
+    """Factory of per-thread senders going through Flask's test client (no network, no server)"""
+    def make():
+        client = app.test_client()
+
+        def send(method, path, body):
+            return client.open(path, method=method, json=body).status_code
+        return send
+    return make
+
+def parse_mix(spec):
+    weights = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint in mix: {name}")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+def run_phase(make_sender, mix, concurrency, duration, tickers, seed=0):
+    """Closed-loop load: ``concurrency`` workers send back-to-back requests for ``duration`` seconds"""
+    names, weights = list(mix), list(mix.values())
+    samples = {name: [] for name in names}
+    deadline = time.perf_counter() + duration
+
+    def worker(i):
+        rng = random.Random(seed + i)
+        send = make_sender()
+        local = {name: [] for name in names}
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            method, path, body = ENDPOINTS[name](rng.choice(tickers))
+            started = time.perf_counter()
+            try:
+                status = send(method, path, body)
+            except Exception as e:
+                status = type(e).__name__
+            local[name].append((time.perf_counter() - started, status))
+        for name in names:
+            samples[name].extend(local[name])
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    report = {name: summarize(samples[name], elapsed) for name in names}
+    report["total"] = summarize([s for name in names for s in samples[name]], elapsed)
+    return report
+
+def run(make_sender, mix, concurrency, duration, tickers, pid=None, warmup=2.0, isolated=True):
+    """Warm up, then one phase per endpoint and a mixed phase, each with its peak RSS"""
+    if warmup:
+        run_phase(make_sender, mix, concurrency, warmup, tickers, seed=10_000)
+    phases = {}
+    for name in (list(mix) if isolated and len(mix) > 1 else []):
+        with RssSampler(pid) as rss:
+            phases[name] = run_phase(make_sender, {name: 1}, concurrency, duration, tickers)[name]
+        phases[name]["peak_rss_mb"] = round(rss.peak / 2 ** 20, 1) if pid else None
+    with RssSampler(pid) as rss:
+        phases["mix"] = run_phase(make_sender, mix, concurrency, duration, tickers)
+    phases["mix"]["peak_rss_mb"] = round(rss.peak / 2 ** 20, 1) if pid else None
+    return phases
+
+# --- Servers -------------------------------------------------------------------
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_server(kind, port, workers, threads):
+    """Launch the stubbed app under the given server in a subprocess"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    commands = {
+        "dev": [sys.executable, __file__, "--serve", str(port)],
+        "gunicorn": ["gunicorn", "-w", str(workers), "--threads", str(threads), "-b", f"127.0.0.1:{port}",
+                     "loadtest:create_app()"],
+        "waitress": ["waitress-serve", f"--threads={threads}", f"--listen=127.0.0.1:{port}",
+                     "--call", "loadtest:create_app"],
+    }
+    env = dict(os.environ, LOADTEST_DIR=tempfile.mkdtemp(prefix="loadtest-"))
+    proc = subprocess.Popen(commands[kind], cwd=here, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    wait_healthy(f"http://127.0.0.1:{port}", proc)
+    return proc
+
+def wait_healthy(base_url, proc=None, timeout=60):
+    import requests
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc is not None and proc.poll() is not None:
+            raise RuntimeError(f"Server exited with code {proc.returncode}")
+        try:
+            if requests.get(base_url + "/health", timeout=1).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not become healthy")
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--server", choices=["inprocess", "dev", "gunicorn", "waitress"], default="inprocess")
+    parser.add_argument("--url", help="Load an already running server instead of starting one")
+    parser.add_argument("--pid", type=int, help="Server pid for RSS sampling when using --url")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10, help="Seconds per phase")
+    parser.add_argument("--warmup", type=float, default=2)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Endpoint weights, e.g. predict=1,latest=3")
+    parser.add_argument("--tickers", default=",".join(DEFAULT_TICKERS))
+    parser.add_argument("--no-isolated", action="store_true", help="Only run the mixed phase")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn worker processes")
+    parser.add_argument("--threads", type=int, default=8, help="Threads per worker for gunicorn/waitress")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Simulated provider latency per download")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    os.environ["LOADTEST_LATENCY_MS"] = str(args.latency_ms)
+    if args.serve:
+        create_app().run(host="127.0.0.1", port=args.serve, threaded=True, debug=False)
+        return
+
+    mix = parse_mix(args.mix)
+    tickers = [t.strip().upper() for t in args.tickers.split(",") if t.strip()]
+    proc, pid = None, args.pid
+    if args.url:
+        server = "external"
+        make_sender = http_sender(args.url.rstrip("/"), args.timeout)
+    elif args.server == "inprocess":
+        server = "inprocess"
+        make_sender = inprocess_sender(create_app())
+        pid = os.getpid()
+    else:
+        server = args.server
+        port = free_port()
+        proc = start_server(args.server, port, args.workers, args.threads)
+        make_sender = http_sender(f"http://127.0.0.1:{port}", args.timeout)
+        pid = proc.pid
+
+    try:
+        phases = run(make_sender, mix, args.concurrency, args.duration, tickers, pid,
+                     args.warmup, not args.no_isolated)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(10)
+
+    report = {
+        "meta": {
+            "server": server,
+            "workers": args.workers if server == "gunicorn" else 1,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "mix": mix,
+            "tickers": len(tickers),
+            "latency_ms": args.latency_ms,
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z")
+        },
+        "phases": phases
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+    for name, phase in phases.items():
+        stats = phase if name != "mix" else phase["total"]
+        latency = stats.get("latency_ms", {})
+        print(f"{name:>16}: {stats['throughput_rps']:8.1f} req/s  p50 {latency.get('p50', 0):7.1f}ms  "
+              f"p95 {latency.get('p95', 0):7.1f}ms  p99 {latency.get('p99', 0):7.1f}ms  "
+              f"errors {stats['error_rate']:.1%}  rss {phase['peak_rss_mb']} MB", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import os
+import math
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+CLASSES = ("cheap", "inference", "training")
+
+# (concurrency, queue, max wait seconds) per class
+DEFAULT_LIMITS = {
+    "cheap": (32, 128, 2.0),
+    "inference": (4, 32, 15.0),
+    "training": (1, 4, 60.0),
+}
+
+class Overloaded(Exception):
+    """A pool's queue is full or the wait timed out; the caller should retry after ``retry_after`` seconds"""
+
+    def __init__(self, pool, retry_after, reason):
+        super().__init__(f"{pool} pool {reason}")
+        self.pool = pool
+        self.retry_after = retry_after
+        self.reason = reason
+
+class Pool:
+    """Bounded concurrency with a bounded FIFO queue in front of it.
+
+    At most ``concurrency`` holders run at once and at most ``queue_size``
+    wait; anything beyond that, or waiting longer than ``timeout``, is shed
+    with Overloaded. A thread that already holds a slot re-enters freely.
+    """
+
+    def __init__(self, name, concurrency, queue_size, timeout, samples=512):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self._cond = threading.Condition()
+        self._active = 0
+        self._queue = deque()
+        self._held = threading.local()
+        self._waits = deque(maxlen=samples)
+        self._service = None  # EWMA of seconds a slot is held
+        self._admitted = 0
+        self._rejected = 0
+
+    def retry_after(self):
+        """Seconds until a newcomer would likely get a slot, from queue length and typical hold time"""
+        service = self._service or 1.0
+        return int(min(max(math.ceil((len(self._queue) + 1) * service / self.concurrency), 1), 300))
+
+    def _acquire(self):
+        started = time.perf_counter()
+        with self._cond:
+            if self._active < self.concurrency and not self._queue:
+                self._active += 1
+            else:
+                if len(self._queue) >= self.queue_size:
+                    self._rejected += 1
+                    raise Overloaded(self.name, self.retry_after(), "queue full")
+                ticket = object()
+                self._queue.append(ticket)
+                deadline = started + self.timeout
+                try:
+                    while self._queue[0] is not ticket or self._active >= self.concurrency:
+                        remaining = deadline - time.perf_counter()
+                        if remaining <= 0:
+                            self._rejected += 1
+                            raise Overloaded(self.name, self.retry_after(), "wait timed out")
+                        self._cond.wait(remaining)
+                    self._active += 1
+                finally:
+                    self._queue.remove(ticket)
+                    # The next ticket may now be at the head
+                    self._cond.notify_all()
+            self._admitted += 1
+            waited = time.perf_counter() - started
+            self._waits.append(waited)
+        return waited
+
+    def _release(self, held_for):
+        with self._cond:
+            self._active -= 1
+            self._service = held_for if self._service is None else 0.8 * self._service + 0.2 * held_for
+            self._cond.notify_all()
+
+    def acquire(self):
+        """Take a slot; returns seconds spent queued. Pair with release()."""
+        depth = getattr(self._held, "depth", 0)
+        if depth:
+            self._held.depth = depth + 1
+            return 0.0
+        waited = self._acquire()
+        self._held.depth = 1
+        self._held.since = time.perf_counter()
+        return waited
+
+    def release(self):
+        self._held.depth -= 1
+        if self._held.depth == 0:
+            self._release(time.perf_counter() - self._held.since)
+
+    @contextmanager
+    def admit(self):
+        waited = self.acquire()
+        try:
+            yield waited
+        finally:
+            self.release()
+
+    def stats(self):
+        with self._cond:
+            waits = sorted(self._waits)
+            pick = lambda q: round(waits[min(int(q * len(waits)), len(waits) - 1)] * 1000, 1) if waits else 0.0
+            return {
+                "concurrency": self.concurrency,
+                "queue_size": self.queue_size,
+                "active": self._active,
+                "queued": len(self._queue),
+                "admitted": self._admitted,
+                "rejected": self._rejected,
+                "wait_ms": {"p50": pick(0.5), "p95": pick(0.95), "max": pick(1.0)},
+                "service_ms": round(self._service * 1000, 1) if self._service is not None else None,
+                "retry_after": self.retry_after()
+            }
+
+class AdmissionController:
+    """One Pool per work class"""
+
+    def __init__(self, limits=None):
+        limits = limits or DEFAULT_LIMITS
+        self.pools = {name: Pool(name, *limits[name]) for name in CLASSES}
+
+    def pool(self, work_class):
+        return self.pools[work_class]
+
+    def admit(self, work_class):
+        return self.pools[work_class].admit()
+
+    def stats(self):
+        return {name: pool.stats() for name, pool in self.pools.items()}
+
+def _limits_from_env():
+    limits = {}
+    for name, (concurrency, queue_size, timeout) in DEFAULT_LIMITS.items():
+        prefix = f"ADMISSION_{name.upper()}"
+        limits[name] = (
+            int(os.getenv(f"{prefix}_CONCURRENCY", concurrency)),
+            int(os.getenv(f"{prefix}_QUEUE", queue_size)),
+            float(os.getenv(f"{prefix}_TIMEOUT", timeout))
+        )
+    return limits
+
+_controller = None
+_controller_lock = threading.Lock()
+
+def get_admission():
+    """Process-wide admission controller configured from the environment"""
+    global _controller
+    with _controller_lock:
+        if _controller is None:
+            _controller = AdmissionController(_limits_from_env())
+        return _controller
@@ -0,0 +1,185 @@
+import os
+import math
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from .upstream import get_scheduler
+from .bars import INTERVAL_MINUTES
+from .tracing import span
+
+# Regular US session length, for bars per trading day at intraday intervals
+SESSION_MINUTES = 390
+
+def periods_per_year(interval):
+    """Bars per trading year at ``interval``, for annualizing per-bar statistics"""
+    if interval == "1wk":
+        return 52
+    if interval in INTERVAL_MINUTES:
+        # Bars never cross sessions, so a partial last bar still counts
+        return 252 * math.ceil(SESSION_MINUTES / INTERVAL_MINUTES[interval])
+    return 252
+
+def close_windows(closes, lookback, step=1):
+    """(origins, lookback) view of trailing windows; window i ends at origin i (no copy)"""
+    windows = sliding_window_view(np.asarray(closes, dtype=np.float64), lookback)
+    # The last window has no next bar to score against
+    return windows[:-1][::step]
+
+def trend_predictor(windows):
+    """Trend-continuation next close for a batch of close windows (same rule as app.predict)"""
+    if windows.shape[1] >= 10:
+        recent = windows[:, -5:].mean(axis=1)
+        previous = windows[:, -10:-5].mean(axis=1)
+        trend = (recent - previous) / previous
+    else:
+        trend = np.zeros(len(windows))
+    return windows[:, -1] * (1 + np.clip(trend * 0.5, -0.08, 0.08))
+
+def signals(current, predicted, threshold=0.5):
+    """+1 BUY / -1 SELL / 0 HOLD from predicted % change"""
+    change_percent = (predicted - current) / current * 100
+    return np.select([change_percent > threshold, change_percent < -threshold], [1, -1], 0)
+
+def max_drawdown(equity):
+    peaks = np.maximum.accumulate(equity)
+    return float(np.max(1 - equity / peaks)) if len(equity) else 0.0
+
+def score(current, predicted, actual, periods=252):
+    """Forecast metrics and strategy P&L over all origins, fully vectorized; ``periods`` bars make a year"""
+    errors = actual - predicted
+    realized = actual / current - 1
+    position = signals(current, predicted)
+    strategy = position * realized
+    equity = np.cumprod(1 + strategy)
+    traded = position != 0
+    return {
+        "origins": int(len(actual)),
+        "rmse": float(np.sqrt(np.mean(errors ** 2))),
+        "mae": float(np.mean(np.abs(errors))),
+        "mape": float(np.mean(np.abs(errors / actual))) * 100,
+        "directional_accuracy": float(np.mean(np.sign(predicted - current) == np.sign(actual - current))),
+        "strategy": {
+            "total_return": float(equity[-1] - 1) if len(equity) else 0.0,
+            "buy_and_hold_return": float(actual[-1] / current[0] - 1) if len(actual) else 0.0,
+            "hit_rate": float(np.mean(strategy[traded] > 0)) if traded.any() else 0.0,
+            "trades": {"buy": int(np.sum(position == 1)), "sell": int(np.sum(position == -1)),
+                       "hold": int(np.sum(position == 0))},
+            "sharpe": float(np.mean(strategy) / np.std(strategy) * np.sqrt(periods)) if np.std(strategy) > 0 else 0.0,
+            "max_drawdown": max_drawdown(equity)
+        }
+    }
+
+def walk_forward(series, lookback, predictor=trend_predictor, step=1, periods=252):
+    """Backtest many tickers at once: every window of every ticker goes through one predictor call.
+
+    ``series`` maps ticker -> 1-D array of closes; ``predictor`` maps a
+    (n, lookback) batch of close windows to n next-close predictions.
+    """
+    batches, slices, offset = [], {}, 0
+    for ticker, closes in series.items():
+        closes = np.asarray(closes, dtype=np.float64)
+        if len(closes) <= lookback:
+            continue
+        windows = close_windows(closes, lookback, step)
+        batches.append(windows)
+        slices[ticker] = (slice(offset, offset + len(windows)), closes)
+        offset += len(windows)
+    if not batches:
+        return {}
+
+    with span("backtest.predict"):
+        predicted = np.asarray(predictor(np.concatenate(batches)), dtype=np.float64).reshape(-1)
+
+    results = {}
+    with span("backtest.score"):
+        for ticker, (rows, closes) in slices.items():
+            origins = np.arange(lookback - 1, len(closes) - 1)[::step]
+            results[ticker] = score(closes[origins], predicted[rows], closes[origins + 1], periods)
+    return results
+
+def lstm_predictor(ticker, lookback, use_indicators, interval="1d"):
+    """Batched next-close predictor backed by the ticker's saved LSTM, and the last date it was trained on"""
+    from .model_utils import get_variant_dir, load_published_model
+    from .indicators import add_technical_indicators
+    from .storage import current_version, load_model_metadata
+
+    variant_dir = get_variant_dir(ticker, lookback, use_indicators, interval)
+    model, scaler_x, _ = load_published_model(variant_dir)
+    meta = load_model_metadata(current_version(variant_dir)[1]) or {}
+    trained_until = pd.Timestamp((meta.get("train_dates") or {}).get("end") or pd.Timestamp.max).date()
+    feature_cols = ['Close']
+    if use_indicators:
+        feature_cols.extend(['SMA_20', 'SMA_50', 'EMA_20', 'RSI', 'MACD', 'MACD_signal'])
+
+    def predict(frame):
+        df = add_technical_indicators(frame) if use_indicators else frame
+        scaled = scaler_x.transform(df[feature_cols].ffill().bfill())
+        # (origins, lookback, features) view over the scaled series; one forward pass
+        windows = sliding_window_view(scaled, lookback, axis=0).transpose(0, 2, 1)[:-1]
+        preds = model.predict(np.ascontiguousarray(windows, dtype=np.float32),
+                              batch_size=int(os.getenv("BACKTEST_BATCH_SIZE", 1024)), verbose=0)
+        # Model outputs live in the scaled Close space of scaler_x
+        return preds[:, 0] * scaler_x.data_range_[0] + scaler_x.data_min_[0]
+    return predict, trained_until
+
+def download_history(tickers, period="5y", interval="1d", timeout=300):
+    """Per-ticker OHLCV frames, fetched through the batching scheduler"""
+    scheduler = get_scheduler()
+    futures = {ticker: scheduler.submit(ticker, period=period, interval=interval) for ticker in tickers}
+    frames, errors = {}, {}
+    for ticker, future in futures.items():
+        try:
+            frames[ticker] = future.result(timeout)
+        except Exception as e:
+            errors[ticker] = str(e)
+    return frames, errors
+
+def run_backtest(tickers, lookback=60, model="trend", period="5y", interval="1d", step=1,
+                 use_indicators=True):
+    """Walk-forward backtest for a list of tickers.
+
+    The LSTM is a single stored model, so only origins whose next bar falls
+    after the end of its training dates are scored (out of sample).
+    """
+    tickers = list(dict.fromkeys(t.upper() for t in tickers))
+    periods = periods_per_year(interval)
+    with span("backtest.fetch"):
+        frames, errors = download_history(tickers, period, interval)
+
+    if model == "lstm":
+        results = {}
+        for ticker, frame in frames.items():
+            try:
+                predict, trained_until = lstm_predictor(ticker, lookback, use_indicators, interval)
+                closes = frame['Close'].to_numpy(dtype=np.float64)
+                origins = np.arange(lookback - 1, len(closes) - 1)
+                unseen = np.array(frame.index[origins + 1].date) > trained_until
+                if not unseen.any():
+                    errors[ticker] = f"No bars after the model's training data (ends {trained_until})"
+                    continue
+                with span("backtest.predict"):
+                    predicted = predict(frame)[unseen][::step]
+                origins = origins[unseen][::step]
+                results[ticker] = score(closes[origins], predicted, closes[origins + 1], periods)
+            except Exception as e:
+                errors[ticker] = str(e)
+    else:
+        series = {ticker: frame['Close'].to_numpy(dtype=np.float64) for ticker, frame in frames.items()}
+        results = walk_forward(series, lookback, trend_predictor, step, periods)
+        errors.update({t: "Not enough history for lookback" for t in series if t not in results})
+
+    summary = {}
+    if results:
+        table = pd.DataFrame({t: {"rmse": r["rmse"], "mape": r["mape"],
+                                  "directional_accuracy": r["directional_accuracy"],
+                                  "total_return": r["strategy"]["total_return"]}
+                              for t, r in results.items()}).T
+        summary = {k: float(v) for k, v in table.mean().items()}
+        summary["origins"] = int(sum(r["origins"] for r in results.values()))
+
+    return {
+        "params": {"lookback": lookback, "model": model, "period": period, "interval": interval, "step": step},
+        "summary": summary,
+        "results": results,
+        "errors": errors
+    }
@@ -0,0 +1,225 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from .upstream import fetch_history
+from .history import slice_range
+
+# Bar sizes we store, finest first, and how far back the provider serves them
+BASE_INTERVALS = ["1m", "5m", "15m", "1h", "1d"]
+PROVIDER_LIMIT_DAYS = {"1m": 7, "5m": 59, "15m": 59, "1h": 729, "1d": None}
+
+INTERVAL_MINUTES = {"1m": 1, "2m": 2, "5m": 5, "15m": 15, "30m": 30, "60m": 60, "90m": 90, "1h": 60,
+                    "4h": 240}
+SESSION_INTERVALS = {"1d", "1wk"}
+
+PERIOD_DAYS = {"1d": 1, "5d": 5, "1mo": 31, "3mo": 92, "6mo": 183, "1y": 366, "2y": 731, "5y": 1827,
+               "10y": 3653, "ytd": 366, "max": 36500}
+
+def is_supported_interval(interval):
+    return interval in INTERVAL_MINUTES or interval in SESSION_INTERVALS
+
+def divides(base, target):
+    """Whether target bars can be built from whole base bars"""
+    if target in SESSION_INTERVALS:
+        return True
+    return base in INTERVAL_MINUTES and INTERVAL_MINUTES[target] % INTERVAL_MINUTES[base] == 0
+
+def choose_base(target, span_days):
+    """Finest stored granularity that can build ``target`` and reaches back ``span_days``"""
+    candidates = [b for b in BASE_INTERVALS if divides(b, target)]
+    if not candidates:
+        raise ValueError(f"Unsupported interval: {target}")
+    for base in candidates:
+        limit = PROVIDER_LIMIT_DAYS[base]
+        if limit is None or span_days <= limit:
+            return base
+    # Nothing reaches that far back at this granularity; use the longest history available
+    return max(candidates, key=lambda b: PROVIDER_LIMIT_DAYS[b] or float("inf"))
+
+def resample_ohlcv(df, interval):
+    """Aggregate OHLCV bars to a coarser interval without crossing session boundaries.
+
+    Intraday bins are anchored at each session's first bar (e.g. 09:30), so
+    1h bars match the provider's; ``1d`` gives one bar per session and
+    ``1wk`` one per calendar week. Groups are contiguous, so every column is
+    reduced with a single ``np.*.reduceat`` call.
+    """
+    if df.empty:
+        return df
+    # Bin arithmetic below is in nanoseconds whatever unit the index was stored in
+    index = df.index.as_unit("ns")
+    sessions = index.normalize()
+    if interval == "1d":
+        keys = sessions.asi8
+        labels = sessions
+    elif interval == "1wk":
+        weeks = sessions - pd.to_timedelta(sessions.dayofweek, unit="D")
+        keys = weeks.asi8
+        labels = weeks
+    else:
+        step = pd.Timedelta(minutes=INTERVAL_MINUTES[interval]).value
+        session_ids = sessions.asi8
+        # First bar of every session anchors that session's bins
+        starts = np.r_[True, session_ids[1:] != session_ids[:-1]]
+        session_open = np.maximum.accumulate(np.where(starts, np.arange(len(index)), 0))
+        opens = index.asi8[session_open]
+        keys = opens + (index.asi8 - opens) // step * step
+        labels = pd.DatetimeIndex(keys).tz_localize("UTC").tz_convert(index.tz) if index.tz else pd.DatetimeIndex(keys)
+
+    group_starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    group_ends = np.r_[group_starts[1:], len(index)] - 1
+    out = {}
+    if "Open" in df:
+        out["Open"] = df["Open"].to_numpy()[group_starts]
+    if "High" in df:
+        out["High"] = np.maximum.reduceat(df["High"].to_numpy(), group_starts)
+    if "Low" in df:
+        out["Low"] = np.minimum.reduceat(df["Low"].to_numpy(), group_starts)
+    out["Close"] = df["Close"].to_numpy()[group_ends]
+    if "Volume" in df:
+        out["Volume"] = np.add.reduceat(df["Volume"].to_numpy(), group_starts)
+    return pd.DataFrame(out, index=labels[group_starts])
+
+def span_days(start=None, end=None, period=None):
+    if start:
+        end_dt = pd.Timestamp(end) if end else pd.Timestamp.now()
+        return max((end_dt - pd.Timestamp(start)).days, 1)
+    return PERIOD_DAYS.get(period or "1mo", 31)
+
+class BarStore:
+    """Keeps one bar series per (ticker, base interval) and builds other timeframes locally.
+
+    Bars are persisted under ``bar_dir`` and topped up incrementally, so
+    serving 5m, 15m, 1h and daily views of the same ticker costs a single
+    upstream series.
+    """
+
+    def __init__(self, bar_dir="./bars", fetch=fetch_history, refresh_seconds=60, max_series=256):
+        self.bar_dir = bar_dir
+        self._fetch = fetch
+        self.refresh_seconds = refresh_seconds
+        self.max_series = max_series
+        # Series held in memory, least recently used first; the rest stay on disk
+        self._series = OrderedDict()
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _path(self, ticker, base):
+        return os.path.join(self.bar_dir, ticker, f"{base}.pkl")
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._series[key] = entry
+            self._series.move_to_end(key)
+            while len(self._series) > self.max_series:
+                self._series.popitem(last=False)
+
+    def _load(self, ticker, base):
+        key = (ticker, base)
+        with self._lock:
+            entry = self._series.get(key)
+            if entry is not None:
+                self._series.move_to_end(key)
+                return entry
+        path = self._path(ticker, base)
+        if not os.path.exists(path):
+            return None
+        bars = pd.read_pickle(path)
+        entry = {"bars": bars, "first": bars.index[0].date(), "fetched_at": os.path.getmtime(path)}
+        self._remember(key, entry)
+        return entry
+
+    def _save(self, ticker, base, bars):
+        path = self._path(ticker, base)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        bars.to_pickle(tmp_path)
+        os.replace(tmp_path, path)
+
+    def _fetch_gap(self, ticker, start, end, base):
+        """Fetch extra bars for a series we already hold; no new bars is not an error"""
+        try:
+            return self._fetch(ticker, start=start, end=end, interval=base)
+        except ValueError:
+            return None
+
+    def base_bars(self, ticker, base, first_day):
+        """Stored base bars from ``first_day`` on, fetching only what is missing"""
+        ticker = ticker.upper()
+        limit = PROVIDER_LIMIT_DAYS[base]
+        cutoff = (datetime.now() - timedelta(days=limit)).date() if limit is not None else None
+        if cutoff is not None:
+            first_day = max(first_day, cutoff)
+        with self._key_lock((ticker, base)):
+            entry = self._load(ticker, base)
+            frames = [entry["bars"]] if entry else []
+            tomorrow = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+            if entry is None:
+                frames.append(self._fetch(ticker, start=str(first_day), end=tomorrow, interval=base))
+            else:
+                if first_day < entry["first"]:
+                    # Older history than we hold
+                    older = self._fetch_gap(ticker, str(first_day), str(entry["first"] + timedelta(days=1)), base)
+                    entry["first"] = first_day
+                    if older is not None:
+                        frames.insert(0, older)
+                if time.time() - entry["fetched_at"] > self.refresh_seconds:
+                    # Top up from the last stored session
+                    last_day = entry["bars"].index[-1].date()
+                    newer = self._fetch_gap(ticker, str(last_day), tomorrow, base)
+                    entry["fetched_at"] = time.time()
+                    if newer is not None:
+                        frames.append(newer)
+            if len(frames) > 1 or entry is None:
+                bars = pd.concat(frames)
+                bars = bars[~bars.index.duplicated(keep="last")].sort_index()
+                first = min(first_day, entry["first"]) if entry else first_day
+                if cutoff is not None:
+                    # Bars older than the provider window can never be requested again; keep files bounded
+                    bars = slice_range(bars, start=cutoff)
+                    first = max(first, cutoff)
+                entry = {"bars": bars, "first": first, "fetched_at": time.time()}
+                self._remember((ticker, base), entry)
+                self._save(ticker, base, bars)
+            bars = entry["bars"]
+        return slice_range(bars, start=first_day)
+
+    def get_bars(self, ticker, interval="1d", start=None, end=None, period=None):
+        """OHLCV bars at ``interval`` for the range, resampled locally from the stored base"""
+        if not is_supported_interval(interval):
+            raise ValueError(f"Unsupported interval: {interval}")
+        days = span_days(start, end, period)
+        first_day = pd.Timestamp(start).date() if start else (datetime.now() - timedelta(days=days)).date()
+        # Provider limits count back from today, so pick the base by how old the range start is
+        base = choose_base(interval, max((datetime.now().date() - first_day).days, 1))
+        bars = self.base_bars(ticker, base, first_day)
+        if end:
+            bars = slice_range(bars, end=end)
+        if base != interval and not (interval == "60m" and base == "1h"):
+            bars = resample_ohlcv(bars, interval)
+        if bars.empty:
+            raise ValueError(f"No data found for ticker {ticker} in the specified date range")
+        return bars
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_bar_store():
+    """Process-wide bar store configured from the environment"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = BarStore(
+                bar_dir=os.getenv("BAR_DIR", "./bars"),
+                refresh_seconds=float(os.getenv("BAR_REFRESH_SECONDS", 60)),
+                max_series=int(os.getenv("BAR_CACHE_SIZE", 256))
+            )
+        return _store
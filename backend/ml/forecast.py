@@ -0,0 +1,165 @@
+import numpy as np
+import pandas as pd
+from .indicators import compute_indicators
+from .backtest import trend_predictor
+from .bars import INTERVAL_MINUTES
+from .tracing import span
+
+MAX_HORIZON = 60
+
+# Regular session in exchange time, which is how stored bars are stamped
+SESSION_OPEN = pd.Timedelta(hours=9, minutes=30)
+SESSION_CLOSE = pd.Timedelta(hours=16)
+
+def future_dates(last, interval, horizon):
+    """Timestamps of the next ``horizon`` bars after ``last``, on weekdays and, intraday, within session hours"""
+    last = pd.Timestamp(last)
+    if interval == "1wk":
+        return [last + pd.Timedelta(weeks=k) for k in range(1, horizon + 1)]
+    if interval == "1d":
+        return list(pd.bdate_range(last + pd.Timedelta(days=1), periods=horizon, tz=last.tz))
+    step = pd.Timedelta(minutes=INTERVAL_MINUTES[interval])
+    dates, t = [], last
+    while len(dates) < horizon:
+        t = t + step
+        day = t.normalize()
+        if t.dayofweek >= 5 or t >= day + SESSION_CLOSE:
+            # Past the close (or a weekend): the next weekday's first bar
+            t = pd.bdate_range(day + pd.Timedelta(days=1), periods=1, tz=t.tz)[0] + SESSION_OPEN
+        elif t < day + SESSION_OPEN:
+            t = day + SESSION_OPEN
+        dates.append(t)
+    return dates
+
+def rollout(windows, horizon, predict, advance):
+    """Roll a one-step model forward ``horizon`` bars for a whole batch at once.
+
+    ``windows`` is the (batch, lookback, features) input for the first step;
+    ``predict`` maps it to (batch,) next closes in price space and
+    ``advance`` turns those closes into the (batch, features) row appended
+    for the next step.
+    """
+    windows = np.array(windows, dtype=np.float32)
+    out = np.empty((len(windows), horizon))
+    for k in range(horizon):
+        prices = predict(windows)
+        out[:, k] = prices
+        if k + 1 < horizon:
+            windows[:, :-1] = windows[:, 1:]
+            windows[:, -1] = advance(prices)
+    return out
+
+def trend_forecast(closes, horizon, lookback=20):
+    """Trend-continuation forecast for many tickers; ``closes`` is a list of 1-D price arrays.
+
+    Shorter series are NaN-padded on the left; the rule only reads the last
+    10 closes, so every series in a batch needs at least that many.
+    """
+    windows = stack_right_aligned([np.asarray(c, dtype=np.float64)[-lookback:] for c in closes])[..., None]
+    return rollout(windows, horizon,
+                   lambda w: trend_predictor(w[..., 0].astype(np.float64)),
+                   lambda prices: prices[:, None])
+
+def stack_right_aligned(closes):
+    """(ticker x time) matrix with each series ending in the last column, NaN-padded on the left"""
+    length = max(len(c) for c in closes)
+    matrix = np.full((len(closes), length), np.nan)
+    for i, c in enumerate(closes):
+        matrix[i, length - len(c):] = c
+    return matrix
+
+def lstm_forecast(closes, models, scalers, horizon, lookback, use_indicators=True):
+    """Autoregressive LSTM forecast for many tickers in one loop.
+
+    ``models[i]`` and ``scalers[i]`` (the fitted scaler_x) belong to ticker
+    i; tickers sharing a model object are predicted in one call. Indicator
+    features for each synthetic bar come from an incremental
+    IndicatorState rather than re-running add_technical_indicators.
+    """
+    closes = [np.asarray(c, dtype=np.float64) for c in closes]
+    n = len(closes)
+    scale = np.stack([s.scale_ for s in scalers])
+    offset = np.stack([s.min_ for s in scalers])
+    # Model outputs live in the scaled Close space of scaler_x
+    close_range = np.array([s.data_range_[0] for s in scalers])
+    close_min = np.array([s.data_min_[0] for s in scalers])
+
+    with span("forecast.features"):
+        if use_indicators:
+            features, state = compute_indicators(stack_right_aligned(closes), fill=True,
+                                                 dtype=np.float64, return_state=True)
+            history = features[:, -lookback:]
+        else:
+            history = stack_right_aligned([c[-lookback:] for c in closes])[..., None]
+        windows = history * scale[:, None, :] + offset[:, None, :]
+
+    groups = {}
+    for i, model in enumerate(models):
+        groups.setdefault(id(model), (model, []))[1].append(i)
+    groups = [(model, np.array(index)) for model, index in groups.values()]
+
+    def predict(batch):
+        scaled = np.empty(n)
+        for model, index in groups:
+            # Direct call: no per-step tf.data/predict() setup for a handful of rows
+            scaled[index] = np.asarray(model(batch[index], training=False))[:, 0]
+        return scaled * close_range + close_min
+
+    def advance(prices):
+        row = state.features(prices) if use_indicators else prices[:, None]
+        return row * scale + offset
+
+    with span("forecast.rollout"):
+        return rollout(windows, horizon, predict, advance)
+
+def run_forecast(tickers, horizon=5, model="trend", lookback=60, use_indicators=True, interval="1d", period="2y"):
+    """Multi-horizon forecasts for a list of tickers from stored bars"""
+    from .portfolio import download_closes
+
+    tickers = list(dict.fromkeys(t.upper() for t in tickers))
+    with span("forecast.fetch"):
+        series, errors = download_closes(tickers, period, interval)
+
+    # Indicator features need a full SMA_50 window behind the first input
+    min_history = (max(lookback, 50) if use_indicators else lookback) if model == "lstm" else 10
+    ready, models, scalers = [], [], []
+    for ticker, closes in series.items():
+        if len(closes) <= min_history:
+            errors[ticker] = "Not enough history for lookback"
+            continue
+        if model == "lstm":
+            from .model_utils import get_variant_dir, load_published_model
+            from .storage import current_version
+
+            variant_dir = get_variant_dir(ticker, lookback, use_indicators, interval)
+            if current_version(variant_dir)[1] is None:
+                errors[ticker] = "No trained model for these parameters"
+                continue
+            lstm, scaler_x, _ = load_published_model(variant_dir)
+            models.append(lstm)
+            scalers.append(scaler_x)
+        ready.append(ticker)
+
+    results = {}
+    if ready:
+        closes = [series[t].to_numpy(dtype=np.float64) for t in ready]
+        if model == "lstm":
+            paths = lstm_forecast(closes, models, scalers, horizon, lookback, use_indicators)
+        else:
+            with span("forecast.rollout"):
+                paths = trend_forecast(closes, horizon)
+        date_format = "%Y-%m-%d" if interval in ("1d", "1wk") else "%Y-%m-%d %H:%M"
+        for ticker, path in zip(ready, paths):
+            last = series[ticker].index[-1]
+            results[ticker] = {
+                "last_date": last.strftime(date_format),
+                "last_close": round(float(series[ticker].iloc[-1]), 2),
+                "forecast": [{"date": date.strftime(date_format), "predicted": round(float(price), 2)}
+                             for date, price in zip(future_dates(last, interval, horizon), path)]
+            }
+
+    return {
+        "params": {"horizon": horizon, "model": model, "lookback": lookback, "interval": interval},
+        "results": results,
+        "errors": errors
+    }
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+def slice_range(bars, start=None, end=None):
+    """Rows of a time-sorted frame with start <= t < end, located by binary search on the index"""
+    index = bars.index
+    lo, hi = 0, len(index)
+    if start is not None:
+        lo = index.searchsorted(_as_index_time(start, index), side="left")
+    if end is not None:
+        hi = index.searchsorted(_as_index_time(end, index), side="left")
+    return bars.iloc[lo:max(lo, hi)]
+
+def _as_index_time(value, index):
+    ts = pd.Timestamp(value)
+    if index.tz is not None and ts.tzinfo is None:
+        ts = ts.tz_localize(index.tz)
+    elif index.tz is None and ts.tzinfo is not None:
+        ts = ts.tz_localize(None)
+    return ts
+
+def _bucket_edges(n, buckets):
+    """Boundaries splitting points 1..n-2 into ``buckets`` near-equal buckets (first/last kept apart)"""
+    return np.linspace(1, n - 1, buckets + 1).astype(np.int64)
+
+def lttb(x, y, max_points):
+    """Indices kept by Largest-Triangle-Three-Buckets downsampling.
+
+    Always keeps the first and last point; from each bucket in between it
+    keeps the point forming the largest triangle with the previously kept
+    point and the mean of the next bucket, which preserves the visual shape
+    of the series.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+    edges = _bucket_edges(n, max_points - 2)
+    # Mean of every bucket, plus the last point as the "next bucket" of the final one
+    sums_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1)
+    sums_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1)
+    sizes = np.diff(edges)
+    next_x = np.r_[sums_x[1:] / sizes[1:], x[-1]]
+    next_y = np.r_[sums_y[1:] / sizes[1:], y[-1]]
+
+    keep = np.empty(max_points, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(max_points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Twice the triangle area for every candidate in the bucket at once
+        area = np.abs((x[a] - next_x[i]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y[i] - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+def minmax(y, max_points):
+    """Indices of the min and max of each bucket (plus first/last), keeping every spike visible"""
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if max_points >= n or max_points < 4:
+        return np.arange(n)
+    edges = _bucket_edges(n, (max_points - 2) // 2)
+    keep = [0]
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        keep.extend(sorted({lo + int(np.argmin(y[lo:hi])), lo + int(np.argmax(y[lo:hi]))}))
+    keep.append(n - 1)
+    return np.asarray(keep, dtype=np.int64)
+
+DOWNSAMPLERS = ("lttb", "minmax")
+
+def downsample(bars, max_points, method="lttb"):
+    """Downsample a bar frame to at most ``max_points`` rows by Close"""
+    if method not in DOWNSAMPLERS:
+        raise ValueError(f"Unknown downsampling method: {method}")
+    if not max_points or len(bars) <= max_points:
+        return bars
+    closes = bars["Close"].to_numpy(dtype=np.float64)
+    if method == "lttb":
+        keep = lttb(bars.index.asi8, closes, max_points)
+    else:
+        keep = minmax(closes, max_points)
+    return bars.iloc[keep]
@@ -1,4 +1,5 @@
 import ta
+import numpy as np
 import pandas as pd
 
 def add_technical_indicators(df):
@@ -20,3 +21,131 @@ def add_technical_indicators(df):
     df['MACD_signal'] = ta.trend.macd_signal(df['Close'])
     
     return df
+
+INDICATOR_COLUMNS = ['SMA_20', 'SMA_50', 'EMA_20', 'RSI', 'MACD', 'MACD_signal']
+
+def _rolling_mean(x, window):
+    """Rolling mean over axis 0; NaN unless the full window is observed (ta/pandas min_periods=window)"""
+    valid = ~np.isnan(x)
+    csum = np.cumsum(np.where(valid, x, 0.0), axis=0)
+    ccount = np.cumsum(valid, axis=0)
+    total = csum.copy()
+    count = ccount.copy()
+    total[window:] -= csum[:-window]
+    count[window:] -= ccount[:-window]
+    out = np.full_like(x, np.nan)
+    full = count == window
+    out[full] = total[full] / window
+    out[:window - 1] = np.nan
+    return out
+
+def _ewm_step(x, weighted, old_wt, nobs, alpha, min_periods):
+    """One time step of pandas ewm(adjust=False, ignore_na=False), vectorized over series"""
+    obs = ~np.isnan(x)
+    nobs += obs
+    has = ~np.isnan(weighted)
+    old_wt = np.where(has, old_wt * (1 - alpha), old_wt)
+    update = has & obs
+    weighted = np.where(update, (old_wt * weighted + alpha * x) / (old_wt + alpha), weighted)
+    old_wt = np.where(update, 1.0, old_wt)
+    weighted = np.where(~has & obs, x, weighted)
+    return weighted, old_wt, np.where(nobs >= min_periods, weighted, np.nan)
+
+def _fill_within_listing(values, start):
+    """ffill().bfill() along time, limited to each series' own span (from its first close on)"""
+    t = np.arange(values.shape[0])[:, None]
+    valid = ~np.isnan(values)
+    last = np.maximum.accumulate(np.where(valid, t, 0), axis=0)
+    filled = np.take_along_axis(values, last, axis=0)
+    nxt = np.minimum.accumulate(np.where(valid, t, values.shape[0] - 1)[::-1], axis=0)[::-1]
+    filled = np.where(np.isnan(filled), np.take_along_axis(values, nxt, axis=0), filled)
+    filled[t < start] = np.nan
+    return filled
+
+class IndicatorState:
+    """EMA_20, RSI(14), MACD and MACD signal recursion state for a batch of series.
+
+    ``step`` advances every series by one bar with the same update
+    compute_indicators uses, so appending bars one at a time (e.g. while
+    forecasting) gives the values ta would produce on the extended series.
+    The last 50 closes are kept in a ring buffer for the SMAs.
+    """
+
+    # EMA states stacked as rows: EMA_20, EMA_12, EMA_26, RSI gains, RSI losses
+    ALPHAS = np.array([2 / 21, 2 / 13, 2 / 27, 1 / 14, 1 / 14])[:, None]
+    MIN_PERIODS = np.array([20, 12, 26, 14, 14])[:, None]
+
+    def __init__(self, n_series):
+        self.weighted = np.full((5, n_series), np.nan)
+        self.old_wt = np.ones((5, n_series))
+        self.nobs = np.zeros((5, n_series), dtype=np.int64)
+        self.sig_weighted = np.full(n_series, np.nan)
+        self.sig_old_wt = np.ones(n_series)
+        self.sig_nobs = np.zeros(n_series, dtype=np.int64)
+        self.prev = np.full(n_series, np.nan)
+        self.recent = np.full((50, n_series), np.nan)
+        self.steps = 0
+        self._x = np.empty((5, n_series))
+
+    def step(self, price, started=True):
+        """Advance one bar; returns EMA_20, RSI, MACD and MACD signal for it"""
+        x = self._x
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # ta turns a missing diff into a 0.0 observation, but only once the ticker is listed
+            diff = price - self.prev
+            x[0] = x[1] = x[2] = price
+            x[3] = np.where(started, np.where(diff > 0, diff, 0.0), np.nan)
+            x[4] = np.where(started, np.where(diff < 0, -diff, 0.0), np.nan)
+            self.weighted, self.old_wt, out = _ewm_step(x, self.weighted, self.old_wt, self.nobs,
+                                                        self.ALPHAS, self.MIN_PERIODS)
+            macd = out[1] - out[2]
+            rsi = np.where(out[4] == 0, 100, 100 - 100 / (1 + out[3] / out[4]))
+            self.sig_weighted, self.sig_old_wt, macd_signal = _ewm_step(
+                macd, self.sig_weighted, self.sig_old_wt, self.sig_nobs, 2 / 10, 9)
+        self.prev = price
+        self.recent[self.steps % 50] = price
+        self.steps += 1
+        return out[0], rsi, macd, macd_signal
+
+    def features(self, price, started=True):
+        """Step and return the (series x 7) row ordered as ['Close'] + INDICATOR_COLUMNS"""
+        ema_20, rsi, macd, macd_signal = self.step(price, started)
+        ring = (self.steps - 1 - np.arange(50)) % 50  # newest first
+        last = self.recent[ring]
+        # NaN unless the full window is observed, like the rolling means
+        sma_20 = last[:20].mean(axis=0)
+        sma_50 = last.mean(axis=0)
+        return np.stack([price, sma_20, sma_50, ema_20, rsi, macd, macd_signal], axis=-1)
+
+def compute_indicators(close, fill=False, dtype=np.float32, return_state=False):
+    """Fused SMA_20/50, EMA_20, RSI(14), MACD and MACD signal for a (ticker x time) close matrix.
+
+    Reproduces add_technical_indicators applied to each ticker's own series,
+    including the ta warmup NaNs; leading NaNs mark a ticker that is not yet
+    listed. With ``fill=True`` each feature is ffill().bfill()'d within the
+    ticker's span, as preprocess does. Returns a (ticker x time x 7) array
+    ordered as ['Close'] + INDICATOR_COLUMNS, plus the IndicatorState after
+    the last bar with ``return_state=True``.
+    """
+    close = np.atleast_2d(np.asarray(close, dtype=np.float64)).T  # time-major for the recursion
+    n_time, n_series = close.shape
+    listed = ~np.isnan(close)
+    start = np.where(listed.any(axis=0), listed.argmax(axis=0), n_time)
+
+    sma_20 = _rolling_mean(close, 20)
+    sma_50 = _rolling_mean(close, 50)
+
+    state = IndicatorState(n_series)
+    ema_20 = np.empty_like(close)
+    rsi = np.empty_like(close)
+    macd = np.empty_like(close)
+    macd_signal = np.empty_like(close)
+    for t in range(n_time):
+        ema_20[t], rsi[t], macd[t], macd_signal[t] = state.step(close[t], t >= start)
+
+    features = np.stack([close, sma_20, sma_50, ema_20, rsi, macd, macd_signal], axis=-1)
+    if fill:
+        features = _fill_within_listing(features.reshape(n_time, -1),
+                                        np.repeat(start, 7)).reshape(features.shape)
+    features = features.transpose(1, 0, 2).astype(dtype, copy=False)
+    return (features, state) if return_state else features
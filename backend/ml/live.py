@@ -0,0 +1,124 @@
+import os
+import time
+import queue
+import threading
+from .bars import get_bar_store
+
+class HubFull(Exception):
+    """A new ticker would exceed the hub's poller limit"""
+
+class LivePriceHub:
+    """Fans out live price updates to subscribers with one upstream poller per ticker.
+
+    Each poller refreshes the latest bars every ``poll_seconds`` while the
+    ticker has subscribers, and re-runs ``predict`` only when a new bar
+    appears, so upstream traffic scales with distinct tickers rather than
+    connected clients. At most ``max_tickers`` tickers are polled at once.
+    """
+
+    def __init__(self, fetch=None, predict=None, poll_seconds=15, period="1mo", interval="1d", max_tickers=200):
+        self._fetch = fetch or (lambda ticker: get_bar_store().get_bars(ticker, interval, period=period))
+        self._predict = predict
+        self.poll_seconds = poll_seconds
+        self.max_tickers = max_tickers
+        self.date_format = "%Y-%m-%d" if interval in ("1d", "1wk") else "%Y-%m-%d %H:%M"
+        self._lock = threading.Lock()
+        self._subscribers = {}
+        self._pollers = {}
+        self._last = {}
+
+    def is_live(self, ticker):
+        with self._lock:
+            return ticker.upper() in self._pollers
+
+    def subscribe(self, ticker):
+        """Register a subscriber queue, starting the ticker's poller if needed; raises HubFull"""
+        ticker = ticker.upper()
+        q = queue.Queue(maxsize=100)
+        with self._lock:
+            if ticker not in self._pollers and len(self._pollers) >= self.max_tickers:
+                raise HubFull(f"Already streaming {len(self._pollers)} tickers")
+            self._subscribers.setdefault(ticker, set()).add(q)
+            if ticker in self._last:
+                q.put_nowait(self._last[ticker])
+            if ticker not in self._pollers:
+                stop = threading.Event()
+                thread = threading.Thread(target=self._poll, args=(ticker, stop),
+                                          name=f"live-{ticker}", daemon=True)
+                self._pollers[ticker] = stop
+                thread.start()
+        return q
+
+    def unsubscribe(self, ticker, q):
+        """Drop a subscriber; the poller stops once the ticker has none left"""
+        ticker = ticker.upper()
+        with self._lock:
+            subscribers = self._subscribers.get(ticker)
+            if subscribers is None or q not in subscribers:
+                return
+            subscribers.discard(q)
+            if not subscribers:
+                del self._subscribers[ticker]
+                self._pollers.pop(ticker).set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "tickers": len(self._pollers),
+                "subscribers": sum(len(s) for s in self._subscribers.values())
+            }
+
+    def _publish(self, ticker, event):
+        with self._lock:
+            self._last[ticker] = event
+            subscribers = list(self._subscribers.get(ticker, ()))
+        for q in subscribers:
+            try:
+                q.put_nowait(event)
+            except queue.Full:
+                # Slow consumer: drop its oldest update rather than block the poller
+                try:
+                    q.get_nowait()
+                    q.put_nowait(event)
+                except (queue.Empty, queue.Full):
+                    pass
+
+    def _poll(self, ticker, stop):
+        last_bar, predicted = None, None
+        while not stop.is_set():
+            try:
+                bars = self._fetch(ticker)
+                closes = [float(price) for price in bars["Close"]]
+                bar = bars.index[-1]
+                if bar != last_bar:
+                    # New bar: refresh the latest prediction once for all subscribers
+                    predicted = self._predict(ticker, closes) if self._predict else None
+                prev = self._last.get(ticker)
+                if bar != last_bar or prev is None or prev["price"] != round(closes[-1], 2):
+                    self._publish(ticker, {
+                        "ticker": ticker,
+                        "date": bar.strftime(self.date_format),
+                        "price": round(closes[-1], 2),
+                        "predicted": round(predicted, 2) if predicted is not None else None,
+                        "timestamp": time.time()
+                    })
+                last_bar = bar
+            except Exception as e:
+                print(f"Live poll error for {ticker}: {str(e)}")
+            stop.wait(self.poll_seconds)
+
+_hub = None
+_hub_lock = threading.Lock()
+
+def get_hub(predict=None):
+    """Process-wide hub configured from the environment"""
+    global _hub
+    with _hub_lock:
+        if _hub is None:
+            _hub = LivePriceHub(
+                predict=predict,
+                poll_seconds=float(os.getenv("LIVE_POLL_SECONDS", 15)),
+                interval=os.getenv("LIVE_INTERVAL", "1d"),
+                max_tickers=int(os.getenv("LIVE_MAX_TICKERS", 200))
+            )
+        return _hub
@@ -1,39 +1,94 @@
 import os
 import numpy as np
 import pandas as pd
-import yfinance as yf
 from sklearn.preprocessing import MinMaxScaler
 from sklearn.metrics import mean_squared_error, mean_absolute_error
+import tensorflow as tf
 from tensorflow.keras.models import Sequential, load_model
 from tensorflow.keras.layers import LSTM, Dense, Dropout
 from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint
-import joblib
+import glob
+import shutil
+import threading
+from collections import OrderedDict
 from datetime import datetime
-import pytz
 from .indicators import add_technical_indicators
-from .storage import save_model_metadata, load_model_metadata, save_scalers, load_scalers
+from .storage import (save_model_metadata, load_model_metadata, save_scalers, load_scalers, variant_key,
+                      record_variant_access, prune_variants, is_stale, migrate_legacy_model,
+                      variant_lock, new_staging_dir, publish_version, current_version)
+from .tracing import span
+from .admission import get_admission
+from .bars import get_bar_store
+from .forecast import lstm_forecast, future_dates
 
-def get_model_dir(ticker):
+def get_model_dir(ticker, create=False):
     model_dir = os.getenv("MODEL_DIR", "./models")
     path = os.path.join(model_dir, ticker)
-    os.makedirs(path, exist_ok=True)
+    if create:
+        os.makedirs(path, exist_ok=True)
     return path
 
+def get_variant_dir(ticker, lookback, use_indicators, interval, create=False):
+    """Directory holding one (lookback, indicators, interval) model of a ticker.
+
+    Lookups only resolve the path; ``create`` (used when about to train)
+    makes the directory and migrates a legacy single-model layout first.
+    """
+    model_dir = get_model_dir(ticker, create)
+    if create:
+        migrate_legacy_model(model_dir)
+    path = os.path.join(model_dir, variant_key(lookback, use_indicators, interval))
+    if create:
+        os.makedirs(path, exist_ok=True)
+    return path
+
+# In-process copies of published models, keyed by variant dir
+_model_cache = OrderedDict()
+_model_cache_lock = threading.Lock()
+
+def cache_published_model(model_dir, version, model, scaler_x, scaler_y):
+    with _model_cache_lock:
+        _model_cache[model_dir] = (version, model, scaler_x, scaler_y)
+        _model_cache.move_to_end(model_dir)
+        while len(_model_cache) > int(os.getenv("MODEL_CACHE_SIZE", 32)):
+            _model_cache.popitem(last=False)
+
+def load_published_model(model_dir):
+    """Model and scalers of the variant's current version.
+
+    The loaded copy is reused until another worker publishes a new version,
+    which is then hot-swapped in on the next call.
+    """
+    version, version_dir = current_version(model_dir)
+    if version_dir is None:
+        raise FileNotFoundError(f"No published model in {model_dir}")
+    with _model_cache_lock:
+        cached = _model_cache.get(model_dir)
+        if cached and cached[0] == version:
+            _model_cache.move_to_end(model_dir)
+            return cached[1:]
+    model = load_model(os.path.join(version_dir, "model.keras"))
+    scaler_x, scaler_y = load_scalers(version_dir)
+    cache_published_model(model_dir, version, model, scaler_x, scaler_y)
+    return model, scaler_x, scaler_y
+
 def fetch_data(ticker, start=None, end=None, interval="1d"):
     if not start:
         start = (datetime.now() - pd.DateOffset(years=5)).strftime("%Y-%m-%d")
-    if not end:
+    if not end and interval in ("1d", "1wk"):
         end = (datetime.now() - pd.DateOffset(days=1)).strftime("%Y-%m-%d")  # Yesterday to ensure data exists
     
     print(f"Fetching data for {ticker} from {start} to {end}")
-    df = yf.download(ticker, start=start, end=end, interval=interval, auto_adjust=True, progress=False)
+    # Intraday and daily views share one stored series per ticker, resampled locally
+    df = get_bar_store().get_bars(ticker, interval, start=start, end=end)
     
     if df.empty:
         raise ValueError(f"No data found for ticker {ticker} in the specified date range")
     
     return df
 
-def preprocess(df, lookback, use_indicators):
+def feature_frame(df, use_indicators):
+    """Model input columns (Close first), cleaned of gaps"""
     df = df.copy()
     
     # Add technical indicators if requested
@@ -46,29 +101,57 @@ def preprocess(df, lookback, use_indicators):
         feature_cols.extend(['SMA_20', 'SMA_50', 'EMA_20', 'RSI', 'MACD', 'MACD_signal'])
     
     # Select and clean data
-    df = df[feature_cols].ffill().bfill().dropna()
+    return df[feature_cols].ffill().bfill().dropna()
+
+def close_from_scaled(values, scaler_x):
+    """Prices from model outputs, which live in the scaled Close column of scaler_x"""
+    return np.asarray(values, dtype=np.float64) * scaler_x.data_range_[0] + scaler_x.data_min_[0]
+
+def prepare_series(df, lookback, use_indicators):
+    """Scaled float32 feature series (Close first) without materializing windows"""
+    df = feature_frame(df, use_indicators)
     
-    # Scale features
+    # Scale the data
     scaler_x = MinMaxScaler()
-    scaler_y = MinMaxScaler()
+    scaled_data = scaler_x.fit_transform(df).astype(np.float32)
     
-    # Prepare sequences
-    X = []
-    y = []
+    # Fit y scaler on the window targets (Close price is first column)
+    scaler_y = MinMaxScaler()
+    scaler_y.fit(scaled_data[lookback:, :1])
     
-    # Scale the data
-    scaled_data = scaler_x.fit_transform(df)
+    # Date of each window's target
+    return scaled_data, scaler_x, scaler_y, df.index[lookback:]
+
+def preprocess(df, lookback, use_indicators):
+    scaled_data, scaler_x, scaler_y, dates = prepare_series(df, lookback, use_indicators)
     
-    for i in range(lookback, len(scaled_data)):
-        X.append(scaled_data[i-lookback:i])
-        y.append(scaled_data[i, 0])  # Close price is first column
+    # Prepare sequences
+    X = np.lib.stride_tricks.sliding_window_view(scaled_data, lookback, axis=0)[:-1].transpose(0, 2, 1).copy()
+    y = scaled_data[lookback:, :1].copy()
     
-    X, y = np.array(X), np.array(y).reshape(-1, 1)
+    return X, y, scaler_x, scaler_y, dates
+
+def make_window_dataset(scaled_data, lookback, first, last, batch_size=32, shuffle=False, cache=None):
+    """tf.data pipeline of (window, next close) pairs for windows [first, last).
+
+    Windows are sliced from the scaled series on the fly, so memory does not
+    grow with lookback. ``cache`` may be "" (in memory) or a file path.
+    """
+    series = tf.constant(scaled_data, dtype=tf.float32)
     
-    # Fit y scaler
-    scaler_y.fit(y)
+    def window(i):
+        return series[i:i + lookback], series[i + lookback, :1]
     
-    return X, y, scaler_x, scaler_y, df.index[-len(X):]
+    ds = tf.data.Dataset.range(first, last)
+    if shuffle and cache is None:
+        # Shuffle indices rather than windows to keep the buffer small
+        ds = ds.shuffle(last - first, reshuffle_each_iteration=True)
+    ds = ds.map(window, num_parallel_calls=tf.data.AUTOTUNE)
+    if cache is not None:
+        ds = ds.cache(cache)
+        if shuffle:
+            ds = ds.shuffle(int(os.getenv("TRAIN_SHUFFLE_BUFFER", 1024)), reshuffle_each_iteration=True)
+    return ds.batch(batch_size).prefetch(tf.data.AUTOTUNE)
 
 def build_lstm(input_shape):
     model = Sequential([
@@ -81,11 +164,30 @@ def build_lstm(input_shape):
     model.compile(loss="mse", optimizer="adam")
     return model
 
-def train_model(X, y, model_path):
-    model = build_lstm(X.shape[1:])
+def train_model(scaled_data, lookback, n_train, model_path, validation_split=0.2):
+    """Train on windows [0, n_train), holding out the last ``validation_split`` chronologically"""
+    mode = os.getenv("TRAIN_CACHE")  # unset: no cache, "memory": in memory, else on disk
+    if not mode:
+        cache = None
+    elif mode == "memory":
+        cache = ""
+    else:
+        # tf.data reuses an existing cache file as is, so each training run gets its own,
+        # next to the model in this version's staging dir
+        cache = os.path.join(os.path.dirname(os.path.abspath(model_path)), "train.cache")
+    split_at = int(n_train * (1 - validation_split))
+    train_ds = make_window_dataset(scaled_data, lookback, 0, split_at, shuffle=True, cache=cache)
+    val_ds = make_window_dataset(scaled_data, lookback, split_at, n_train, cache=cache and f"{cache}.val")
+    
+    model = build_lstm((lookback, scaled_data.shape[1]))
     es = EarlyStopping(monitor="val_loss", patience=10, restore_best_weights=True)
     mc = ModelCheckpoint(model_path, save_best_only=True)
-    model.fit(X, y, epochs=50, batch_size=32, validation_split=0.2, callbacks=[es, mc], verbose=0)
+    try:
+        model.fit(train_ds, epochs=50, validation_data=val_ds, callbacks=[es, mc], verbose=0)
+    finally:
+        if cache:
+            for path in glob.glob(f"{cache}*"):
+                os.remove(path)
     return model
 
 def predict_stock(req):
@@ -95,72 +197,97 @@ def predict_stock(req):
     interval = req.interval
     start = req.start
     end = req.end
+    horizon = int(getattr(req, "horizon", 1) or 1)
     
-    model_dir = get_model_dir(ticker)
-    model_path = os.path.join(model_dir, "model.keras")
+    # Each (lookback, indicators, interval) combination has its own model
+    ticker_dir = get_model_dir(ticker, create=True)
+    model_dir = get_variant_dir(ticker, lookback, use_indicators, interval, create=True)
+    max_age_days = float(os.getenv("MODEL_MAX_AGE_DAYS", 30))
     
-    # Check if model exists and load metadata
-    model_exists = os.path.exists(model_path)
-    meta = load_model_metadata(model_dir) if model_exists else None
+    def needs_training():
+        # Retrain only when this variant is missing or stale
+        version, version_dir = current_version(model_dir)
+        return version_dir is None or is_stale(load_model_metadata(version_dir), max_age_days)
     
-    # Check if we need to retrain
-    need_retrain = not model_exists or (meta and (
-        meta.get('lookback') != lookback or 
-        meta.get('use_indicators') != use_indicators or
-        meta.get('interval') != interval
-    ))
+    trained = False
+    if needs_training():
+        # One trainer per variant across workers; the rest wait and reuse its result
+        with variant_lock(model_dir):
+            if needs_training():
+                # Fetch data and train new model
+                with span("fetch_data"):
+                    df = fetch_data(ticker, start, end, interval)
+                with span("preprocess"):
+                    scaled_data, scaler_x, scaler_y, dates = prepare_series(df, lookback, use_indicators)
+                
+                # Train/test split
+                test_size = float(os.getenv("TEST_SIZE", 0.2))
+                n_windows = len(dates)
+                split_idx = int(n_windows * (1 - test_size))
+                
+                # Train into a staging directory, then publish it in one rename
+                version, staging_dir = new_staging_dir(model_dir)
+                try:
+                    # Training runs in its own small pool so it cannot starve inference
+                    with span("train_model"), get_admission().admit("training"):
+                        model = train_model(scaled_data, lookback, split_idx,
+                                            os.path.join(staging_dir, "model.keras"))
+                    
+                    # Save scalers and metadata
+                    save_scalers(staging_dir, scaler_x, scaler_y)
+                    # Dates of the windows the model was fit on; the test split stays out of sample
+                    save_model_metadata(staging_dir, ticker, lookback, use_indicators, interval, {
+                        'start': str(dates[0].date()),
+                        'end': str(dates[split_idx - 1].date())
+                    }, version=version)
+                    publish_version(model_dir, staging_dir)
+                except Exception:
+                    shutil.rmtree(staging_dir, ignore_errors=True)
+                    raise
+                cache_published_model(model_dir, version, model, scaler_x, scaler_y)
+                
+                # Keep only the most recently used variants on disk
+                record_variant_access(ticker_dir, os.path.basename(model_dir))
+                prune_variants(ticker_dir, int(os.getenv("MAX_MODEL_VARIANTS", 4)), keep=os.path.basename(model_dir))
+                
+                trained = True
     
-    if need_retrain:
-        # Fetch data and train new model
-        df = fetch_data(ticker, start, end, interval)
-        X, y, scaler_x, scaler_y, dates = preprocess(df, lookback, use_indicators)
-        
-        # Train/test split
-        test_size = float(os.getenv("TEST_SIZE", 0.2))
-        split_idx = int(len(X) * (1 - test_size))
-        
-        X_train, X_test = X[:split_idx], X[split_idx:]
-        y_train, y_test = y[:split_idx], y[split_idx:]
-        
-        # Train model
-        model = train_model(X_train, y_train, model_path)
-        
-        # Save scalers and metadata
-        save_scalers(model_dir, scaler_x, scaler_y)
-        save_model_metadata(model_dir, ticker, lookback, use_indicators, interval, {
-            'start': str(dates[0].date()),
-            'end': str(dates[-1].date())
-        })
-        
-        trained = True
-    else:
-        # Load existing model
-        model = load_model(model_path)
-        scaler_x, scaler_y = load_scalers(model_dir)
+    if not trained:
+        # Load existing model (reused in-process until a new version is published)
+        with span("load_model"):
+            model, scaler_x, scaler_y = load_published_model(model_dir)
         
         # Get fresh data for prediction
-        df = fetch_data(ticker, start, end, interval)
-        X, y, _, _, dates = preprocess(df, lookback, use_indicators)
+        with span("fetch_data"):
+            df = fetch_data(ticker, start, end, interval)
+        with span("preprocess"):
+            # Scale with the model's own scaler so its outputs map back to prices
+            features = feature_frame(df, use_indicators)
+            scaled_data = scaler_x.transform(features).astype(np.float32)
+            dates = features.index[lookback:]
         
         # Use test split for evaluation
         test_size = float(os.getenv("TEST_SIZE", 0.2))
-        split_idx = int(len(X) * (1 - test_size))
-        X_test, y_test = X[split_idx:], y[split_idx:]
-        dates = dates[split_idx:]
+        n_windows = len(dates)
+        split_idx = int(n_windows * (1 - test_size))
         
-        trained = False
+        record_variant_access(ticker_dir, os.path.basename(model_dir))
     
-    # Make predictions
-    preds = model.predict(X_test)
-    preds_inv = scaler_y.inverse_transform(preds)
-    y_test_inv = scaler_y.inverse_transform(y_test)
+    # Make predictions on the test windows
+    test_ds = make_window_dataset(scaled_data, lookback, split_idx, n_windows, batch_size=256)
+    y_test = scaled_data[lookback + split_idx:, :1]
+    dates = dates[split_idx:]
+    with span("model.predict"):
+        preds = model.predict(test_ds, verbose=0)
+    preds_inv = close_from_scaled(preds[:, 0], scaler_x)
+    y_test_inv = close_from_scaled(y_test[:, 0], scaler_x)
     
     # Create history
     history = [
         {
             "date": str(dates[i].date()), 
-            "real": float(y_test_inv[i][0]), 
-            "predicted": float(preds_inv[i][0])
+            "real": float(y_test_inv[i]), 
+            "predicted": float(preds_inv[i])
         }
         for i in range(len(preds))
     ]
@@ -168,7 +295,7 @@ def predict_stock(req):
     # Latest prediction
     latest = {
         "date": str(dates[-1].date()), 
-        "predicted": float(preds_inv[-1][0])
+        "predicted": float(preds_inv[-1])
     }
     
     # Calculate metrics
@@ -176,30 +303,42 @@ def predict_stock(req):
     mae = float(mean_absolute_error(y_test_inv, preds_inv))
     mape = float(np.mean(np.abs((y_test_inv - preds_inv) / y_test_inv))) * 100
     
-    return {
+    result = {
         "ticker": ticker,
         "params": {
             "lookback": lookback, 
             "useIndicators": use_indicators, 
-            "interval": interval
+            "interval": interval,
+            "horizon": horizon
         },
         "metrics": {"rmse": rmse, "mae": mae, "mape": mape},
         "history": history,
         "latest": latest,
         "trained": trained
     }
+    
+    # Multi-step outlook: roll the model forward from the last observed bar
+    if horizon > 1:
+        date_format = "%Y-%m-%d" if interval in ("1d", "1wk") else "%Y-%m-%d %H:%M"
+        path = lstm_forecast([df['Close'].to_numpy()], [model], [scaler_x], horizon, lookback, use_indicators)[0]
+        result["forecast"] = [
+            {"date": date.strftime(date_format), "predicted": float(price)}
+            for date, price in zip(future_dates(df.index[-1], interval, horizon), path)
+        ]
+    
+    return result
 
 def get_latest_prediction(ticker):
     ticker = ticker.upper()
-    model_dir = get_model_dir(ticker)
-    model_path = os.path.join(model_dir, "model.keras")
+    lookback = int(os.getenv("DEFAULT_LOOKBACK", 60))
+    model_dir = get_variant_dir(ticker, lookback, True, "1d")
     
     # Check if model exists
-    if not os.path.exists(model_path):
+    if current_version(model_dir)[1] is None:
         # Quick train if not exists
         req = type("Req", (), {
             "ticker": ticker, 
-            "lookback": int(os.getenv("DEFAULT_LOOKBACK", 60)), 
+            "lookback": lookback, 
             "useIndicators": True, 
             "interval": "1d", 
             "start": None, 
@@ -209,14 +348,14 @@ def get_latest_prediction(ticker):
         return result["latest"]
     
     # Load existing model and scalers
-    model = load_model(model_path)
-    scaler_x, scaler_y = load_scalers(model_dir)
+    with span("load_model"):
+        model, scaler_x, scaler_y = load_published_model(model_dir)
     
     if scaler_x is None or scaler_y is None:
         # Retrain if scalers missing
         req = type("Req", (), {
             "ticker": ticker, 
-            "lookback": int(os.getenv("DEFAULT_LOOKBACK", 60)), 
+            "lookback": lookback, 
             "useIndicators": True, 
             "interval": "1d", 
             "start": None, 
@@ -226,20 +365,83 @@ def get_latest_prediction(ticker):
         return result["latest"]
     
     # Get fresh data
-    df = fetch_data(ticker)
-    lookback = int(os.getenv("DEFAULT_LOOKBACK", 60))
-    X, _, _, _, dates = preprocess(df, lookback, True)
+    with span("fetch_data"):
+        df = fetch_data(ticker)
+    record_variant_access(get_model_dir(ticker), os.path.basename(model_dir))
+    with span("preprocess"):
+        features = feature_frame(df, True)
+        scaled_data = scaler_x.transform(features).astype(np.float32)
     
     # Predict
-    preds = model.predict(X[-1:])  # Only predict last sequence
-    preds_inv = scaler_y.inverse_transform(preds)
+    with span("model.predict"):
+        preds = model.predict(scaled_data[-lookback - 1:-1][None])  # Only predict last sequence
     
     return {
         "ticker": ticker, 
-        "date": str(dates[-1].date()), 
-        "predicted": float(preds_inv[0][0])
+        "date": str(features.index[-1].date()), 
+        "predicted": float(close_from_scaled(preds[0, 0], scaler_x))
     }
 
+def fine_tune_stock(ticker, lookback, use_indicators=True, interval="1d"):
+    """Warm-start a variant's published model on its latest bars and return the next-close prediction.
+
+    Training continues from the current weights for FINE_TUNE_EPOCHS epochs
+    over the last FINE_TUNE_WINDOWS windows, with the scalers kept as they
+    are. A missing or stale (MODEL_MAX_AGE_DAYS) variant is trained from
+    scratch instead.
+    """
+    ticker = ticker.upper()
+    model_dir = get_variant_dir(ticker, lookback, use_indicators, interval, create=True)
+    version_dir = current_version(model_dir)[1]
+    if version_dir is None or is_stale(load_model_metadata(version_dir), float(os.getenv("MODEL_MAX_AGE_DAYS", 30))):
+        predict_stock(type("Req", (), {
+            "ticker": ticker,
+            "lookback": lookback,
+            "useIndicators": use_indicators,
+            "interval": interval,
+            "start": None,
+            "end": None
+        }))
+    else:
+        with variant_lock(model_dir):
+            meta = load_model_metadata(current_version(model_dir)[1])
+            model, scaler_x, scaler_y = load_published_model(model_dir)
+            with span("fetch_data"):
+                df = fetch_data(ticker, interval=interval)
+            features = feature_frame(df, use_indicators)
+            scaled_data = scaler_x.transform(features).astype(np.float32)
+            n_windows = len(scaled_data) - lookback
+            first = max(n_windows - int(os.getenv("FINE_TUNE_WINDOWS", 250)), 0)
+            
+            # Train a copy; the published model keeps serving from the cache meanwhile
+            tuned = tf.keras.models.clone_model(model)
+            tuned.set_weights(model.get_weights())
+            tuned.compile(loss="mse", optimizer=tf.keras.optimizers.Adam(float(os.getenv("FINE_TUNE_LR", 1e-4))))
+            
+            version, staging_dir = new_staging_dir(model_dir)
+            try:
+                with span("fine_tune"), get_admission().admit("training"):
+                    tuned.fit(make_window_dataset(scaled_data, lookback, first, n_windows, shuffle=True),
+                              epochs=int(os.getenv("FINE_TUNE_EPOCHS", 3)), verbose=0)
+                tuned.save(os.path.join(staging_dir, "model.keras"))
+                save_scalers(staging_dir, scaler_x, scaler_y)
+                # created_at is kept so the variant still gets a full retrain once it ages out
+                save_model_metadata(staging_dir, ticker, lookback, use_indicators, interval, {
+                    'start': meta["train_dates"]["start"],
+                    'end': str(features.index[-1].date())
+                }, version=version, created_at=meta["created_at"])
+                publish_version(model_dir, staging_dir)
+            except Exception:
+                shutil.rmtree(staging_dir, ignore_errors=True)
+                raise
+            cache_published_model(model_dir, version, tuned, scaler_x, scaler_y)
+        record_variant_access(get_model_dir(ticker), os.path.basename(model_dir))
+    
+    model, scaler_x, _ = load_published_model(model_dir)
+    with span("fetch_data"):
+        df = fetch_data(ticker, interval=interval)
+    return float(lstm_forecast([df['Close'].to_numpy()], [model], [scaler_x], 1, lookback, use_indicators)[0][0])
+
 def get_health():
     """Simple health check function"""
     return {"status": "ok", "message": "Backend is running!"}
@@ -0,0 +1,168 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from .bars import get_bar_store
+
+PERIODS_PER_YEAR = {"1d": 252, "1wk": 52, "1h": 252 * 7, "60m": 252 * 7}
+
+def aligned_returns(closes):
+    """(time x ticker) simple returns on the union calendar, NaN where a ticker did not trade.
+
+    Each return runs from the ticker's previous observation, so a holiday on
+    one exchange neither fabricates a zero return nor drops the move that
+    follows it.
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    carried = pd.DataFrame(closes).ffill().to_numpy()
+    returns = np.full_like(closes, np.nan)
+    returns[1:] = closes[1:] / carried[:-1] - 1
+    return returns
+
+def pairwise_moments(returns):
+    """Covariance and correlation over pairwise-complete observations (pandas semantics), as matrix products"""
+    mask = (~np.isnan(returns)).astype(np.float64)
+    x = np.where(mask > 0, returns, 0.0)
+    n = mask.T @ mask
+    sum_x = x.T @ mask           # sum of x_i over rows where j is present
+    sum_xy = x.T @ x
+    sum_xx = (x * x).T @ mask    # sum of x_i^2 over rows where j is present
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = (sum_xy - sum_x * sum_x.T / n) / (n - 1)
+        var_i = (sum_xx - sum_x ** 2 / n) / (n - 1)
+        corr = cov / np.sqrt(var_i * var_i.T)
+    cov[n < 2] = np.nan
+    corr[n < 2] = np.nan
+    np.fill_diagonal(corr, np.where(np.isnan(np.diag(cov)), np.nan, 1.0))
+    return cov, np.clip(corr, -1, 1), n
+
+class RiskModel:
+    """Annualized covariance of a basket; weight queries are a few small matrix-vector products"""
+
+    def __init__(self, tickers, returns, periods_per_year=252):
+        self.tickers = list(tickers)
+        self.position = {ticker: i for i, ticker in enumerate(self.tickers)}
+        cov, corr, n = pairwise_moments(returns)
+        self.cov = cov * periods_per_year
+        self.corr = corr
+        self.observations = int(np.max(n)) if n.size else 0
+        self.volatility = np.sqrt(np.diag(self.cov))
+        # Tickers with too little overlap are left out of portfolio math
+        self.usable = np.isfinite(self.volatility)
+        self._cov0 = np.where(np.isfinite(self.cov), self.cov, 0.0)
+        self._correlation = None
+
+    def weight_vector(self, weights=None):
+        """Normalized weights over usable tickers; equal weights when none are given"""
+        w = np.zeros(len(self.tickers))
+        if weights:
+            for ticker, weight in weights.items():
+                if ticker.upper() in self.position:
+                    w[self.position[ticker.upper()]] = float(weight)
+        else:
+            w[:] = 1.0
+        w[~self.usable] = 0.0
+        total = w.sum()
+        if total == 0:
+            raise ValueError("Weights must be positive for at least one ticker with data")
+        return w / total
+
+    def portfolio(self, weights=None):
+        w = self.weight_vector(weights)
+        marginal = self._cov0 @ w
+        variance = max(float(w @ marginal), 0.0)
+        volatility = np.sqrt(variance)
+        weighted_vol = float(w @ np.where(self.usable, self.volatility, 0.0))
+        ratio = weighted_vol / volatility if volatility > 0 else 1.0
+        contributions = w * marginal / variance if variance > 0 else w
+        return {
+            "variance": variance,
+            "volatility": volatility,
+            "diversification_ratio": ratio,
+            # 0 when everything moves together, approaching 100 as risk cancels out
+            "diversification_score": round(max(0.0, 1 - 1 / ratio) * 100, 1),
+            "effective_holdings": float(1 / np.sum(w ** 2)),
+            "weights": {t: float(w[i]) for i, t in enumerate(self.tickers) if w[i]},
+            "risk_contributions": {t: float(contributions[i]) for i, t in enumerate(self.tickers) if w[i]}
+        }
+
+    def correlation_matrix(self):
+        """Rounded correlation rows for JSON, built once per covariance snapshot"""
+        if self._correlation is None:
+            rounded = np.round(self.corr, 3)
+            self._correlation = [[float(c) if np.isfinite(c) else None for c in row] for row in rounded]
+        return self._correlation
+
+    def average_correlation(self):
+        off_diagonal = self.corr[~np.eye(len(self.tickers), dtype=bool)]
+        return float(np.nanmean(off_diagonal)) if np.isfinite(off_diagonal).any() else None
+
+def download_closes(tickers, period="1y", interval="1d", workers=16):
+    """Per-ticker closes from the bar store, fetched concurrently so downloads coalesce upstream"""
+    store = get_bar_store()
+
+    def fetch(ticker):
+        try:
+            return ticker, store.get_bars(ticker, interval, period=period)["Close"]
+        except Exception as e:
+            return ticker, e
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(fetch, tickers))
+    series = {t: r for t, r in results if isinstance(r, pd.Series)}
+    errors = {t: str(r) for t, r in results if not isinstance(r, pd.Series)}
+    return series, errors
+
+def build_risk_model(tickers, period="1y", interval="1d", download=download_closes):
+    series, errors = download(tickers, period, interval)
+    if not series:
+        raise ValueError("No price data for any of the requested tickers")
+    # Outer join on the union of trading calendars
+    frame = pd.concat(series, axis=1).sort_index()
+    frame = frame[[t for t in tickers if t in frame.columns]]
+    returns = aligned_returns(frame.to_numpy())
+    model = RiskModel(frame.columns, returns, PERIODS_PER_YEAR.get(interval, 252))
+    model.errors = errors
+    return model
+
+class RiskModelCache:
+    """LRU of risk models per (basket, period, interval), expiring after ``ttl`` seconds"""
+
+    def __init__(self, size=16, ttl=900, build=build_risk_model):
+        self.size = size
+        self.ttl = ttl
+        self._build = build
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, tickers, period="1y", interval="1d"):
+        """(model, cached) for the basket; order of tickers does not matter"""
+        key = (tuple(sorted(set(tickers))), period, interval)
+        with self._lock:
+            entry = self._models.get(key)
+            if entry and time.time() - entry[1] < self.ttl:
+                self._models.move_to_end(key)
+                return entry[0], True
+        model = self._build(list(key[0]), period, interval)
+        with self._lock:
+            self._models[key] = (model, time.time())
+            self._models.move_to_end(key)
+            while len(self._models) > self.size:
+                self._models.popitem(last=False)
+        return model, False
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_risk_cache():
+    """Process-wide risk model cache configured from the environment"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = RiskModelCache(
+                size=int(os.getenv("PORTFOLIO_CACHE_SIZE", 16)),
+                ttl=float(os.getenv("PORTFOLIO_CACHE_SECONDS", 900))
+            )
+        return _cache
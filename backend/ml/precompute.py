@@ -0,0 +1,197 @@
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import pytz
+from .storage import variant_lock
+
+def load_watchlist():
+    """Tickers from PRECOMPUTE_WATCHLIST_FILE (one per line) or PRECOMPUTE_WATCHLIST (comma list)"""
+    path = os.getenv("PRECOMPUTE_WATCHLIST_FILE")
+    if path and os.path.exists(path):
+        with open(path) as f:
+            tickers = [line.strip().upper() for line in f if line.strip() and not line.startswith("#")]
+    else:
+        tickers = [t.strip().upper() for t in os.getenv("PRECOMPUTE_WATCHLIST", "").split(",") if t.strip()]
+    return list(dict.fromkeys(tickers))
+
+def previous_run(now, run_at="16:30", tz="America/New_York"):
+    """Most recent scheduled run time (weekdays at ``run_at`` exchange time) at or before ``now``"""
+    zone = pytz.timezone(tz)
+    local = now.astimezone(zone)
+    hour, minute = (int(part) for part in run_at.split(":"))
+    day = local.date()
+    while True:
+        candidate = zone.localize(datetime(day.year, day.month, day.day, hour, minute))
+        if candidate.weekday() < 5 and candidate <= local:
+            return candidate
+        day -= timedelta(days=1)
+
+def next_run(now, run_at="16:30", tz="America/New_York"):
+    """Next scheduled run time strictly after ``now``"""
+    zone = pytz.timezone(tz)
+    local = now.astimezone(zone)
+    hour, minute = (int(part) for part in run_at.split(":"))
+    day = local.date()
+    while True:
+        candidate = zone.localize(datetime(day.year, day.month, day.day, hour, minute))
+        if candidate.weekday() < 5 and candidate > local:
+            return candidate
+        day += timedelta(days=1)
+
+class PredictionTable:
+    """Precomputed per-ticker predictions persisted as one JSON file shared by all workers"""
+
+    def __init__(self, path):
+        self.path = path
+        self._rows = {}
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def _reload(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime != self._mtime:
+            with open(self.path) as f:
+                self._rows = json.load(f)
+            self._mtime = mtime
+
+    def get(self, ticker, fresh_after=None):
+        """Row for ``ticker``, or None on a miss or if it was generated before ``fresh_after``"""
+        with self._lock:
+            self._reload()
+            row = self._rows.get(ticker.upper())
+        if row is None or (fresh_after is not None and row["generated_at"] < fresh_after):
+            return None
+        return row
+
+    def generated_at(self):
+        """Time of the last completed run"""
+        with self._lock:
+            self._reload()
+            return min((row["generated_at"] for row in self._rows.values()), default=None)
+
+    def replace(self, rows):
+        """Atomically swap in a new set of rows"""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(rows, f)
+        os.replace(tmp_path, self.path)
+        with self._lock:
+            self._rows = rows
+            self._mtime = os.path.getmtime(self.path)
+
+    def __len__(self):
+        with self._lock:
+            self._reload()
+            return len(self._rows)
+
+def fine_tune(ticker):
+    """Fine-tune the ticker's default LSTM variant on the new bars and return its next-close prediction"""
+    from .model_utils import fine_tune_stock
+
+    return round(fine_tune_stock(ticker, int(os.getenv("DEFAULT_LOOKBACK", 60))), 2)
+
+class PrecomputeScheduler:
+    """Recomputes predictions for a watchlist once per trading day, after the market closes.
+
+    ``compute(ticker)`` returns a table row (or None to skip the ticker); it
+    is expected to refresh the ticker's bars itself. Runs take a file lock
+    next to the table, so with several workers only the first one to wake
+    up does the work.
+    """
+
+    def __init__(self, watchlist, compute, table, run_at="16:30", tz="America/New_York",
+                 workers=8, fine_tune=False):
+        self.watchlist = watchlist
+        self._compute = compute
+        self.table = table
+        self.run_at = run_at
+        self.tz = tz
+        self.workers = workers
+        self.fine_tune = fine_tune
+        self._thread = None
+        self._lock = threading.Lock()
+        self.last_run = None
+
+    def fresh_after(self, now=None):
+        """Rows generated before the latest scheduled run are stale"""
+        return previous_run(now or datetime.now(pytz.utc), self.run_at, self.tz).timestamp()
+
+    def lookup(self, ticker):
+        return self.table.get(ticker, self.fresh_after())
+
+    def _row(self, ticker):
+        try:
+            row = self._compute(ticker)
+            if row is not None and self.fine_tune:
+                row["lstm_predicted"] = fine_tune(ticker)
+            return row
+        except Exception as e:
+            print(f"Precompute skipped {ticker}: {str(e)}")
+            return None
+
+    def run_once(self):
+        """Recompute the whole watchlist unless another worker already did since the last close"""
+        lock_dir = os.path.dirname(os.path.abspath(self.table.path))
+        os.makedirs(lock_dir, exist_ok=True)
+        with variant_lock(lock_dir):
+            generated = self.table.generated_at()
+            if generated is not None and len(self.table) and generated >= self.fresh_after():
+                return 0
+            started = time.perf_counter()
+            # Concurrent fetches coalesce into batched downloads upstream
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                rows = [row for row in pool.map(self._row, self.watchlist) if row is not None]
+            now = time.time()
+            local = datetime.now(pytz.timezone(os.getenv("TZ", "Asia/Kolkata"))).isoformat()
+            table = {}
+            for row in rows:
+                row["generated_at"] = now
+                row["generated"] = local
+                table[row["ticker"]] = row
+            self.table.replace(table)
+        self.last_run = {"at": now, "tickers": len(table), "seconds": round(time.perf_counter() - started, 1)}
+        print(f"Precomputed {len(table)}/{len(self.watchlist)} watchlist predictions in {self.last_run['seconds']}s")
+        return len(table)
+
+    def start(self):
+        with self._lock:
+            if self._thread is None and self.watchlist:
+                self._thread = threading.Thread(target=self._run, name="precompute", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                # Catch up at boot if the table predates the latest close
+                self.run_once()
+            except Exception as e:
+                print(f"Precompute error: {str(e)}")
+            now = datetime.now(pytz.utc)
+            time.sleep(max((next_run(now, self.run_at, self.tz) - now).total_seconds(), 1))
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_precompute(compute):
+    """Process-wide precompute scheduler, started on first use when a watchlist is configured"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = PrecomputeScheduler(
+                load_watchlist(),
+                compute,
+                PredictionTable(os.getenv("PRECOMPUTE_TABLE", "./precomputed/predictions.json")),
+                run_at=os.getenv("PRECOMPUTE_AT", "16:30"),
+                tz=os.getenv("MARKET_TZ", "America/New_York"),
+                workers=int(os.getenv("PRECOMPUTE_WORKERS", 8)),
+                fine_tune=os.getenv("PRECOMPUTE_FINE_TUNE", "0").lower() in ("1", "true", "yes")
+            )
+            _scheduler.start()
+        return _scheduler
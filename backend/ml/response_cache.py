@@ -0,0 +1,125 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from .bars import INTERVAL_MINUTES
+
+def freshness_seconds(interval, cap=None):
+    """How long a result stays fresh: one bar, capped (daily bars still move during the session)"""
+    cap = float(os.getenv("PREDICT_CACHE_FRESH_SECONDS", 900)) if cap is None else cap
+    return min(INTERVAL_MINUTES.get(interval, 24 * 60) * 60, cap)
+
+class ResponseCache:
+    """Stale-while-revalidate / stale-if-error cache of computed results.
+
+    Within ``fresh`` seconds an entry is served as is. For ``swr`` seconds
+    after that it is still served immediately while one background refresh
+    runs. Past that the caller waits for a recompute, and if it fails an
+    entry younger than ``fresh + stale_if_error`` is served instead of the
+    error. Concurrent misses for the same key share a single computation.
+    """
+
+    def __init__(self, size=1024, swr=3600, stale_if_error=86400, workers=4):
+        self.size = size
+        self.swr = swr
+        self.stale_if_error = stale_if_error
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="revalidate")
+        self._stats = {"hits": 0, "stale": 0, "misses": 0, "errors_served_stale": 0, "refresh_failures": 0}
+
+    def _compute(self, key, compute):
+        """Run ``compute`` once per key at a time; returns the shared Future"""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future, False
+            future = Future()
+            self._inflight[key] = future
+        try:
+            value = compute()
+            with self._lock:
+                self._entries[key] = {"value": value, "at": time.time(), "error": None}
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.size:
+                    self._entries.popitem(last=False)
+            future.set_result(value)
+        except Exception as e:
+            with self._lock:
+                if key in self._entries:
+                    self._entries[key]["error"] = str(e)
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+        return future, True
+
+    def _revalidate(self, key, compute):
+        future, _ = self._compute(key, compute)
+        if future.exception() is not None:
+            with self._lock:
+                self._stats["refresh_failures"] += 1
+
+    def get(self, key, compute, fresh):
+        """(value, info) where info has the entry's age and whether it was served stale"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                age = time.time() - entry["at"]
+                if age < fresh:
+                    self._stats["hits"] += 1
+                    return entry["value"], self._info(age, False, False, entry)
+                if age < fresh + self.swr:
+                    self._stats["stale"] += 1
+                    revalidating = key in self._inflight
+                    if not revalidating:
+                        self._pool.submit(self._revalidate, key, compute)
+                    return entry["value"], self._info(age, True, True, entry)
+            self._stats["misses"] += 1
+
+        future, _ = self._compute(key, compute)
+        try:
+            return future.result(), self._info(0.0, False, False, None)
+        except Exception:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is None:
+                    raise
+                age = time.time() - entry["at"]
+                if age >= fresh + self.stale_if_error:
+                    raise
+                self._stats["errors_served_stale"] += 1
+                return entry["value"], self._info(age, True, False, entry)
+
+    @staticmethod
+    def _info(age, stale, revalidating, entry):
+        return {"age_seconds": round(age, 1), "stale": stale, "revalidating": revalidating,
+                "error": entry["error"] if entry and stale else None}
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries), "inflight": len(self._inflight)}
+
+def cache_control(fresh, cache=None):
+    """Cache-Control header advertising the same windows to HTTP caches"""
+    cache = cache or get_prediction_cache()
+    return f"max-age={int(fresh)}, stale-while-revalidate={int(cache.swr)}, stale-if-error={int(cache.stale_if_error)}"
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_prediction_cache():
+    """Process-wide /predict result cache configured from the environment"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache(
+                size=int(os.getenv("PREDICT_CACHE_SIZE", 1024)),
+                swr=float(os.getenv("PREDICT_CACHE_SWR_SECONDS", 3600)),
+                stale_if_error=float(os.getenv("PREDICT_CACHE_STALE_IF_ERROR_SECONDS", 86400)),
+                workers=int(os.getenv("PREDICT_CACHE_REFRESH_WORKERS", 4))
+            )
+        return _cache
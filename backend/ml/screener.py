@@ -0,0 +1,190 @@
+import os
+import time
+import threading
+import warnings
+import numpy as np
+import pandas as pd
+from .upstream import get_scheduler
+
+DEFAULT_UNIVERSE = ["AAPL", "MSFT", "JNJ", "KO", "TSLA"]
+
+# Hand-written descriptions for well-known beginner tickers
+PROFILES = {
+    "AAPL": {"name": "Apple Inc.", "sector": "Technology",
+             "why_buy": "Stable company, consistent growth, beginner-friendly",
+             "expected_return": "+5% to +15% per year"},
+    "MSFT": {"name": "Microsoft", "sector": "Technology",
+             "why_buy": "Strong business model, cloud computing leader",
+             "expected_return": "+8% to +12% per year"},
+    "JNJ": {"name": "Johnson & Johnson", "sector": "Healthcare",
+            "why_buy": "Healthcare is always needed, pays dividends",
+            "expected_return": "+4% to +8% per year"},
+    "KO": {"name": "Coca-Cola", "sector": "Consumer Goods",
+           "why_buy": "Stable dividend stock, good for learning",
+           "expected_return": "+3% to +6% per year"},
+    "TSLA": {"name": "Tesla", "sector": "Electric Vehicles",
+             "why_buy": "High growth potential but very risky for beginners",
+             "expected_return": "-20% to +50% per year"},
+}
+
+def annualized_volatility(closes):
+    """Annualized volatility per column of a (time x ticker) price matrix, ignoring NaNs"""
+    closes = np.asarray(closes, dtype=np.float64)
+    returns = closes[1:] / closes[:-1] - 1
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        return np.nanstd(returns, axis=0) * np.sqrt(252)
+
+# Closes behind a risk label; /predict shows the same last 20 closes, so both agree
+RISK_WINDOW = 20
+RISK_LEVELS = ("Low", "Medium", "High")
+
+def risk_levels(volatility, counts):
+    """Low/Medium/High per ticker; fewer than 10 prices is treated as Medium"""
+    labels = np.select([volatility < 0.2, volatility < 0.4], ["Low", "Medium"], "High").astype(object)
+    labels[(counts < 10) | np.isnan(volatility)] = "Medium"
+    return labels
+
+def classify_risk(closes):
+    """(risk labels, annualized volatility) per column of a (time x ticker) price matrix, from its last RISK_WINDOW closes"""
+    recent = np.asarray(closes, dtype=np.float64)[-RISK_WINDOW:]
+    volatility = annualized_volatility(recent)
+    return risk_levels(volatility, np.sum(~np.isnan(recent), axis=0)), volatility
+
+def trend_changes(closes, counts):
+    """Last 5 vs previous 5 average price change per ticker"""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        recent = np.nanmean(closes[-5:], axis=0)
+        previous = np.nanmean(closes[-10:-5], axis=0)
+    trend = (recent - previous) / previous
+    return np.where((counts >= 10) & np.isfinite(trend), trend, 0.0)
+
+def recommendations(change_percent):
+    """Vectorized BUY/SELL/HOLD and confidence from predicted % change"""
+    conditions = [change_percent > 2, change_percent > 0.5, change_percent < -2, change_percent < -0.5]
+    actions = np.select(conditions, ["BUY", "BUY", "SELL", "SELL"], "HOLD")
+    confidence = np.select(conditions, ["High", "Medium", "High", "Medium"], "Medium")
+    return actions, confidence
+
+def screen(closes, tickers):
+    """Score every ticker of a (time x ticker) close matrix in one pass"""
+    closes = pd.DataFrame(np.asarray(closes, dtype=np.float64)).ffill().to_numpy()
+    counts = np.sum(~np.isnan(closes), axis=0)
+    risk, volatility = classify_risk(closes)
+    trend = trend_changes(closes, counts)
+    predicted_change = np.clip(trend * 0.5, -0.08, 0.08)  # Max 8% daily change
+    last = closes[-1]
+    predicted = last * (1 + predicted_change)
+    actions, confidence = recommendations(predicted_change * 100)
+
+    rows = []
+    for i, ticker in enumerate(tickers):
+        if not np.isfinite(last[i]):
+            continue
+        profile = PROFILES.get(ticker, {})
+        swing = f"±{volatility[i] * 100:.0f}% per year" if np.isfinite(volatility[i]) else "Unknown"
+        rows.append({
+            "ticker": ticker,
+            "name": profile.get("name", ticker),
+            "sector": profile.get("sector", "Unknown"),
+            "risk_level": risk[i],
+            "current_price": round(float(last[i]), 2),
+            "predicted_price": round(float(predicted[i]), 2),
+            "price_change_percent": round(float(predicted_change[i] * 100), 2),
+            "volatility": round(float(volatility[i]), 4) if np.isfinite(volatility[i]) else None,
+            "trend": round(float(trend[i]), 4),
+            "recommendation": str(actions[i]),
+            "confidence": str(confidence[i]),
+            "why_buy": profile.get("why_buy", f"{risk[i]} risk, {'rising' if trend[i] > 0 else 'falling' if trend[i] < 0 else 'flat'} recent trend"),
+            "expected_return": profile.get("expected_return", swing),
+            "beginner_friendly": bool(risk[i] == "Low")
+        })
+
+    # Safest first, then strongest expected move
+    risk_order = {"Low": 0, "Medium": 1, "High": 2}
+    rows.sort(key=lambda r: (risk_order[r["risk_level"]], -r["price_change_percent"]))
+    return rows
+
+def load_universe():
+    """Tickers from SCREENER_UNIVERSE_FILE (one per line) or SCREENER_UNIVERSE (comma list)"""
+    path = os.getenv("SCREENER_UNIVERSE_FILE")
+    if path and os.path.exists(path):
+        with open(path) as f:
+            tickers = [line.strip().upper() for line in f if line.strip() and not line.startswith("#")]
+    else:
+        tickers = [t.strip().upper() for t in os.getenv("SCREENER_UNIVERSE", "").split(",") if t.strip()]
+    return list(dict.fromkeys(tickers)) or list(DEFAULT_UNIVERSE)
+
+def download_closes(tickers, period="3mo", timeout=300):
+    """Aligned (time x ticker) close matrix, fetched through the batching scheduler"""
+    scheduler = get_scheduler()
+    futures = {ticker: scheduler.submit(ticker, period=period) for ticker in tickers}
+    series = {}
+    for ticker, future in futures.items():
+        try:
+            series[ticker] = future.result(timeout)["Close"]
+        except Exception as e:
+            print(f"Screener skipped {ticker}: {str(e)}")
+    if not series:
+        return np.empty((0, 0)), []
+    frame = pd.concat(series, axis=1).sort_index()
+    return frame.to_numpy(dtype=np.float64), list(frame.columns)
+
+class Screener:
+    """Keeps a precomputed screen of the universe, refreshed in the background"""
+
+    def __init__(self, universe=None, refresh_seconds=900, period="3mo", download=download_closes):
+        self.universe = universe or load_universe()
+        self.refresh_seconds = refresh_seconds
+        self.period = period
+        self._download = download
+        self._snapshot = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        started = time.perf_counter()
+        closes, tickers = self._download(self.universe, self.period)
+        rows = screen(closes, tickers) if tickers else []
+        snapshot = {
+            "rows": rows,
+            "generated_at": time.time(),
+            "refresh_ms": round((time.perf_counter() - started) * 1000, 1),
+            "universe_size": len(self.universe)
+        }
+        # Rebinding the reference is atomic, so readers never see a partial snapshot
+        self._snapshot = snapshot
+        return snapshot
+
+    def snapshot(self):
+        return self._snapshot
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="screener", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Screener refresh error: {str(e)}")
+            time.sleep(self.refresh_seconds)
+
+_screener = None
+_screener_lock = threading.Lock()
+
+def get_screener():
+    """Process-wide screener, started on first use"""
+    global _screener
+    with _screener_lock:
+        if _screener is None:
+            _screener = Screener(
+                refresh_seconds=float(os.getenv("SCREENER_REFRESH_SECONDS", 900)),
+                period=os.getenv("SCREENER_PERIOD", "3mo")
+            )
+            _screener.start()
+        return _screener
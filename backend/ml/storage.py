@@ -1,10 +1,22 @@
 import os
 import json
+import time
+import uuid
+import shutil
+import threading
 import joblib
-from datetime import datetime
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 import pytz
 
-def save_model_metadata(model_dir, ticker, lookback, use_indicators, interval, train_dates):
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+def save_model_metadata(model_dir, ticker, lookback, use_indicators, interval, train_dates, version=None,
+                        created_at=None):
     """Save model metadata to JSON"""
     tz = pytz.timezone(os.getenv("TZ", "Asia/Kolkata"))
     meta = {
@@ -13,8 +25,10 @@ def save_model_metadata(model_dir, ticker, lookback, use_indicators, interval, t
         "use_indicators": use_indicators,
         "interval": interval,
         "train_dates": train_dates,
-        "created_at": datetime.now(tz).isoformat()
+        "created_at": created_at or datetime.now(tz).isoformat()
     }
+    if version is not None:
+        meta["version"] = version
     
     meta_path = os.path.join(model_dir, "meta.json")
     with open(meta_path, 'w') as f:
@@ -49,3 +63,156 @@ def load_scalers(model_dir):
         return scaler_x, scaler_y
     
     return None, None
+
+def variant_key(lookback, use_indicators, interval):
+    """Directory name for one (lookback, indicators, interval) model variant"""
+    return f"lb{lookback}_ind{int(bool(use_indicators))}_{interval}"
+
+def _read_access(model_dir):
+    try:
+        with open(os.path.join(model_dir, "access.json"), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _write_access(model_dir, access):
+    access_path = os.path.join(model_dir, "access.json")
+    tmp_path = f"{access_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(access, f, indent=2)
+    os.replace(tmp_path, access_path)
+
+def record_variant_access(model_dir, key):
+    """Note that a variant was just used, for LRU cleanup"""
+    # Read-modify-write under the ticker dir's lock so concurrent workers don't drop each other's entries
+    with variant_lock(model_dir):
+        access = _read_access(model_dir)
+        access[key] = time.time()
+        _write_access(model_dir, access)
+    return access
+
+def prune_variants(model_dir, max_variants, keep=None):
+    """Delete least-recently-used variant directories beyond max_variants.
+
+    A variant whose lock is held (being trained or published by another
+    worker) is left alone this time.
+    """
+    with variant_lock(model_dir):
+        access = _read_access(model_dir)
+        variants = [name for name in os.listdir(model_dir)
+                    if os.path.isdir(os.path.join(model_dir, name)) and name.startswith("lb")]
+        # Untracked variants count as oldest
+        variants.sort(key=lambda name: access.get(name, 0), reverse=True)
+        removed = []
+        for name in variants[max_variants:]:
+            if name == keep:
+                continue
+            path = os.path.join(model_dir, name)
+            with variant_lock(path, blocking=False) as locked:
+                if not locked:
+                    continue
+                shutil.rmtree(path, ignore_errors=True)
+            access.pop(name, None)
+            removed.append(name)
+        if removed:
+            _write_access(model_dir, access)
+    return removed
+
+def is_stale(meta, max_age_days):
+    """True when a model's metadata is older than max_age_days"""
+    if not meta or "created_at" not in meta:
+        return True
+    created_at = datetime.fromisoformat(meta["created_at"])
+    now = datetime.now(created_at.tzinfo)
+    return now - created_at > timedelta(days=max_age_days)
+
+def migrate_legacy_model(model_dir):
+    """Move a pre-variant model (files directly under the ticker dir) into its variant dir"""
+    meta = load_model_metadata(model_dir)
+    legacy_files = ["model.keras", "scaler_x.pkl", "scaler_y.pkl", "meta.json"]
+    if not meta or not os.path.exists(os.path.join(model_dir, "model.keras")):
+        return None
+    key = variant_key(meta.get("lookback"), meta.get("use_indicators"), meta.get("interval"))
+    target = os.path.join(model_dir, key)
+    os.makedirs(target, exist_ok=True)
+    for name in legacy_files:
+        path = os.path.join(model_dir, name)
+        if os.path.exists(path) and not os.path.exists(os.path.join(target, name)):
+            os.replace(path, os.path.join(target, name))
+    return key
+
+@contextmanager
+def variant_lock(variant_dir, blocking=True):
+    """Exclusive cross-process lock on a variant, so only one worker trains it at a time.
+
+    Yields whether the lock was taken; only False when ``blocking`` is off
+    and another holder has it.
+    """
+    with open(os.path.join(variant_dir, ".lock"), "a+") as f:
+        try:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                while True:
+                    try:
+                        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+                        break
+                    except OSError:
+                        if not blocking:
+                            raise
+        except OSError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+def new_staging_dir(variant_dir):
+    """Fresh staging directory for a new version; call while holding variant_lock"""
+    # Any staging left behind belongs to a trainer that died holding the lock
+    for name in os.listdir(variant_dir):
+        if name.startswith(".staging-"):
+            shutil.rmtree(os.path.join(variant_dir, name), ignore_errors=True)
+    version = f"{int(time.time() * 1000):013d}-{uuid.uuid4().hex[:8]}"
+    path = os.path.join(variant_dir, f".staging-{version}")
+    os.makedirs(path)
+    return version, path
+
+def publish_version(variant_dir, staging_dir, keep=2):
+    """Atomically make a fully written staging directory the variant's current version"""
+    version = os.path.basename(staging_dir)[len(".staging-"):]
+    versions_dir = os.path.join(variant_dir, "versions")
+    os.makedirs(versions_dir, exist_ok=True)
+    os.rename(staging_dir, os.path.join(versions_dir, version))
+    
+    # Readers follow CURRENT, which is swapped in a single rename
+    tmp_path = os.path.join(variant_dir, f".CURRENT.{os.getpid()}.tmp")
+    with open(tmp_path, 'w') as f:
+        f.write(version)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(variant_dir, "CURRENT"))
+    
+    # Keep a few older versions for readers still loading them
+    for old in sorted(os.listdir(versions_dir), reverse=True)[keep:]:
+        shutil.rmtree(os.path.join(versions_dir, old), ignore_errors=True)
+    return version
+
+def current_version(variant_dir):
+    """(version, directory) of the published model, or (None, None)"""
+    current_path = os.path.join(variant_dir, "CURRENT")
+    if os.path.exists(current_path):
+        with open(current_path, 'r') as f:
+            version = f.read().strip()
+        path = os.path.join(variant_dir, "versions", version)
+        if os.path.exists(os.path.join(path, "model.keras")):
+            return version, path
+    # Models saved before versioned publishing sit directly in the variant dir
+    if os.path.exists(os.path.join(variant_dir, "model.keras")):
+        return "legacy", variant_dir
+    return None, None
@@ -0,0 +1,246 @@
+import os
+import re
+import csv
+import sys
+import time
+import threading
+
+DEFAULT_FILE = os.path.join(os.path.dirname(__file__), "data", "symbols.csv")
+FIELDS = ("symbol", "name", "exchange", "sector")
+
+# Letters, digits and the separators Yahoo uses (BRK-B, RELIANCE.NS, ^GSPC, EURUSD=X)
+SYMBOL_PATTERN = re.compile(r"^\^?[A-Z0-9][A-Z0-9.\-=]{0,19}$")
+
+# Company-name words shorter than this are ignored, and each word matches at most NAME_HITS symbols
+MIN_NAME_WORD = 2
+NAME_HITS = 1000
+
+def is_well_formed(symbol):
+    return bool(SYMBOL_PATTERN.match(symbol))
+
+def _words(text):
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+class _Node:
+    __slots__ = ("children", "items")
+
+    def __init__(self):
+        self.children = {}
+        self.items = None
+
+class Trie:
+    """Prefix tree from string keys to sets of values"""
+
+    def __init__(self):
+        self.root = _Node()
+
+    def add(self, key, value):
+        node = self.root
+        for ch in key:
+            node = node.children.setdefault(ch, _Node())
+        if node.items is None:
+            node.items = set()
+        node.items.add(value)
+
+    def _find(self, prefix):
+        node = self.root
+        for ch in prefix:
+            node = node.children.get(ch)
+            if node is None:
+                return None
+        return node
+
+    def prefixed(self, prefix, limit=None):
+        """Values under ``prefix``, shortest keys first then alphabetically"""
+        node = self._find(prefix)
+        if node is None:
+            return []
+        found, level = [], [node]
+        while level and (limit is None or len(found) < limit):
+            following = []
+            for node in level:
+                if node.items:
+                    found.extend(sorted(node.items))
+                following.extend(node.children[ch] for ch in sorted(node.children))
+            level = following
+        return found if limit is None else found[:limit]
+
+    def within(self, word, max_distance):
+        """(value, distance) for keys within ``max_distance`` edits of ``word``.
+
+        Walks the trie carrying one Levenshtein row per node, pruning any
+        branch whose row minimum already exceeds the budget.
+        """
+        found = []
+        first = list(range(len(word) + 1))
+
+        def walk(node, ch, previous):
+            row = [previous[0] + 1]
+            for i in range(1, len(word) + 1):
+                row.append(min(row[i - 1] + 1, previous[i] + 1, previous[i - 1] + (word[i - 1] != ch)))
+            if node.items and row[-1] <= max_distance:
+                found.extend((value, row[-1]) for value in node.items)
+            if min(row) <= max_distance:
+                for next_ch, child in node.children.items():
+                    walk(child, next_ch, row)
+
+        for ch, child in self.root.children.items():
+            walk(child, ch, first)
+        return found
+
+class SymbolIndex:
+    """In-memory symbol universe with prefix, company-name and typo-tolerant lookup.
+
+    ``strict`` means the universe is a complete listing, so anything outside
+    it is rejected without asking the provider. Symbols the provider does
+    not know are remembered for ``negative_ttl`` seconds either way; ones
+    that failed for another reason only for ``retry_ttl`` seconds.
+    """
+
+    def __init__(self, rows, strict=False, negative_ttl=86400, retry_ttl=300):
+        self.strict = strict
+        self.negative_ttl = negative_ttl
+        self.retry_ttl = retry_ttl
+        self._rows = {}
+        self._symbols = Trie()
+        self._names = Trie()
+        self._invalid = {}
+        self._lock = threading.Lock()
+        for row in rows:
+            symbol = row["symbol"].strip().upper()
+            if not symbol:
+                continue
+            self._rows[symbol] = {field: (row.get(field) or "").strip() for field in FIELDS}
+            self._rows[symbol]["symbol"] = symbol
+            self._symbols.add(symbol, symbol)
+            for word in _words(self._rows[symbol]["name"]):
+                self._names.add(word, symbol)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, symbol):
+        return symbol.upper() in self._rows
+
+    def get(self, symbol):
+        return self._rows.get(symbol.upper())
+
+    def mark_invalid(self, symbol, transient=False):
+        """Remember a symbol the provider did not recognise, or briefly one it failed to serve"""
+        ttl = self.retry_ttl if transient else self.negative_ttl
+        with self._lock:
+            self._invalid[symbol.upper()] = time.time() + ttl
+
+    def accepts(self, symbol):
+        """False when ``symbol`` is certainly not tradeable; needs no network call"""
+        symbol = symbol.upper()
+        if not is_well_formed(symbol):
+            return False
+        if symbol in self._rows:
+            return True
+        if self.strict:
+            return False
+        with self._lock:
+            expires = self._invalid.get(symbol)
+            if expires is not None and time.time() >= expires:
+                del self._invalid[symbol]
+                expires = None
+        return expires is None
+
+    def search(self, query, limit=10):
+        """Best matches for a partial symbol or company name.
+
+        Ranked by exact symbol, symbol prefix, company-name word prefixes
+        (every query word of two or more letters must match), then symbols
+        within one or two typos.
+        """
+        query = query.strip()
+        if not query or limit < 1:
+            return []
+        ranked = {}
+
+        def add(symbol, rank):
+            if symbol not in ranked or rank < ranked[symbol]:
+                ranked[symbol] = rank
+
+        key = query.upper().replace(" ", "")
+        if key in self._rows:
+            add(key, 0)
+        for i, symbol in enumerate(self._symbols.prefixed(key, limit)):
+            add(symbol, 1 + i / (limit + 1))
+
+        words = [word for word in _words(query) if len(word) >= MIN_NAME_WORD]
+        if words:
+            matches = None
+            for word in words:
+                hits = set(self._names.prefixed(word, NAME_HITS))
+                matches = hits if matches is None else matches & hits
+            for symbol in sorted(matches, key=lambda s: (len(self._rows[s]["name"]), s))[:limit]:
+                add(symbol, 2)
+
+        if len(ranked) < limit and len(key) >= 2:
+            budget = 1 if len(key) <= 4 else 2
+            for symbol, distance in self._symbols.within(key, budget):
+                add(symbol, 2 + distance)
+
+        best = sorted(ranked, key=lambda s: (ranked[s], s))[:limit]
+        kinds = ("exact", "symbol", "name")
+        return [{**self._rows[s], "match": kinds[int(ranked[s])] if ranked[s] <= 2 else "fuzzy"} for s in best]
+
+def read_universe(path):
+    """Rows from a CSV with symbol,name,exchange,sector columns"""
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+# Exchange codes used in the NASDAQ Trader symbol directory (otherlisted.txt)
+LISTING_EXCHANGES = {"A": "NYSE American", "N": "NYSE", "P": "NYSE Arca", "Z": "Cboe BZX", "V": "IEX"}
+
+def read_nasdaq_trader(path):
+    """Rows from nasdaqlisted.txt / otherlisted.txt, with symbols in Yahoo form (BRK.B -> BRK-B)"""
+    rows = []
+    with open(path, newline="", encoding="utf-8") as f:
+        for record in csv.DictReader(f, delimiter="|"):
+            symbol = record.get("Symbol") or record.get("ACT Symbol")
+            if not symbol or symbol.startswith("File Creation Time") or record.get("Test Issue") == "Y":
+                continue
+            exchange = "NASDAQ" if "Market Category" in record else LISTING_EXCHANGES.get(record.get("Exchange"), "")
+            rows.append({
+                "symbol": symbol.replace(".", "-"),
+                "name": record["Security Name"],
+                "exchange": exchange,
+                "sector": "ETF" if record.get("ETF") == "Y" else ""
+            })
+    return rows
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_symbol_index():
+    """Process-wide symbol index from SYMBOLS_FILE, or the bundled list of common tickers"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            path = os.getenv("SYMBOLS_FILE")
+            # Only an operator-supplied full listing is complete enough to reject on
+            strict = os.getenv("SYMBOLS_STRICT", "1" if path else "0").lower() in ("1", "true", "yes")
+            try:
+                rows = read_universe(path or DEFAULT_FILE)
+            except OSError as e:
+                print(f"Symbol universe unavailable: {str(e)}")
+                rows, strict = [], False
+            _index = SymbolIndex(rows, strict=strict,
+                                 negative_ttl=float(os.getenv("SYMBOLS_NEGATIVE_TTL_SECONDS", 86400)),
+                                 retry_ttl=float(os.getenv("SYMBOLS_RETRY_TTL_SECONDS", 300)))
+            print(f"Loaded {len(_index)} symbols ({'strict' if strict else 'advisory'})")
+        return _index
+
+if __name__ == "__main__":
+    # python -m ml.symbols nasdaqlisted.txt otherlisted.txt [extra.csv ...] > symbols.csv
+    merged = {}
+    for source in sys.argv[1:]:
+        rows = read_universe(source) if source.endswith(".csv") else read_nasdaq_trader(source)
+        for row in rows:
+            merged.setdefault(row["symbol"].upper(), row)
+    writer = csv.DictWriter(sys.stdout, fieldnames=FIELDS, extrasaction="ignore", lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(sorted(merged.values(), key=lambda row: row["symbol"]))
@@ -0,0 +1,123 @@
+import os
+import io
+import time
+import random
+import cProfile
+import pstats
+import contextvars
+from contextlib import contextmanager
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+class Span:
+    """A timed section of work, nested under its parent span"""
+    __slots__ = ("name", "start", "end", "children")
+
+    def __init__(self, name):
+        self.name = name
+        self.start = time.perf_counter()
+        self.end = None
+        self.children = []
+
+    def finish(self):
+        if self.end is None:
+            self.end = time.perf_counter()
+
+    @property
+    def duration_ms(self):
+        end = self.end if self.end is not None else time.perf_counter()
+        return (end - self.start) * 1000
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "ms": round(self.duration_ms, 2),
+            "children": [child.to_dict() for child in self.children]
+        }
+
+    def format_tree(self, indent=0):
+        lines = [f"{'  ' * indent}{self.name}: {self.duration_ms:.1f} ms"]
+        for child in self.children:
+            lines.append(child.format_tree(indent + 1))
+        return "\n".join(lines)
+
+def start_trace(name):
+    """Start a root span for the current request; returns (span, token)"""
+    root = Span(name)
+    token = _current_span.set(root)
+    return root, token
+
+def end_trace(root, token):
+    """Finish the root span and detach it from the current context"""
+    root.finish()
+    _current_span.reset(token)
+    return root
+
+def current_span():
+    return _current_span.get()
+
+@contextmanager
+def span(name):
+    """Time a block as a child of the active span (no-op when not tracing)"""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(name)
+    parent.children.append(child)
+    token = _current_span.set(child)
+    try:
+        yield child
+    finally:
+        child.finish()
+        _current_span.reset(token)
+
+def server_timing_header(root):
+    """Render top-level spans as a Server-Timing header value"""
+    parts = [f"total;dur={root.duration_ms:.1f}"]
+    for i, child in enumerate(root.children):
+        name = "".join(c if c.isalnum() else "_" for c in child.name)
+        parts.append(f"{name}_{i};dur={child.duration_ms:.1f}")
+    return ", ".join(parts)
+
+def should_log_slow(root):
+    """Sample requests whose latency exceeds SLOW_REQUEST_MS"""
+    threshold_ms = float(os.getenv("SLOW_REQUEST_MS", 2000))
+    sample_rate = float(os.getenv("SLOW_REQUEST_SAMPLE_RATE", 1.0))
+    return root.duration_ms >= threshold_ms and random.random() < sample_rate
+
+def log_slow_request(root):
+    print(f"Slow request ({root.duration_ms:.1f} ms):\n{root.format_tree()}")
+
+class Profiler:
+    """Per-request profiler; uses pyinstrument when requested and installed, else cProfile"""
+
+    def __init__(self, kind="cprofile"):
+        self.kind = "cprofile"
+        self._profiler = None
+        if kind == "pyinstrument":
+            try:
+                from pyinstrument import Profiler as PyinstrumentProfiler
+                self._profiler = PyinstrumentProfiler()
+                self.kind = "pyinstrument"
+            except ImportError:
+                pass
+        if self._profiler is None:
+            self._profiler = cProfile.Profile()
+
+    def start(self):
+        if self.kind == "pyinstrument":
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+
+    def stop(self, limit=30):
+        """Stop profiling and return the report as text"""
+        if self.kind == "pyinstrument":
+            self._profiler.stop()
+            return self._profiler.output_text()
+        self._profiler.disable()
+        out = io.StringIO()
+        stats = pstats.Stats(self._profiler, stream=out)
+        stats.sort_stats("cumulative").print_stats(limit)
+        return out.getvalue()
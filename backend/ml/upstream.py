@@ -0,0 +1,211 @@
+import os
+import time
+import random
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+import pandas as pd
+import yfinance as yf
+
+class TokenBucket:
+    """Token bucket limiting how often we call the data provider"""
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self):
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def acquire(self):
+        """Block until a token is available"""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+def yf_download(tickers, start=None, end=None, period=None, interval="1d"):
+    """Multi-symbol download grouped by ticker"""
+    kwargs = {"start": start, "end": end} if start or end else {"period": period or "1mo"}
+    return yf.download(tickers, interval=interval, group_by="ticker", auto_adjust=True,
+                       progress=False, threads=True, **kwargs)
+
+def split_by_ticker(df, tickers):
+    """Split a grouped multi-symbol download into per-ticker DataFrames"""
+    frames = {}
+    if df is None or df.empty:
+        return frames
+    if not isinstance(df.columns, pd.MultiIndex):
+        # A single-symbol download may come back flat
+        if len(tickers) == 1:
+            frames[tickers[0]] = df.dropna(how="all")
+        return frames
+    level = 0 if set(tickers) & set(df.columns.get_level_values(0)) else 1
+    for ticker in tickers:
+        if ticker not in df.columns.get_level_values(level):
+            continue
+        frame = df.xs(ticker, axis=1, level=level).dropna(how="all")
+        if not frame.empty:
+            frames[ticker] = frame
+    return frames
+
+class UpstreamScheduler:
+    """Coalesces single-ticker history requests into rate-limited multi-symbol downloads.
+
+    Requests with the same (start, end, period, interval) arriving within
+    ``window_ms`` of each other are merged into one download; callers still
+    receive their own ticker's DataFrame. Up to ``workers`` downloads run at
+    once, all paced by the same token bucket, so one slow provider call does
+    not hold up unrelated batches.
+    """
+
+    def __init__(self, download=yf_download, window_ms=50, max_batch=50, rate=2.0, burst=5,
+                 max_retries=3, backoff=0.5, workers=4, timeout=60):
+        self._download = download
+        self.timeout = timeout
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.bucket = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._pending = {}
+        self._cond = threading.Condition()
+        self._thread = None
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="upstream-download")
+        # Batches are only taken while a worker is free, so requests keep coalescing under load
+        self._free_workers = threading.Semaphore(workers)
+        self._stats = {"requests": 0, "batches": 0, "symbols": 0, "retries": 0, "failures": 0}
+
+    def submit(self, ticker, start=None, end=None, period=None, interval="1d"):
+        """Queue a history request and return a Future resolving to its DataFrame"""
+        future = Future()
+        key = (start, end, period, interval)
+        with self._cond:
+            if key not in self._pending:
+                self._pending[key] = {"since": time.monotonic(), "waiters": []}
+            self._pending[key]["waiters"].append((ticker.upper(), future))
+            self._stats["requests"] += 1
+            self._ensure_thread()
+            self._cond.notify()
+        return future
+
+    def fetch(self, ticker, start=None, end=None, period=None, interval="1d", timeout=None):
+        """Wait for one ticker's DataFrame; raises TimeoutError after ``timeout`` (default: the scheduler's)"""
+        return self.submit(ticker, start, end, period, interval).result(self.timeout if timeout is None else timeout)
+
+    def queue_depth(self):
+        with self._cond:
+            return sum(len(entry["waiters"]) for entry in self._pending.values())
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+        stats["queue_depth"] = self.queue_depth()
+        stats["batching_factor"] = round(stats["requests"] / stats["batches"], 2) if stats["batches"] else 0.0
+        return stats
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="upstream-scheduler", daemon=True)
+            self._thread.start()
+
+    def _next_batch(self):
+        """Wait for the oldest pending group's window to close, then take a batch from it"""
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            key, entry = min(self._pending.items(), key=lambda item: item[1]["since"])
+            delay = entry["since"] + self.window - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        with self._cond:
+            entry = self._pending.pop(key)
+            tickers = list(dict.fromkeys(ticker for ticker, _ in entry["waiters"]))
+            batch_tickers = set(tickers[:self.max_batch])
+            batch = [w for w in entry["waiters"] if w[0] in batch_tickers]
+            rest = [w for w in entry["waiters"] if w[0] not in batch_tickers]
+            if rest:
+                self._pending[key] = {"since": entry["since"], "waiters": rest}
+        return key, batch
+
+    def _run(self):
+        while True:
+            self._free_workers.acquire()
+            key, batch = self._next_batch()
+            self._pool.submit(self._dispatch_and_release, key, batch)
+
+    def _dispatch_and_release(self, key, batch):
+        try:
+            self._dispatch(key, batch)
+        finally:
+            self._free_workers.release()
+
+    def _dispatch(self, key, batch):
+        start, end, period, interval = key
+        tickers = list(dict.fromkeys(ticker for ticker, _ in batch))
+        frames, error = {}, None
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            try:
+                frames = split_by_ticker(self._download(tickers, start=start, end=end, period=period,
+                                                        interval=interval), tickers)
+                error = None
+                break
+            except Exception as e:
+                error = e
+            if attempt < self.max_retries:
+                with self._cond:
+                    self._stats["retries"] += 1
+                time.sleep(self.backoff * (2 ** attempt) * (1 + random.random()))
+        with self._cond:
+            self._stats["batches"] += 1
+            self._stats["symbols"] += len(tickers)
+            if error is not None:
+                self._stats["failures"] += 1
+        for ticker, future in batch:
+            if ticker in frames:
+                future.set_result(frames[ticker].copy())
+            elif error is not None:
+                future.set_exception(error)
+            else:
+                future.set_exception(ValueError(f"No data found for ticker {ticker} in the specified date range"))
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_scheduler():
+    """Process-wide scheduler configured from the environment"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = UpstreamScheduler(
+                window_ms=float(os.getenv("UPSTREAM_BATCH_WINDOW_MS", 50)),
+                max_batch=int(os.getenv("UPSTREAM_MAX_BATCH", 50)),
+                rate=float(os.getenv("UPSTREAM_RATE", 2)),
+                burst=int(os.getenv("UPSTREAM_BURST", 5)),
+                max_retries=int(os.getenv("UPSTREAM_MAX_RETRIES", 3)),
+                backoff=float(os.getenv("UPSTREAM_BACKOFF", 0.5)),
+                workers=int(os.getenv("UPSTREAM_WORKERS", 4)),
+                timeout=float(os.getenv("UPSTREAM_TIMEOUT", 60))
+            )
+        return _scheduler
+
+def fetch_history(ticker, start=None, end=None, period=None, interval="1d"):
+    """Fetch one ticker's OHLCV history through the shared scheduler"""
+    return get_scheduler().fetch(ticker, start=start, end=end, period=period, interval=interval)
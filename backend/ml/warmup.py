@@ -0,0 +1,133 @@
+import os
+import json
+import time
+import threading
+from .storage import current_version
+from .precompute import load_watchlist
+
+def load_popularity():
+    """Most popular tickers first: WARMUP_POPULARITY_FILE (one per line), else the precompute watchlist"""
+    path = os.getenv("WARMUP_POPULARITY_FILE")
+    if path and os.path.exists(path):
+        with open(path) as f:
+            tickers = [line.strip().upper() for line in f if line.strip() and not line.startswith("#")]
+        return list(dict.fromkeys(tickers))
+    return load_watchlist()
+
+def scan_models(model_root, popularity=()):
+    """Published model variants under ``model_root``, hottest first.
+
+    Tickers on the popularity list come first in list order, the rest by
+    their most recent use in access.json; a ticker's variants are ordered
+    by last use too.
+    """
+    rank = {ticker: i for i, ticker in enumerate(popularity)}
+    candidates = []
+    if not os.path.isdir(model_root):
+        return candidates
+    for ticker in os.listdir(model_root):
+        ticker_dir = os.path.join(model_root, ticker)
+        if not os.path.isdir(ticker_dir):
+            continue
+        try:
+            with open(os.path.join(ticker_dir, "access.json")) as f:
+                access = json.load(f)
+        except (OSError, ValueError):
+            access = {}
+        for variant in os.listdir(ticker_dir):
+            path = os.path.join(ticker_dir, variant)
+            if variant.startswith("lb") and os.path.isdir(path) and current_version(path)[1] is not None:
+                candidates.append({"ticker": ticker.upper(), "variant": variant, "path": path,
+                                   "last_access": access.get(variant, 0)})
+    latest = {}
+    for c in candidates:
+        latest[c["ticker"]] = max(latest.get(c["ticker"], 0), c["last_access"])
+    candidates.sort(key=lambda c: (rank.get(c["ticker"], len(rank)), -latest[c["ticker"]], -c["last_access"]))
+    return candidates
+
+def warm_variant(path):
+    """Load a variant into the in-process model cache and trace both inference paths"""
+    import numpy as np
+    from .model_utils import load_published_model
+
+    model, _, _ = load_published_model(path)
+    x = np.zeros((1,) + tuple(model.input_shape[1:]), dtype=np.float32)
+    model(x, training=False)     # direct call used by batched forecasts
+    model.predict(x, verbose=0)  # predict() used by /predict evaluation
+
+class ModelWarmer:
+    """Loads the hot set of models in a background thread after boot and reports progress.
+
+    Readiness means every selected model was attempted; a model that fails
+    to load is counted but does not hold readiness back.
+    """
+
+    def __init__(self, candidates, top_n=16, warm=warm_variant):
+        self.selected = candidates[:max(top_n, 0)]
+        self._warm = warm
+        self._lock = threading.Lock()
+        self._thread = None
+        self.loaded = []
+        self.failed = {}
+        self.current = None
+        self.started_at = None
+        self.finished_at = None if self.selected else time.time()
+
+    @property
+    def ready(self):
+        return self.finished_at is not None
+
+    def start(self):
+        with self._lock:
+            if self._thread is None and not self.ready:
+                self.started_at = time.time()
+                self._thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        for candidate in self.selected:
+            name = f"{candidate['ticker']}/{candidate['variant']}"
+            with self._lock:
+                self.current = name
+            started = time.perf_counter()
+            try:
+                self._warm(candidate["path"])
+                with self._lock:
+                    self.loaded.append({"model": name, "seconds": round(time.perf_counter() - started, 2)})
+            except Exception as e:
+                print(f"Warm-up skipped {name}: {str(e)}")
+                with self._lock:
+                    self.failed[name] = str(e)
+        with self._lock:
+            self.current = None
+            self.finished_at = time.time()
+        print(f"Warmed {len(self.loaded)}/{len(self.selected)} models in {self.finished_at - self.started_at:.1f}s")
+
+    def status(self):
+        with self._lock:
+            done = len(self.loaded) + len(self.failed)
+            elapsed = ((self.finished_at or time.time()) - self.started_at) if self.started_at else 0.0
+            return {
+                "ready": self.ready,
+                "total": len(self.selected),
+                "loaded": len(self.loaded),
+                "failed": dict(self.failed),
+                "progress": round(done / len(self.selected), 3) if self.selected else 1.0,
+                "current": self.current,
+                "elapsed_seconds": round(elapsed, 1),
+                "models": list(self.loaded)
+            }
+
+_warmer = None
+_warmer_lock = threading.Lock()
+
+def get_warmer():
+    """Process-wide model warmer; the app starts it when it is created"""
+    global _warmer
+    with _warmer_lock:
+        if _warmer is None:
+            # Warming more than the cache holds would evict the first models again
+            top_n = min(int(os.getenv("WARMUP_TOP_N", 16)), int(os.getenv("MODEL_CACHE_SIZE", 32)))
+            candidates = scan_models(os.getenv("MODEL_DIR", "./models"), load_popularity()) if top_n > 0 else []
+            _warmer = ModelWarmer(candidates, top_n)
+        return _warmer
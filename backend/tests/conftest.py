@@ -0,0 +1,4 @@
+import os
+
+# Importing app starts the model warm-up; tests must not load whatever sits in MODEL_DIR
+os.environ.setdefault("WARMUP_TOP_N", "0")
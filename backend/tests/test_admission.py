@@ -0,0 +1,105 @@
+import pytest
+import sys
+import os
+import time
+import threading
+
+# Add the parent directory to the path so we can import the app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+from ml.admission import Pool, AdmissionController, Overloaded
+
+def test_pool_queues_then_sheds():
+    """Test waiters queue up to the limit and the rest are rejected with a retry hint"""
+    pool = Pool("inference", concurrency=1, queue_size=1, timeout=5)
+    pool.acquire()
+    waited = []
+    waiter = threading.Thread(target=lambda: waited.append(pool.acquire()))
+    waiter.start()
+    while pool.stats()["queued"] < 1:
+        time.sleep(0.01)
+    
+    errors = []
+    
+    def shed():
+        try:
+            pool.acquire()
+        except Overloaded as e:
+            errors.append(e)
+    
+    third = threading.Thread(target=shed)
+    third.start()
+    third.join()
+    assert errors[0].reason == "queue full" and errors[0].retry_after >= 1
+    
+    time.sleep(0.05)
+    pool.release()
+    waiter.join()
+    assert waited[0] >= 0.05
+    stats = pool.stats()
+    assert stats["admitted"] == 2 and stats["rejected"] == 1 and stats["active"] == 1
+
+def test_pool_wait_timeout():
+    """Test a queued request gives up after the pool's timeout"""
+    pool = Pool("training", concurrency=1, queue_size=4, timeout=0.05)
+    pool.acquire()
+    errors = []
+    
+    def wait():
+        try:
+            pool.acquire()
+        except Overloaded as e:
+            errors.append(e)
+    
+    waiter = threading.Thread(target=wait)
+    waiter.start()
+    waiter.join()
+    assert errors[0].reason == "wait timed out"
+    assert pool.stats()["queued"] == 0
+
+def test_pool_is_reentrant_per_thread():
+    """Test nested admission in the same thread does not deadlock on a one-slot pool"""
+    pool = Pool("training", concurrency=1, queue_size=0, timeout=0)
+    with pool.admit():
+        with pool.admit() as waited:
+            assert waited == 0.0
+    assert pool.stats()["active"] == 0
+
+@pytest.fixture
+def client(monkeypatch):
+    controller = AdmissionController({"cheap": (4, 4, 1), "inference": (1, 0, 0), "training": (1, 0, 0)})
+    monkeypatch.setattr(app_module, "get_admission", lambda: controller)
+    app_module.app.config["TESTING"] = True
+    with app_module.app.test_client() as client:
+        yield client, controller
+
+def test_full_inference_pool_sheds_but_cheap_endpoints_stay_up(client):
+    """Test a saturated inference pool returns 429 while /health and cheap endpoints still answer"""
+    client, controller = client
+    held, done = threading.Event(), threading.Event()
+    
+    def long_inference():
+        with controller.admit("inference"):
+            held.set()
+            done.wait(5)
+    
+    worker = threading.Thread(target=long_inference)
+    worker.start()
+    held.wait(5)
+    try:
+        response = client.post("/predict", json={"ticker": "AAPL"})
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+        assert response.get_json()["error"] == "Server busy"
+        
+        assert client.get("/health").status_code == 200
+        cheap = client.get("/symbols/search?q=AA")
+        assert cheap.status_code == 200 and "X-Queue-Wait-Ms" in cheap.headers
+    finally:
+        done.set()
+        worker.join()
+    
+    stats = client.get("/admission/stats").get_json()
+    assert stats["inference"]["rejected"] == 1 and stats["inference"]["active"] == 0
+    assert stats["cheap"]["rejected"] == 0 and stats["cheap"]["admitted"] >= 2
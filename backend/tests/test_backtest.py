@@ -0,0 +1,57 @@
+import pytest
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+# Add the parent directory to the path so we can import the app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, predict_next_close
+import ml.backtest
+from ml.backtest import walk_forward, trend_predictor, close_windows, periods_per_year
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+def test_batched_predictor_matches_single_prediction():
+    """Test that the batched predictor agrees with the per-request estimate"""
+    closes = 100 + np.cumsum(np.random.default_rng(1).normal(0, 1, 40))
+    windows = close_windows(closes, 20)
+    batched = trend_predictor(windows)
+    assert np.allclose(batched[7], predict_next_close(list(windows[7])))
+
+def test_walk_forward_uses_one_forward_pass():
+    """Test that all tickers' windows share a single predictor call"""
+    calls = []
+    def predictor(windows):
+        calls.append(windows.shape)
+        return windows[:, -1]
+    series = {"UP": np.linspace(100, 200, 50), "DOWN": np.linspace(200, 100, 80)}
+    results = walk_forward(series, 10, predictor)
+    assert calls == [(40 + 70, 10)]
+    assert results["UP"]["origins"] == 40
+    assert results["DOWN"]["strategy"]["trades"]["hold"] == 70
+
+def test_backtest_validates_model(client):
+    """Test that unknown models are rejected"""
+    response = client.post('/backtest', json={"tickers": ["AAPL"], "model": "magic"})
+    assert response.status_code == 400
+
+def test_lstm_backtest_scores_only_unseen_bars(monkeypatch):
+    """Test the stored LSTM is scored only after its training dates, with an interval-aware Sharpe"""
+    index = pd.bdate_range("2024-01-01", periods=60)
+    frame = pd.DataFrame({"Close": np.linspace(100, 160, 60)}, index=index)
+    monkeypatch.setattr(ml.backtest, "download_history", lambda tickers, period, interval: ({"AAPL": frame}, {}))
+    predictor = lambda frame: frame["Close"].to_numpy()[9:-1] * 1.01
+    monkeypatch.setattr(ml.backtest, "lstm_predictor",
+                        lambda *args: (predictor, index[39].date()))
+    result = ml.backtest.run_backtest(["AAPL"], lookback=10, model="lstm")
+    assert result["results"]["AAPL"]["origins"] == 20
+    
+    monkeypatch.setattr(ml.backtest, "lstm_predictor", lambda *args: (predictor, index[-1].date()))
+    assert "AAPL" in ml.backtest.run_backtest(["AAPL"], lookback=10, model="lstm")["errors"]
+    assert periods_per_year("1d") == 252 and periods_per_year("1h") == 252 * 7 and periods_per_year("1wk") == 52
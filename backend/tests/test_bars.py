@@ -0,0 +1,76 @@
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+# Add the parent directory to the path so we can import the app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.bars import BarStore, resample_ohlcv, choose_base
+
+def minute_bars(days=2, end=None):
+    """1m regular-session bars (09:30-16:00 New York) for the last few weekdays"""
+    end = end or pd.Timestamp.now(tz="America/New_York").normalize()
+    sessions = pd.bdate_range(end=end, periods=days, tz="America/New_York")
+    index = pd.DatetimeIndex(np.concatenate([
+        pd.date_range(day + pd.Timedelta(hours=9, minutes=30), periods=390, freq="1min") for day in sessions
+    ]))
+    rng = np.random.default_rng(0)
+    close = 100 + np.cumsum(rng.normal(0, 0.1, len(index)))
+    return pd.DataFrame({"Open": close + 0.01, "High": close + 0.05, "Low": close - 0.05,
+                         "Close": close, "Volume": rng.integers(100, 1000, len(index))}, index=index)
+
+def test_resample_hourly_anchored_at_session_open():
+    """Test 1h bars start at 09:30 and never span two sessions"""
+    bars = minute_bars()
+    hourly = resample_ohlcv(bars, "1h")
+    assert len(hourly) == 2 * 7  # 6.5 hours -> 7 bars per session
+    assert hourly.index[0].strftime("%H:%M") == "09:30"
+    assert hourly.index[6].strftime("%H:%M") == "15:30"
+    first = bars.iloc[:60]
+    assert hourly["Open"].iloc[0] == first["Open"].iloc[0]
+    assert hourly["High"].iloc[0] == first["High"].max()
+    assert hourly["Close"].iloc[0] == first["Close"].iloc[-1]
+    assert hourly["Volume"].iloc[0] == first["Volume"].sum()
+
+def test_resample_daily_one_bar_per_session():
+    """Test daily bars from intraday data"""
+    bars = minute_bars(days=3)
+    daily = resample_ohlcv(bars, "1d")
+    assert len(daily) == 3
+    assert daily["Close"].iloc[-1] == bars["Close"].iloc[-1]
+    assert daily["Low"].iloc[1] == bars["Low"].iloc[390:780].min()
+
+def test_choose_base():
+    """Test granularity choice against provider history limits"""
+    assert choose_base("15m", 5) == "1m"
+    assert choose_base("15m", 30) == "5m"
+    assert choose_base("1h", 365) == "1h"
+    assert choose_base("1d", 30) == "5m"
+    assert choose_base("1d", 1800) == "1d"
+
+def test_store_serves_timeframes_from_one_download(tmp_path):
+    """Test several timeframes cost one upstream call"""
+    calls = []
+    bars = minute_bars(days=3)
+    
+    def fetch(ticker, start=None, end=None, interval="1d"):
+        calls.append(interval)
+        return bars
+    
+    store = BarStore(bar_dir=str(tmp_path), fetch=fetch, refresh_seconds=3600)
+    for interval in ("5m", "15m", "1h", "1d"):
+        assert not store.get_bars("AAPL", interval, period="5d").empty
+    assert calls == ["1m"]
+    assert (tmp_path / "AAPL" / "1m.pkl").exists()
+
+def test_store_bounds_memory_and_intraday_history(tmp_path):
+    """Test the in-memory series are LRU-bounded and stored 1m bars stay within the provider window"""
+    old = minute_bars(days=2, end=pd.Timestamp.now(tz="America/New_York").normalize() - pd.Timedelta(days=30))
+    fetch = lambda ticker, start=None, end=None, interval="1d": pd.concat([old, minute_bars(days=2)])
+    store = BarStore(bar_dir=str(tmp_path), fetch=fetch, refresh_seconds=3600, max_series=2)
+    for ticker in ("A", "B", "C"):
+        store.get_bars(ticker, "2m", period="5d")
+    assert [key[0] for key in store._series] == ["B", "C"]
+    stored = pd.read_pickle(tmp_path / "A" / "1m.pkl")
+    assert stored.index[0] >= pd.Timestamp.now(tz="America/New_York") - pd.Timedelta(days=8)
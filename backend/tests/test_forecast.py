@@ -0,0 +1,119 @@
+import pytest
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+# Add the parent directory to the path so we can import the app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ml.portfolio
+from ml.indicators import compute_indicators, add_technical_indicators, INDICATOR_COLUMNS
+from ml.backtest import trend_predictor
+from ml.forecast import trend_forecast, lstm_forecast, future_dates
+
+def random_closes(lengths, seed=0):
+    rng = np.random.default_rng(seed)
+    return [100 * np.cumprod(1 + rng.normal(0, 0.02, n)) for n in lengths]
+
+def test_incremental_indicators_match_full_recompute():
+    """Test stepping the state bar by bar equals recomputing on the extended series"""
+    closes = random_closes([300, 220, 180])
+    full = np.full((3, 300), np.nan)
+    for i, c in enumerate(closes):
+        full[i, 300 - len(c):] = c
+    expected = compute_indicators(full, dtype=np.float64)
+    _, state = compute_indicators(full[:, :-10], dtype=np.float64, return_state=True)
+    for k in range(10, 0, -1):
+        row = state.features(full[:, -k])
+        np.testing.assert_allclose(row, expected[:, -k], rtol=1e-12)
+
+def test_trend_rollout_matches_sequential_loop():
+    """Test the batched rollout equals predicting one step at a time per ticker"""
+    closes = random_closes([40, 60])
+    paths = trend_forecast(closes, horizon=5)
+    for c, path in zip(closes, paths):
+        series = list(c)
+        for k in range(5):
+            series.append(trend_predictor(np.array([series[-20:]]))[0])
+            assert path[k] == pytest.approx(series[-1])
+
+def test_future_dates_skip_weekends():
+    """Test daily horizons land on business days"""
+    dates = future_dates("2024-06-07", "1d", 3)  # Friday
+    assert [d.strftime("%a") for d in dates] == ["Mon", "Tue", "Wed"]
+    assert future_dates("2024-06-06 14:30", "1h", 2) == [pd.Timestamp("2024-06-06 15:30"), pd.Timestamp("2024-06-07 09:30")]
+
+def test_intraday_future_dates_stay_in_session():
+    """Test intraday horizons skip the night and the weekend"""
+    dates = future_dates(pd.Timestamp("2024-06-07 15:50", tz="America/New_York"), "5m", 3)  # Friday
+    assert [d.strftime("%a %H:%M") for d in dates] == ["Fri 15:55", "Mon 09:30", "Mon 09:35"]
+    assert future_dates("2024-06-07 15:30", "90m", 1) == [pd.Timestamp("2024-06-10 09:30")]
+
+def test_lstm_rollout_matches_naive_recompute():
+    """Test the batched LSTM rollout equals re-running indicators and predict() every step"""
+    tf = pytest.importorskip("tensorflow")
+    from sklearn.preprocessing import MinMaxScaler
+    from ml.model_utils import build_lstm
+    
+    lookback, horizon = 30, 4
+    closes = random_closes([260, 200], seed=3)
+    tf.keras.utils.set_random_seed(0)
+    model = build_lstm((lookback, 7))
+    cols = ['Close'] + INDICATOR_COLUMNS
+    scalers = []
+    for c in closes:
+        frame = add_technical_indicators(pd.DataFrame({"Close": c}))
+        scalers.append(MinMaxScaler().fit(frame[cols].ffill().bfill()))
+    
+    paths = lstm_forecast(closes, [model, model], scalers, horizon, lookback)
+    
+    for c, scaler, path in zip(closes, scalers, paths):
+        series = list(c)
+        for k in range(horizon):
+            frame = add_technical_indicators(pd.DataFrame({"Close": series}))
+            window = scaler.transform(frame[cols].ffill().bfill().iloc[-lookback:])
+            scaled = model.predict(window[None].astype(np.float32), verbose=0)[0, 0]
+            series.append(scaled * scaler.data_range_[0] + scaler.data_min_[0])
+            assert path[k] == pytest.approx(series[-1], rel=1e-4)
+
+@pytest.fixture
+def client(monkeypatch):
+    closes = random_closes([100, 100, 5, 15])
+    index = pd.bdate_range(end="2024-06-07", periods=100)
+    series = {"AAPL": pd.Series(closes[0], index=index), "MSFT": pd.Series(closes[1], index=index),
+              "NEW": pd.Series(closes[2], index=index[-5:]), "YOUNG": pd.Series(closes[3], index=index[-15:])}
+    monkeypatch.setattr(ml.portfolio, "download_closes",
+                        lambda tickers, period, interval: ({t: series[t] for t in tickers if t in series},
+                                                           {t: "No data" for t in tickers if t not in series}))
+    from app import app
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+def test_forecast_endpoint_batches_tickers(client):
+    """Test /forecast returns a path per ticker and reports the rest as errors"""
+    data = client.post('/forecast', json={"tickers": ["aapl", "MSFT", "NEW", "GONE"], "horizon": 5}).get_json()
+    assert set(data['results']) == {"AAPL", "MSFT"}
+    assert len(data['results']['AAPL']['forecast']) == 5
+    assert data['results']['AAPL']['forecast'][0]['date'] == "2024-06-10"
+    assert set(data['errors']) == {"NEW", "GONE"}
+    assert client.post('/forecast', json={"tickers": ["AAPL"], "horizon": 0}).status_code == 400
+
+def test_forecast_mixes_short_and_long_history(client):
+    """Test a ticker with fewer closes than the trend window is forecast alongside long ones"""
+    response = client.post('/forecast', json={"tickers": ["AAPL", "YOUNG"], "horizon": 3})
+    assert response.status_code == 200
+    data = response.get_json()
+    assert set(data['results']) == {"AAPL", "YOUNG"}
+    young = random_closes([100, 100, 5, 15])[3]
+    alone = trend_forecast([young], horizon=3)[0]
+    assert [p['predicted'] for p in data['results']['YOUNG']['forecast']] == [round(float(p), 2) for p in alone]
+
+def test_lstm_forecast_needs_a_full_sma_window(client, monkeypatch):
+    """Test LSTM forecasts with indicators refuse series shorter than the SMA_50 window"""
+    index = pd.bdate_range(end="2024-06-07", periods=40)
+    monkeypatch.setattr(ml.portfolio, "download_closes",
+                        lambda tickers, period, interval: ({"MID": pd.Series(random_closes([40])[0], index=index)}, {}))
+    data = client.post('/forecast', json={"tickers": ["MID"], "model": "lstm", "lookback": 30}).get_json()
+    assert data['errors'] == {"MID": "Not enough history for lookback"}
@@ -0,0 +1,94 @@
+import pytest
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+# Add the parent directory to the path so we can import the app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+from ml.bars import BarStore
+from ml.history import slice_range, lttb, minmax, downsample
+
+def daily_bars(days=2520):
+    index = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=days)
+    rng = np.random.default_rng(1)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, days)))
+    return pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close,
+                         "Volume": np.full(days, 1000)}, index=index)
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    bars = daily_bars()
+    store = BarStore(bar_dir=str(tmp_path), fetch=lambda ticker, start=None, end=None, interval="1d": bars,
+                     refresh_seconds=3600)
+    monkeypatch.setattr(app_module, "get_bar_store", lambda: store)
+    app_module.app.config['TESTING'] = True
+    with app_module.app.test_client() as client:
+        yield client
+
+def test_slice_range_matches_mask():
+    """Test binary-search slicing against a boolean mask"""
+    bars = daily_bars(500)
+    start, end = bars.index[100], bars.index[300] + pd.Timedelta(hours=1)
+    expected = bars[(bars.index >= start) & (bars.index < end)]
+    pd.testing.assert_frame_equal(slice_range(bars, start, end), expected)
+    assert slice_range(bars, "2100-01-01").empty
+
+def test_lttb_keeps_endpoints_and_peak():
+    """Test LTTB keeps first/last points and a lone spike"""
+    y = np.zeros(1000)
+    y[437] = 50
+    keep = lttb(np.arange(1000), y, 50)
+    assert len(keep) == 50
+    assert keep[0] == 0 and keep[-1] == 999
+    assert 437 in keep
+    assert np.all(np.diff(keep) > 0)
+
+def test_minmax_keeps_extremes():
+    """Test min/max downsampling keeps the global min and max"""
+    y = np.sin(np.linspace(0, 20, 5000))
+    keep = minmax(y, 100)
+    assert len(keep) <= 100
+    assert np.argmax(y) in keep and np.argmin(y) in keep
+
+def test_downsample_noop_when_small():
+    """Test downsampling leaves short series untouched"""
+    bars = daily_bars(30)
+    assert len(downsample(bars, 100)) == 30
+    with pytest.raises(ValueError):
+        downsample(bars, 10, "average")
+
+def test_history_endpoint_ten_years(client):
+    """Test ten years of daily bars come back downsampled"""
+    response = client.get('/history/aapl?period=10y&max_points=300')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['ticker'] == 'AAPL'
+    assert data['total_points'] > 2000
+    assert len(data['history']) == 300
+    assert data['method'] == 'lttb'
+    assert data['history'][-1]['date'] == data['end']
+
+def test_history_endpoint_date_range(client):
+    """Test an explicit start/end window"""
+    bars = daily_bars()
+    start, end = bars.index[-60].strftime("%Y-%m-%d"), bars.index[-30].strftime("%Y-%m-%d")
+    data = client.get(f'/history/AAPL?start={start}&end={end}').get_json()
+    assert data['start'] == start
+    assert len(data['history']) == 30
+    assert data['method'] is None
+
+def test_history_endpoint_bad_params(client):
+    """Test invalid interval and method are rejected"""
+    assert client.get('/history/AAPL?interval=7m').status_code == 400
+    assert client.get('/history/AAPL?max_points=100&method=mean').status_code == 400
+    assert client.get('/history/AAPL?period=3w').status_code == 400
+
+def test_history_endpoint_bad_dates(client):
+    """Test malformed or reversed dates are a 400, not a missing-data 404"""
+    for query in ("start=2024-13-01", "start=yesterday", "start=2024-01-01&end=01/31/2024",
+                  "start=2024-02-01&end=2024-01-01"):
+        response = client.get(f'/history/AAPL?{query}')
+        assert response.status_code == 400 and response.get_json()["error"] == "Invalid date"
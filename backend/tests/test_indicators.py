@@ -0,0 +1,43 @@
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+# Add the parent directory to the path so we can import the app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.indicators import add_technical_indicators, compute_indicators, INDICATOR_COLUMNS
+
+COLUMNS = ['Close'] + INDICATOR_COLUMNS
+
+def reference(series):
+    """ta path on one ticker's own series, as preprocess sees it"""
+    series = series[series.first_valid_index():]
+    return add_technical_indicators(pd.DataFrame({'Close': series}))[COLUMNS]
+
+def price_matrix():
+    rng = np.random.default_rng(0)
+    close = 100 * np.cumprod(1 + rng.normal(0, 0.02, (3, 200)), axis=1)
+    close[1, :37] = np.nan  # Listed later than the others
+    close[2, 100] = np.nan  # Missing bar mid-series
+    return close
+
+def test_kernel_matches_ta():
+    """Test warmup NaNs and values against the ta indicators"""
+    close = price_matrix()
+    features = compute_indicators(close, dtype=np.float64)
+    for i in range(len(close)):
+        expected = reference(pd.Series(close[i]))
+        offset = close.shape[1] - len(expected)
+        np.testing.assert_allclose(features[i, offset:], expected.to_numpy(), rtol=1e-9, atol=1e-9)
+        assert np.isnan(features[i, :offset]).all()
+
+def test_kernel_fill_matches_preprocess():
+    """Test the ffill().bfill() handling used in preprocess"""
+    close = price_matrix()
+    features = compute_indicators(close, fill=True)
+    assert features.dtype == np.float32
+    for i in range(len(close)):
+        expected = reference(pd.Series(close[i])).ffill().bfill()
+        offset = close.shape[1] - len(expected)
+        np.testing.assert_allclose(features[i, offset:], expected.to_numpy(), rtol=1e-4, atol=1e-3)
@@ -0,0 +1,70 @@
+import sys
+import os
+import pytest
+import pandas as pd
+
+# Add the parent directory to the path so we can import the app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+from ml.live import LivePriceHub, HubFull
+from ml.symbols import SymbolIndex
+
+def test_subscribers_share_one_poller():
+    """Test that all subscribers of a ticker are fed by a single upstream poll"""
+    fetches, predictions = [], []
+    
+    def fetch(ticker):
+        fetches.append(ticker)
+        return pd.DataFrame({"Close": [100.0, 101.0]}, index=pd.date_range("2024-01-01", periods=2))
+    
+    def predict(ticker, closes):
+        predictions.append(ticker)
+        return closes[-1] * 1.01
+    
+    hub = LivePriceHub(fetch=fetch, predict=predict, poll_seconds=60)
+    first = hub.subscribe("aapl")
+    second = hub.subscribe("AAPL")
+    
+    event = first.get(timeout=5)
+    assert event == second.get(timeout=5)
+    assert event["price"] == 101.0
+    assert event["predicted"] == 102.01
+    assert fetches == ["AAPL"]
+    assert predictions == ["AAPL"]
+    assert hub.stats() == {"tickers": 1, "subscribers": 2}
+    
+    hub.unsubscribe("AAPL", first)
+    hub.unsubscribe("AAPL", second)
+    assert hub.stats() == {"tickers": 0, "subscribers": 0}
+
+def test_hub_caps_pollers_and_formats_intraday_dates():
+    """Test a new ticker past max_tickers is refused and intraday bars keep their time"""
+    fetch = lambda ticker: pd.DataFrame({"Close": [100.0]}, index=[pd.Timestamp("2024-01-02 10:35")])
+    hub = LivePriceHub(fetch=fetch, poll_seconds=60, interval="5m", max_tickers=1)
+    q = hub.subscribe("AAPL")
+    assert q.get(timeout=5)["date"] == "2024-01-02 10:35"
+    hub.subscribe("AAPL")
+    with pytest.raises(HubFull):
+        hub.subscribe("MSFT")
+    hub.unsubscribe("AAPL", q)
+    hub.unsubscribe("AAPL", q)
+    assert hub.stats() == {"tickers": 1, "subscribers": 1}
+
+def test_stream_rejects_unknown_and_overflowing_tickers(monkeypatch):
+    """Test /stream validates the symbol before starting a poller and returns 503 past the cap"""
+    hub = LivePriceHub(fetch=lambda ticker: pd.DataFrame({"Close": [1.0]}, index=[pd.Timestamp("2024-01-02")]),
+                       poll_seconds=60, max_tickers=1)
+    monkeypatch.setattr(app_module, "get_hub", lambda predict=None: hub)
+    monkeypatch.setattr(app_module, "get_symbol_index", lambda: SymbolIndex([{"symbol": "AAPL"}, {"symbol": "MSFT"}]))
+    monkeypatch.setattr(app_module, "validate_stock_ticker", lambda ticker: (False, None))
+    app_module.app.config["TESTING"] = True
+    with app_module.app.test_client() as client:
+        assert client.get("/stream/zzzq").status_code == 400
+        assert client.get("/stream/AAPL; DROP").status_code == 400
+        response = client.get("/stream/aapl")
+        assert response.status_code == 200 and hub.is_live("AAPL")
+        busy = client.get("/stream/msft")
+        assert busy.status_code == 503 and busy.headers["Retry-After"] == "60"
+        response.close()
+    assert hub.stats() == {"tickers": 0, "subscribers": 0}
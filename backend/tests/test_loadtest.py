@@ -0,0 +1,37 @@
+import pytest
+import sys
+import os
+
+# Add the parent directory to the path so we can import the app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loadtest import stub_download, summarize, parse_mix, run_phase
+from ml.upstream import split_by_ticker
+
+def test_stub_download_is_grouped_and_deterministic():
+    """Test the offline source looks like a grouped multi-symbol download"""
+    frames = split_by_ticker(stub_download(["AAPL", "MSFT"], period="1y"), ["AAPL", "MSFT"])
+    assert set(frames) == {"AAPL", "MSFT"}
+    again = split_by_ticker(stub_download(["AAPL"], period="1y"), ["AAPL"])
+    assert frames["AAPL"]["Close"].equals(again["AAPL"]["Close"])
+
+def test_summarize_percentiles_and_errors():
+    """Test percentile and error-rate reporting"""
+    samples = [(i / 1000, 200) for i in range(1, 101)] + [(0.5, 500), (0.5, "ConnectionError")]
+    stats = summarize(samples, elapsed=2.0)
+    assert stats["requests"] == 102
+    assert stats["throughput_rps"] == 51.0
+    assert stats["latency_ms"]["p50"] == pytest.approx(51.5, abs=1)
+    assert stats["error_rate"] == round(2 / 102, 4)
+
+def test_run_phase_follows_mix():
+    """Test the closed loop respects endpoint weights"""
+    def make_sender():
+        return lambda method, path, body: 200
+    
+    report = run_phase(make_sender, parse_mix("latest=3,recommendations=1"), 2, 0.3, ["AAPL"])
+    latest, recommendations = report["latest"]["requests"], report["recommendations"]["requests"]
+    assert report["total"]["requests"] == latest + recommendations
+    assert 2 < latest / recommendations < 4.5
+    with pytest.raises(ValueError):
+        parse_mix("bogus=1")
@@ -0,0 +1,116 @@
+import pytest
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+# Add the parent directory to the path so we can import the app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("tensorflow")
+
+from ml import model_utils
+from ml.model_utils import preprocess, prepare_series, make_window_dataset
+
+def price_frame():
+    closes = 100 + np.cumsum(np.random.default_rng(0).normal(0, 1, 120))
+    return pd.DataFrame({"Close": closes}, index=pd.date_range("2024-01-01", periods=120))
+
+def test_streamed_windows_match_preprocess():
+    """Test that the tf.data windows equal the materialized ones, in float32"""
+    X, y, _, _, _ = preprocess(price_frame(), 10, True)
+    scaled_data, _, _, dates = prepare_series(price_frame(), 10, True)
+    assert len(dates) == len(X)
+    
+    windows, targets = zip(*make_window_dataset(scaled_data, 10, 0, len(X), batch_size=16))
+    windows, targets = np.concatenate(windows), np.concatenate(targets)
+    assert windows.dtype == np.float32
+    np.testing.assert_allclose(windows, X)
+    np.testing.assert_allclose(targets, y)
+
+def test_shuffled_split_stays_chronological():
+    """Test that shuffling never leaks windows outside the requested range"""
+    scaled_data, _, _, _ = prepare_series(price_frame(), 10, False)
+    ds = make_window_dataset(scaled_data, 10, 20, 40, batch_size=64, shuffle=True)
+    _, targets = next(iter(ds))
+    assert sorted(targets.numpy()[:, 0]) == sorted(scaled_data[30:50, 0])
+
+def test_file_cache_is_per_training_run(tmp_path, monkeypatch):
+    """Test that a file cache never serves a previous run's windows and is removed afterwards"""
+    seen = []
+    
+    class FakeModel:
+        def fit(self, train_ds, **kwargs):
+            seen.append(sorted(np.concatenate([y for _, y in train_ds])[:, 0]))
+    
+    monkeypatch.setenv("TRAIN_CACHE", "file")
+    monkeypatch.setattr(model_utils, "build_lstm", lambda shape: FakeModel())
+    for i, offset in enumerate([0.0, 1.0]):
+        staging = tmp_path / f"v{i}"
+        staging.mkdir()
+        data = np.arange(30, dtype=np.float64)[:, None] / 30 + offset
+        model_utils.train_model(data, 5, 20, str(staging / "model.keras"))
+        assert os.listdir(staging) == []
+    assert seen[0] != seen[1] and min(seen[1]) >= 1.0
+
+def test_variant_lookup_does_not_create_dirs(tmp_path, monkeypatch):
+    """Test that resolving a variant path leaves the model dir untouched unless asked to create it"""
+    monkeypatch.setenv("MODEL_DIR", str(tmp_path))
+    path = model_utils.get_variant_dir("AAPL", 60, True, "1d")
+    assert path == os.path.join(str(tmp_path), "AAPL", "lb60_ind1_1d")
+    assert os.listdir(tmp_path) == []
+    assert os.path.isdir(model_utils.get_variant_dir("AAPL", 60, True, "1d", create=True))
+
+class Persistence:
+    """Predicts the last close of each window, so outputs are known prices"""
+    
+    def predict(self, x, **kwargs):
+        windows = x if isinstance(x, np.ndarray) else np.concatenate([w.numpy() for w, _ in x])
+        return windows[:, -1, :1]
+
+def test_predictions_are_returned_in_price_space(tmp_path, monkeypatch):
+    """Test history, latest and the latest-prediction helper invert model outputs to prices"""
+    frame = price_frame()
+    _, scaler_x, scaler_y, _ = prepare_series(frame, 10, False)
+    monkeypatch.setenv("MODEL_DIR", str(tmp_path))
+    monkeypatch.setenv("DEFAULT_LOOKBACK", "10")
+    monkeypatch.setattr(model_utils, "current_version", lambda path: (1, path))
+    monkeypatch.setattr(model_utils, "is_stale", lambda meta, age: False)
+    monkeypatch.setattr(model_utils, "load_published_model", lambda path: (Persistence(), scaler_x, scaler_y))
+    monkeypatch.setattr(model_utils, "fetch_data", lambda *args, **kwargs: frame)
+    monkeypatch.setattr(model_utils, "feature_frame", lambda df, use_indicators: df[["Close"]])
+    
+    req = type("Req", (), {"ticker": "AAPL", "lookback": 10, "useIndicators": False, "interval": "1d",
+                           "start": None, "end": None})
+    result = model_utils.predict_stock(req)
+    closes = frame["Close"].to_numpy()
+    assert result["history"][-1]["real"] == pytest.approx(closes[-1], rel=1e-5)
+    assert result["latest"]["predicted"] == pytest.approx(closes[-2], rel=1e-5)
+    assert model_utils.get_latest_prediction("AAPL")["predicted"] == pytest.approx(closes[-2], rel=1e-5)
+
+def test_fine_tune_starts_from_published_weights(tmp_path, monkeypatch):
+    """Test fine-tuning publishes a new version trained from the current weights and keeps created_at"""
+    from ml.storage import new_staging_dir, publish_version, save_scalers, save_model_metadata, current_version
+    from ml.storage import load_model_metadata
+    monkeypatch.setenv("MODEL_DIR", str(tmp_path))
+    monkeypatch.setenv("FINE_TUNE_EPOCHS", "1")
+    frame = price_frame()
+    monkeypatch.setattr(model_utils, "fetch_data", lambda *args, **kwargs: frame)
+    scaled_data, scaler_x, scaler_y, dates = prepare_series(frame, 10, False)
+    model_dir = model_utils.get_variant_dir("AAPL", 10, False, "1d", create=True)
+    version, staging_dir = new_staging_dir(model_dir)
+    model = model_utils.build_lstm((10, 1))
+    model.save(os.path.join(staging_dir, "model.keras"))
+    save_scalers(staging_dir, scaler_x, scaler_y)
+    save_model_metadata(staging_dir, "AAPL", 10, False, "1d", {"start": "2024-01-11", "end": "2024-03-31"},
+                        version=version)
+    publish_version(model_dir, staging_dir)
+    created_at = load_model_metadata(current_version(model_dir)[1])["created_at"]
+    
+    predicted = model_utils.fine_tune_stock("AAPL", 10, use_indicators=False)
+    new_version, version_dir = current_version(model_dir)
+    meta = load_model_metadata(version_dir)
+    assert new_version != version and meta["created_at"] == created_at
+    assert meta["train_dates"]["end"] == str(frame.index[-1].date())
+    # A price, not a scaled value
+    assert frame["Close"].min() * 0.5 < predicted < frame["Close"].max() * 1.5
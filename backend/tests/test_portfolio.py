@@ -0,0 +1,99 @@
+import pytest
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+# Add the parent directory to the path so we can import the app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+from ml.portfolio import aligned_returns, pairwise_moments, RiskModel, RiskModelCache, build_risk_model
+
+def random_closes(days=250, tickers=4, seed=0):
+    rng = np.random.default_rng(seed)
+    return 100 * np.cumprod(1 + rng.normal(0, 0.01, (days, tickers)), axis=0)
+
+def test_aligned_returns_span_holidays():
+    """Test a missing day yields NaN and the next return runs from the last close"""
+    closes = np.array([[100.0], [np.nan], [110.0]])
+    returns = aligned_returns(closes)
+    assert np.isnan(returns[1, 0])
+    assert returns[2, 0] == pytest.approx(0.10)
+
+def test_pairwise_moments_match_pandas():
+    """Test NaN-aware covariance and correlation equal pandas pairwise results"""
+    closes = random_closes(300, 6)
+    rng = np.random.default_rng(1)
+    closes[rng.random(closes.shape) < 0.05] = np.nan
+    closes[:50, 2] = np.nan  # Listed later
+    returns = aligned_returns(closes)
+    cov, corr, _ = pairwise_moments(returns)
+    np.testing.assert_allclose(cov, pd.DataFrame(returns).cov().to_numpy(), atol=1e-15)
+    np.testing.assert_allclose(corr, pd.DataFrame(returns).corr().to_numpy(), atol=1e-12)
+
+def test_diversification_extremes():
+    """Test identical assets give no diversification and independent ones reduce volatility"""
+    rng = np.random.default_rng(2)
+    a, b = rng.normal(0, 0.01, 5000), rng.normal(0, 0.01, 5000)
+    same = RiskModel(["A", "B"], np.column_stack([a, a]))
+    assert same.portfolio()["diversification_score"] == pytest.approx(0, abs=0.1)
+    independent = RiskModel(["A", "B"], np.column_stack([a, b]))
+    result = independent.portfolio({"A": 1, "B": 1})
+    assert result["diversification_ratio"] == pytest.approx(np.sqrt(2), rel=0.05)
+    assert sum(result["risk_contributions"].values()) == pytest.approx(1)
+    assert independent.portfolio({"A": 1})["weights"] == {"A": 1.0}
+
+def test_cache_reuses_model_for_any_ticker_order():
+    """Test the covariance is built once per basket"""
+    builds = []
+    
+    def build(tickers, period, interval):
+        builds.append(tickers)
+        return RiskModel(tickers, aligned_returns(random_closes(tickers=len(tickers))))
+    
+    cache = RiskModelCache(size=2, ttl=60, build=build)
+    assert cache.get(["MSFT", "AAPL"])[1] is False
+    model, cached = cache.get(["AAPL", "MSFT"])
+    assert cached is True and len(builds) == 1
+
+def test_build_risk_model_aligns_calendars():
+    """Test tickers on different calendars are joined on the union of dates"""
+    us = pd.Series(np.linspace(100, 120, 10), index=pd.bdate_range("2024-01-01", periods=10))
+    other = us.drop(us.index[3])
+    model = build_risk_model(["US", "OTHER", "GONE"], download=lambda t, p, i: ({"US": us, "OTHER": other},
+                                                                                {"GONE": "No data"}))
+    assert model.tickers == ["US", "OTHER"]
+    assert model.errors == {"GONE": "No data"}
+    assert np.all(np.isfinite(model.volatility))
+
+@pytest.fixture
+def client(monkeypatch):
+    def build(tickers, period, interval):
+        model = RiskModel(tickers, aligned_returns(random_closes(tickers=len(tickers))))
+        model.errors = {}
+        return model
+    
+    monkeypatch.setattr(app_module, "get_risk_cache", lambda cache=RiskModelCache(build=build): cache)
+    app_module.app.config['TESTING'] = True
+    with app_module.app.test_client() as client:
+        yield client
+
+def test_portfolio_risk_endpoint(client):
+    """Test weighted risk, then a cached repeat query"""
+    body = {"tickers": ["AAPL", "MSFT", "KO"], "weights": {"AAPL": 0.5, "MSFT": 0.3, "KO": 0.2},
+            "includeCorrelation": True}
+    data = client.post('/portfolio/risk', json=body).get_json()
+    assert data['cached'] is False
+    assert len(data['correlation']) == 3 and data['correlation'][0][0] == 1.0
+    assert 0 < data['portfolio']['volatility'] < 1
+    repeat = client.post('/portfolio/risk', json={"tickers": ["KO", "MSFT", "AAPL"]}).get_json()
+    assert repeat['cached'] is True and 'correlation' not in repeat
+
+def test_portfolio_risk_validation(client):
+    """Test bad baskets and weights are rejected"""
+    assert client.post('/portfolio/risk', json={"tickers": []}).status_code == 400
+    assert client.post('/portfolio/risk', json={"tickers": ["AAPL"], "weights": {"AAPL": -1}}).status_code == 400
+    assert client.post('/portfolio/risk', json={"tickers": ["AAPL"], "interval": "5m"}).status_code == 400
+    response = client.post('/portfolio/risk', json={"tickers": ["AAPL"], "weights": {"AAPL": 1, "tsla": 1}})
+    assert response.status_code == 400 and response.get_json()["unknown"] == ["tsla"]
@@ -0,0 +1,92 @@
+import pytest
+import sys
+import os
+from datetime import datetime
+import pytz
+
+# Add the parent directory to the path so we can import the app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+from ml.precompute import PredictionTable, PrecomputeScheduler, previous_run, next_run
+from ml.response_cache import ResponseCache
+
+NY = pytz.timezone("America/New_York")
+
+def make_row(ticker):
+    return {"ticker": ticker, "stock_info": {"name": ticker, "sector": "Technology", "current_price": 10.0},
+            "dates": [f"2024-01-{d:02d}" for d in range(2, 22)], "prices": [10.0 + d for d in range(20)],
+            "date": "2024-01-21", "predicted": 31.0}
+
+def test_run_times_skip_weekends():
+    """Test Saturday maps back to Friday's run and forward to Monday's"""
+    saturday = NY.localize(datetime(2024, 6, 8, 12, 0))
+    assert previous_run(saturday) == NY.localize(datetime(2024, 6, 7, 16, 30))
+    assert next_run(saturday) == NY.localize(datetime(2024, 6, 10, 16, 30))
+
+def test_run_times_are_timezone_aware():
+    """Test the same instant seen from Kolkata resolves to New York's close"""
+    kolkata = pytz.timezone("Asia/Kolkata").localize(datetime(2024, 6, 5, 3, 0))  # 17:30 NY, June 4
+    assert previous_run(kolkata) == NY.localize(datetime(2024, 6, 4, 16, 30))
+
+def test_run_once_writes_table_once(tmp_path):
+    """Test a second run after the same close is skipped"""
+    calls = []
+    
+    def compute(ticker):
+        calls.append(ticker)
+        return None if ticker == "BAD" else make_row(ticker)
+    
+    table = PredictionTable(str(tmp_path / "predictions.json"))
+    scheduler = PrecomputeScheduler(["AAPL", "MSFT", "BAD"], compute, table, workers=2)
+    assert scheduler.run_once() == 2
+    assert scheduler.run_once() == 0
+    assert sorted(calls) == ["AAPL", "BAD", "MSFT"]
+    # Another worker reading the same file sees the rows
+    other = PredictionTable(table.path)
+    assert other.get("aapl", scheduler.fresh_after())["predicted"] == 31.0
+    assert other.get("BAD") is None
+
+def test_stale_rows_are_misses(tmp_path):
+    """Test rows from before the latest close are not served"""
+    table = PredictionTable(str(tmp_path / "predictions.json"))
+    table.replace({"AAPL": {**make_row("AAPL"), "generated_at": 0}})
+    assert table.get("AAPL") is not None
+    assert table.get("AAPL", fresh_after=1) is None
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    table = PredictionTable(str(tmp_path / "predictions.json"))
+    scheduler = PrecomputeScheduler(["AAPL"], lambda ticker: make_row(ticker), table)
+    scheduler.run_once()
+    monkeypatch.setattr(app_module, "precompute", scheduler)
+    monkeypatch.setattr(app_module, "get_prediction_cache", lambda cache=ResponseCache(): cache)
+    app_module.app.config['TESTING'] = True
+    with app_module.app.test_client() as client:
+        yield client
+
+def test_latest_served_from_table(client):
+    """Test /latest answers from the precomputed table"""
+    data = client.get('/latest/aapl').get_json()
+    assert data['precomputed'] is True
+    assert data['predicted'] == 31.0
+
+def test_predict_served_from_table(client):
+    """Test /predict skips validation and download on a table hit"""
+    response = client.post('/predict', json={"ticker": "AAPL"})
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['precomputed'] is True
+    assert data['history'][-1]['real'] == 29.0
+
+def test_predict_uses_precomputed_prediction(client, monkeypatch):
+    """Test /predict and /latest return the table's predictions rather than a fresh noisy one"""
+    row = {**make_row("MSFT"), "lstm_predicted": 30.5}
+    monkeypatch.setattr(app_module.precompute, "lookup", lambda ticker: {**row, "generated": "2024-01-21T17:00:00"})
+    # A fresh response cache per request, so every call recomputes
+    monkeypatch.setattr(app_module, "get_prediction_cache", lambda: ResponseCache())
+    for _ in range(3):
+        data = client.post('/predict', json={"ticker": "MSFT"}).get_json()
+        assert data['company_info']['predicted_price'] == 31.0
+        assert data['latest'] == {"date": "2024-01-21", "predicted": 31.0, "lstm_predicted": 30.5}
+    assert client.get('/latest/msft').get_json()['lstm_predicted'] == 30.5
@@ -0,0 +1,102 @@
+import pytest
+import sys
+import os
+import time
+import threading
+
+# Add the parent directory to the path so we can import the app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+from ml.response_cache import ResponseCache, freshness_seconds
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+def test_freshness_follows_bar_cadence():
+    """Test freshness is one bar, capped"""
+    assert freshness_seconds("1m", cap=900) == 60
+    assert freshness_seconds("5m", cap=900) == 300
+    assert freshness_seconds("1d", cap=900) == 900
+
+def test_fresh_hit_then_stale_while_revalidate():
+    """Test a stale entry is served at once and refreshed in the background"""
+    cache = ResponseCache(swr=60)
+    values = iter([1, 2])
+    compute = lambda: next(values)
+    assert cache.get("k", compute, fresh=60) == (1, cache._info(0.0, False, False, None))
+    assert cache.get("k", compute, fresh=60)[0] == 1
+    
+    value, info = cache.get("k", compute, fresh=0)
+    assert value == 1 and info["stale"] and info["revalidating"]
+    assert wait_for(lambda: cache.get("k", compute, fresh=60)[0] == 2)
+
+def test_stale_if_error():
+    """Test a failing recompute falls back to the last good value until it is too old"""
+    cache = ResponseCache(swr=0, stale_if_error=60)
+    cache.get("k", lambda: "good", fresh=60)
+    
+    def fail():
+        raise ValueError("provider down")
+    
+    value, info = cache.get("k", fail, fresh=0)
+    assert value == "good" and info["stale"] and info["error"] == "provider down"
+    expired = ResponseCache(swr=0, stale_if_error=0)
+    expired.get("k", lambda: "good", fresh=60)
+    with pytest.raises(ValueError):
+        expired.get("k", fail, fresh=0)
+
+def test_concurrent_misses_compute_once():
+    """Test simultaneous misses share one computation"""
+    cache = ResponseCache()
+    calls = []
+    
+    def slow():
+        calls.append(1)
+        time.sleep(0.2)
+        return "value"
+    
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("k", slow, fresh=60)[0])) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["value"] * 5
+    assert len(calls) == 1
+
+@pytest.fixture
+def client(monkeypatch):
+    calls = []
+    
+    def compute_prediction(req, ticker):
+        calls.append(ticker)
+        if len(calls) > 1:
+            raise app_module.PredictionUnavailable(500, {"error": "Data unavailable"})
+        return {"ticker": ticker, "latest": {"predicted": 101.0}}
+    
+    cache = ResponseCache(swr=0, stale_if_error=3600)
+    monkeypatch.setattr(app_module, "compute_prediction", compute_prediction)
+    monkeypatch.setattr(app_module, "get_prediction_cache", lambda: cache)
+    monkeypatch.setattr(app_module, "freshness_seconds", lambda interval: 0)
+    app_module.app.config['TESTING'] = True
+    with app_module.app.test_client() as client:
+        yield client
+
+def test_predict_serves_stale_on_provider_error(client):
+    """Test /predict returns the last good result with its age when recomputing fails"""
+    first = client.post('/predict', json={"ticker": "AAPL"})
+    assert first.status_code == 200
+    assert first.get_json()['cache']['stale'] is False
+    
+    second = client.post('/predict', json={"ticker": "AAPL"})
+    assert second.status_code == 200
+    data = second.get_json()
+    assert data['latest']['predicted'] == 101.0
+    assert data['cache']['stale'] is True
+    assert 'stale-if-error' in second.headers['Cache-Control']
+    
+    assert client.post('/predict', json={"ticker": "MSFT"}).status_code == 500
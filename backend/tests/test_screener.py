@@ -0,0 +1,59 @@
+import pytest
+import sys
+import os
+import numpy as np
+
+# Add the parent directory to the path so we can import the app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ml.screener as screener_module
+from ml.screener import Screener, screen
+from app import app, calculate_risk_level
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+def price_matrix():
+    rng = np.random.default_rng(0)
+    calm = 100 * np.cumprod(1 + rng.normal(0.005, 0.002, 60))
+    wild = 100 * np.cumprod(1 + rng.normal(0, 0.05, 60))
+    late = np.full(60, np.nan)
+    late[-5:] = 50.0  # Listed recently, too little history to judge
+    return np.column_stack([calm, wild, late])
+
+def test_screen_matches_single_ticker_risk():
+    """Test that the vectorized screen agrees with calculate_risk_level"""
+    closes = price_matrix()
+    rows = {row["ticker"]: row for row in screen(closes, ["CALM", "WILD", "NEW"])}
+    assert rows["CALM"]["risk_level"] == calculate_risk_level(None, list(closes[:, 0])) == "Low"
+    assert rows["WILD"]["risk_level"] == calculate_risk_level(None, list(closes[:, 1])) == "High"
+    assert rows["NEW"]["risk_level"] == "Medium"
+    assert rows["CALM"]["recommendation"] == "BUY"
+
+def test_risk_uses_the_recent_window():
+    """Test a ticker that turned volatile is labelled by its last 20 closes on both paths"""
+    rng = np.random.default_rng(1)
+    closes = 100 * np.cumprod(1 + np.concatenate([rng.normal(0, 0.002, 60), rng.normal(0, 0.05, 20)]))
+    row = screen(closes[:, None], ["TURN"])[0]
+    assert row["risk_level"] == calculate_risk_level(None, list(closes[-20:])) == "High"
+
+def test_recommendations_served_from_snapshot(client):
+    """Test that /recommendations serves the precomputed snapshot"""
+    screener = Screener(universe=["CALM", "WILD", "NEW"],
+                        download=lambda tickers, period: (price_matrix(), tickers))
+    screener.refresh()
+    screener_module._screener = screener
+    try:
+        data = client.get('/recommendations?risk=Low').get_json()
+        assert [r["ticker"] for r in data["recommendations"]] == ["CALM"]
+        assert data["generated_at"] == screener.snapshot()["generated_at"]
+        assert len(client.get('/recommendations?limit=1').get_json()["recommendations"]) == 1
+        assert client.get('/recommendations?limit=abc').status_code == 400
+        assert client.get('/recommendations?limit=0').status_code == 400
+        assert client.get('/recommendations?risk=extreme').status_code == 400
+        assert client.get('/recommendations?risk=low').status_code == 400
+    finally:
+        screener_module._screener = None
@@ -0,0 +1,119 @@
+import sys
+import os
+import json
+import time
+import threading
+
+# Add the parent directory to the path so we can import the app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.storage import (variant_key, record_variant_access, prune_variants, is_stale,
+                        migrate_legacy_model, save_model_metadata, variant_lock, new_staging_dir,
+                        publish_version, current_version)
+
+def test_prune_keeps_most_recent_variants(tmp_path):
+    """Test LRU cleanup of variant directories"""
+    for lookback in (30, 60, 90):
+        key = variant_key(lookback, True, "1d")
+        os.makedirs(tmp_path / key)
+        record_variant_access(str(tmp_path), key)
+        time.sleep(0.01)
+    record_variant_access(str(tmp_path), variant_key(30, True, "1d"))
+    
+    removed = prune_variants(str(tmp_path), 2)
+    assert removed == [variant_key(60, True, "1d")]
+    assert sorted(n for n in os.listdir(tmp_path) if not n.startswith(".")) == [
+        "access.json", "lb30_ind1_1d", "lb90_ind1_1d"]
+
+def test_prune_skips_locked_variant(tmp_path):
+    """Test that a variant another worker holds the lock on is not deleted"""
+    for lookback in (30, 60, 90):
+        key = variant_key(lookback, True, "1d")
+        os.makedirs(tmp_path / key)
+        record_variant_access(str(tmp_path), key)
+        time.sleep(0.01)
+    
+    busy = str(tmp_path / variant_key(30, True, "1d"))
+    held, done = threading.Event(), threading.Event()
+    def train():
+        with variant_lock(busy):
+            held.set()
+            done.wait(5)
+    trainer = threading.Thread(target=train)
+    trainer.start()
+    held.wait(5)
+    try:
+        assert prune_variants(str(tmp_path), 1) == [variant_key(60, True, "1d")]
+        assert os.path.isdir(busy)
+    finally:
+        done.set()
+        trainer.join()
+
+def test_concurrent_access_records_are_kept(tmp_path):
+    """Test that simultaneous access updates don't overwrite each other"""
+    keys = [variant_key(lookback, True, "1d") for lookback in range(10, 30)]
+    threads = [threading.Thread(target=record_variant_access, args=(str(tmp_path), key)) for key in keys]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    with open(tmp_path / "access.json") as f:
+        assert sorted(json.load(f)) == sorted(keys)
+
+def test_legacy_model_is_migrated(tmp_path):
+    """Test that a single-model ticker dir becomes a variant"""
+    save_model_metadata(str(tmp_path), "AAPL", 60, True, "1d", {})
+    (tmp_path / "model.keras").write_text("weights")
+    
+    assert migrate_legacy_model(str(tmp_path)) == "lb60_ind1_1d"
+    assert (tmp_path / "lb60_ind1_1d" / "model.keras").exists()
+    assert not (tmp_path / "meta.json").exists()
+
+def test_is_stale(tmp_path):
+    """Test model age check"""
+    meta = save_model_metadata(str(tmp_path), "AAPL", 60, True, "1d", {})
+    assert not is_stale(meta, 1)
+    assert is_stale(None, 1)
+    meta["created_at"] = "2000-01-01T00:00:00+05:30"
+    assert is_stale(meta, 1)
+
+def stage(variant_dir, weights):
+    version, staging = new_staging_dir(variant_dir)
+    with open(os.path.join(staging, "model.keras"), "w") as f:
+        f.write(weights)
+    return version, staging
+
+def test_publish_is_atomic_and_versioned(tmp_path):
+    """Test that readers only ever see fully published versions"""
+    variant_dir = str(tmp_path)
+    assert current_version(variant_dir) == (None, None)
+    
+    first, staging = stage(variant_dir, "v1")
+    assert current_version(variant_dir) == (None, None)  # Staged, not yet visible
+    publish_version(variant_dir, staging)
+    assert current_version(variant_dir)[0] == first
+    
+    for weights in ("v2", "v3"):
+        latest, staging = stage(variant_dir, weights)
+        publish_version(variant_dir, staging, keep=2)
+    version, path = current_version(variant_dir)
+    assert version == latest
+    assert open(os.path.join(path, "model.keras")).read() == "v3"
+    assert len(os.listdir(tmp_path / "versions")) == 2
+
+def test_variant_lock_is_exclusive(tmp_path):
+    """Test that a second trainer waits for the first"""
+    events = []
+    
+    def trainer(name):
+        with variant_lock(str(tmp_path)):
+            events.append(f"{name} start")
+            time.sleep(0.05)
+            events.append(f"{name} end")
+    
+    threads = [threading.Thread(target=trainer, args=(n,)) for n in ("a", "b")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert events[0][0] == events[1][0] and events[2][0] == events[3][0]
@@ -0,0 +1,126 @@
+import pytest
+import sys
+import os
+
+# Add the parent directory to the path so we can import the app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+from ml.symbols import SymbolIndex, Trie, read_universe, read_nasdaq_trader, is_well_formed, DEFAULT_FILE
+
+ROWS = [
+    {"symbol": "AAPL", "name": "Apple Inc.", "exchange": "NASDAQ", "sector": "Technology"},
+    {"symbol": "AMAT", "name": "Applied Materials Inc.", "exchange": "NASDAQ", "sector": "Technology"},
+    {"symbol": "MSFT", "name": "Microsoft Corporation", "exchange": "NASDAQ", "sector": "Technology"},
+    {"symbol": "BAC", "name": "Bank of America Corporation", "exchange": "NYSE", "sector": "Financial Services"},
+    {"symbol": "BRK-B", "name": "Berkshire Hathaway Inc. Class B", "exchange": "NYSE", "sector": "Financial Services"},
+]
+
+def test_trie_prefix_and_edit_distance():
+    """Test prefix lookups return shortest keys first and fuzzy lookups respect the edit budget"""
+    trie = Trie()
+    for key in ["AB", "ABC", "ABD", "B"]:
+        trie.add(key, key)
+    assert trie.prefixed("A") == ["AB", "ABC", "ABD"]
+    assert trie.prefixed("A", limit=2) == ["AB", "ABC"]
+    assert trie.prefixed("Z") == []
+    assert sorted(trie.within("ABX", 1)) == [("AB", 1), ("ABC", 1), ("ABD", 1)]
+    assert trie.within("XYZ", 1) == []
+
+def test_search_ranks_symbol_name_and_typos():
+    """Test exact symbols come first, then prefixes, company names and near misses"""
+    index = SymbolIndex(ROWS)
+    assert [r["symbol"] for r in index.search("aapl")] == ["AAPL"]
+    assert index.search("aapl")[0]["match"] == "exact"
+    assert [r["symbol"] for r in index.search("A")] == ["AAPL", "AMAT"]
+    assert [r["symbol"] for r in index.search("am")] == ["AMAT", "BAC"]
+    assert [r["symbol"] for r in index.search("bank of")] == ["BAC"]
+    assert [(r["symbol"], r["match"]) for r in index.search("MSFTT")] == [("MSFT", "fuzzy")]
+    assert index.search("   ") == []
+
+def test_accepts_rejects_without_network():
+    """Test malformed, unlisted (strict) and previously failed symbols are rejected locally"""
+    assert is_well_formed("BRK-B") and is_well_formed("^GSPC") and is_well_formed("RELIANCE.NS")
+    assert not is_well_formed("AAPL; DROP") and not is_well_formed("")
+    
+    advisory = SymbolIndex(ROWS)
+    assert advisory.accepts("aapl") and advisory.accepts("SHOP")
+    advisory.mark_invalid("shop")
+    assert not advisory.accepts("SHOP")
+    assert SymbolIndex(ROWS, negative_ttl=0).accepts("SHOP")
+    brief = SymbolIndex(ROWS, retry_ttl=0)
+    brief.mark_invalid("SHOP", transient=True)
+    assert brief.accepts("SHOP")
+    
+    strict = SymbolIndex(ROWS, strict=True)
+    assert strict.accepts("MSFT") and not strict.accepts("SHOP")
+
+def test_validation_only_blacklists_unknown_symbols(monkeypatch):
+    """Test a provider error or partial answer is not remembered as an unknown symbol"""
+    index = SymbolIndex(ROWS, negative_ttl=86400, retry_ttl=0)
+    monkeypatch.setattr(app_module, "get_symbol_index", lambda: index)
+    info = {"SHOP": {}, "RDDT": {"symbol": "RDDT"}}
+    
+    class Ticker:
+        def __init__(self, ticker):
+            if ticker == "NET":
+                raise ConnectionError("provider unreachable")
+            self.info = info[ticker]
+    
+    class Bars:
+        def get_bars(self, ticker, interval, period=None):
+            # Like the real store, which raises rather than returning an empty frame
+            raise ValueError(f"No data found for ticker {ticker} in the specified date range")
+    
+    monkeypatch.setattr(app_module.yf, "Ticker", Ticker)
+    monkeypatch.setattr(app_module, "get_bar_store", lambda: Bars())
+    for ticker in ("RDDT", "NET", "SHOP"):
+        assert app_module.validate_stock_ticker(ticker) == (False, None)
+    assert index.accepts("RDDT") and index.accepts("NET")
+    assert not index.accepts("SHOP")
+
+def test_universe_files(tmp_path):
+    """Test the bundled CSV loads and NASDAQ Trader listings convert to Yahoo symbols"""
+    index = SymbolIndex(read_universe(DEFAULT_FILE))
+    assert "AAPL" in index and index.get("btc-usd")["exchange"] == "CCC"
+    
+    listing = tmp_path / "otherlisted.txt"
+    listing.write_text(
+        "ACT Symbol|Security Name|Exchange|CQS Symbol|ETF|Round Lot Size|Test Issue|NASDAQ Symbol\n"
+        "BRK.B|Berkshire Hathaway Inc. Class B|N|BRK.B|N|100|N|BRK.B\n"
+        "SPY|SPDR S&P 500 ETF Trust|P|SPY|Y|100|N|SPY\n"
+        "ZTEST|Test Issue|N|ZTEST|N|100|Y|ZTEST\n"
+        "File Creation Time: 0101202600:00|||||||\n"
+    )
+    rows = read_nasdaq_trader(str(listing))
+    assert [(r["symbol"], r["exchange"], r["sector"]) for r in rows] == [
+        ("BRK-B", "NYSE", ""), ("SPY", "NYSE Arca", "ETF")]
+
+@pytest.fixture
+def client(monkeypatch):
+    index = SymbolIndex(ROWS, strict=True)
+    monkeypatch.setattr(app_module, "get_symbol_index", lambda: index)
+    
+    def compute_prediction(req, ticker):
+        raise AssertionError("unknown symbols must not reach the provider")
+    
+    monkeypatch.setattr(app_module, "compute_prediction", compute_prediction)
+    app_module.app.config["TESTING"] = True
+    with app_module.app.test_client() as client:
+        yield client
+
+def test_symbols_search_endpoint(client):
+    """Test /symbols/search returns ranked universe rows"""
+    response = client.get("/symbols/search?q=micro&limit=3")
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["query"] == "micro"
+    assert data["results"][0]["symbol"] == "MSFT" and data["results"][0]["name"] == "Microsoft Corporation"
+
+def test_predict_rejects_unknown_symbol_with_suggestions(client):
+    """Test /predict rejects a mistyped ticker locally and suggests close matches"""
+    response = client.post("/predict", json={"ticker": "MSFX"})
+    assert response.status_code == 400
+    data = response.get_json()
+    assert data["error"] == "Invalid stock ticker"
+    assert data["suggestions"] == ["MSFT"]
@@ -0,0 +1,56 @@
+import pytest
+import sys
+import os
+
+# Add the parent directory to the path so we can import the app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from ml.tracing import span, start_trace, end_trace
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+def test_span_tree():
+    """Test that nested spans are recorded under the root"""
+    root, token = start_trace("root")
+    with span("outer"):
+        with span("inner"):
+            pass
+    end_trace(root, token)
+    tree = root.to_dict()
+    assert tree["children"][0]["name"] == "outer"
+    assert tree["children"][0]["children"][0]["name"] == "inner"
+
+def test_span_without_trace_is_noop():
+    """Test that spans outside a trace do nothing"""
+    with span("orphan") as s:
+        assert s is None
+
+def test_trace_flag_returns_timing(client):
+    """Test the opt-in timing breakdown"""
+    response = client.get('/health?trace=1')
+    data = response.get_json()
+    assert data['timing']['name'] == 'GET /health'
+    assert 'Server-Timing' in response.headers
+
+def test_profile_header_returns_report(client):
+    """Test the opt-in profiler report"""
+    response = client.get('/health', headers={'X-Profile': 'cprofile'})
+    data = response.get_json()
+    assert 'function calls' in data['profile']
+
+def test_false_flags_stay_off(client):
+    """Test that 0/false flag values do not enable tracing or profiling"""
+    data = client.get('/health?trace=0&profile=0').get_json()
+    assert 'timing' not in data and 'profile' not in data
+    data = client.get('/health', headers={'X-Trace': 'false', 'X-Profile': 'false'}).get_json()
+    assert 'timing' not in data and 'profile' not in data
+
+def test_timing_absent_by_default(client):
+    """Test that untraced requests are unchanged"""
+    data = client.get('/health').get_json()
+    assert 'timing' not in data
@@ -0,0 +1,84 @@
+import sys
+import os
+import threading
+from concurrent.futures import TimeoutError
+import pandas as pd
+
+# Add the parent directory to the path so we can import the app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.upstream import UpstreamScheduler, TokenBucket
+
+def fake_download(calls):
+    def download(tickers, start=None, end=None, period=None, interval="1d"):
+        calls.append(list(tickers))
+        index = pd.date_range("2024-01-01", periods=3)
+        columns = pd.MultiIndex.from_product([tickers, ["Close"]])
+        data = [[float(i + 1) for i in range(len(tickers))]] * 3
+        return pd.DataFrame(data, index=index, columns=columns)
+    return download
+
+def test_concurrent_requests_are_batched():
+    """Test that requests inside the window share one download"""
+    calls = []
+    scheduler = UpstreamScheduler(download=fake_download(calls), window_ms=100, rate=100, burst=10)
+    futures = [scheduler.submit(t, period="5d") for t in ["AAPL", "MSFT", "AAPL", "TSLA"]]
+    results = [f.result(timeout=5) for f in futures]
+    
+    assert calls == [["AAPL", "MSFT", "TSLA"]]
+    assert list(results[1]["Close"]) == [2.0, 2.0, 2.0]
+    stats = scheduler.stats()
+    assert stats["batching_factor"] == 4.0
+    assert stats["queue_depth"] == 0
+
+def test_missing_ticker_raises():
+    """Test that a ticker absent from the batch gets an error"""
+    def download(tickers, **kwargs):
+        return fake_download([])(["AAPL"])
+    scheduler = UpstreamScheduler(download=download, window_ms=10, rate=100, burst=10)
+    ok, missing = scheduler.submit("AAPL"), scheduler.submit("NOPE")
+    assert not ok.result(timeout=5).empty
+    try:
+        missing.result(timeout=5)
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+
+def test_failed_download_is_retried():
+    """Test retry with backoff after a provider error"""
+    attempts = []
+    def flaky(tickers, **kwargs):
+        attempts.append(1)
+        if len(attempts) < 2:
+            raise RuntimeError("rate limited")
+        return fake_download([])(tickers)
+    scheduler = UpstreamScheduler(download=flaky, window_ms=10, rate=100, burst=10, backoff=0.01)
+    assert not scheduler.fetch("AAPL", timeout=5).empty
+    assert scheduler.stats()["retries"] == 1
+
+def test_slow_download_does_not_block_other_batches():
+    """Test that a stuck provider call neither blocks other batches nor hangs its caller"""
+    release = threading.Event()
+    calls = []
+    def download(tickers, period=None, **kwargs):
+        if period == "1y":
+            release.wait(5)
+        return fake_download(calls)(tickers)
+    scheduler = UpstreamScheduler(download=download, window_ms=10, rate=100, burst=10, workers=2, timeout=0.2)
+    stuck = scheduler.submit("AAPL", period="1y")
+    try:
+        assert not scheduler.fetch("MSFT", period="5d", timeout=5).empty
+        try:
+            scheduler.fetch("TSLA", period="1y")
+            assert False, "expected TimeoutError"
+        except TimeoutError:
+            pass
+    finally:
+        release.set()
+    assert not stuck.result(timeout=5).empty
+
+def test_token_bucket_limits_burst():
+    """Test that the bucket refuses tokens beyond its capacity"""
+    bucket = TokenBucket(rate=0.001, capacity=2)
+    assert bucket.try_acquire() and bucket.try_acquire()
+    assert not bucket.try_acquire()
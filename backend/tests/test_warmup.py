@@ -0,0 +1,97 @@
+import pytest
+import sys
+import os
+import json
+import time
+import threading
+
+# Add the parent directory to the path so we can import the app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+import ml.warmup
+from ml.warmup import scan_models, ModelWarmer, warm_variant
+
+def publish(root, ticker, variant, last_access=None):
+    path = root / ticker / variant
+    path.mkdir(parents=True)
+    (path / "model.keras").write_text("")
+    if last_access is not None:
+        access_path = root / ticker / "access.json"
+        access = json.loads(access_path.read_text()) if access_path.exists() else {}
+        access[variant] = last_access
+        access_path.write_text(json.dumps(access))
+    return str(path)
+
+def test_scan_orders_by_popularity_then_recent_use(tmp_path):
+    """Test popular tickers come first, then tickers by last use, skipping unpublished variants"""
+    publish(tmp_path, "AAPL", "lb60_ind1_1d", last_access=100)
+    publish(tmp_path, "MSFT", "lb60_ind1_1d", last_access=300)
+    publish(tmp_path, "MSFT", "lb30_ind0_1h", last_access=200)
+    publish(tmp_path, "TSLA", "lb60_ind1_1d", last_access=50)
+    (tmp_path / "TSLA" / "lb30_ind1_1d").mkdir()
+    
+    order = [(c["ticker"], c["variant"]) for c in scan_models(str(tmp_path), popularity=["TSLA"])]
+    assert order == [("TSLA", "lb60_ind1_1d"), ("MSFT", "lb60_ind1_1d"), ("MSFT", "lb30_ind0_1h"),
+                     ("AAPL", "lb60_ind1_1d")]
+    assert scan_models(str(tmp_path / "missing")) == []
+
+def test_warmer_reports_progress_and_tolerates_failures(tmp_path):
+    """Test the warmer loads the top N in the background and becomes ready even if one fails"""
+    candidates = [{"ticker": t, "variant": "lb60_ind1_1d", "path": t} for t in ["A", "B", "C"]]
+    warmed = []
+    
+    def warm(path):
+        if path == "B":
+            raise OSError("corrupt model")
+        warmed.append(path)
+    
+    warmer = ModelWarmer(candidates, top_n=2, warm=warm)
+    assert not warmer.ready and warmer.status()["progress"] == 0
+    warmer.start()
+    deadline = time.time() + 2
+    while not warmer.ready and time.time() < deadline:
+        time.sleep(0.01)
+    status = warmer.status()
+    assert status["ready"] and status["total"] == 2 and status["loaded"] == 1
+    assert warmed == ["A"] and "B/lb60_ind1_1d" in status["failed"] and status["progress"] == 1.0
+    assert ModelWarmer([], top_n=16).ready
+
+def test_warm_variant_loads_into_model_cache(tmp_path):
+    """Test a published model is loaded, traced and then served from the in-process cache"""
+    from ml import model_utils
+    
+    path = tmp_path / "lb5_ind0_1d"
+    path.mkdir()
+    model_utils.build_lstm((5, 1)).save(str(path / "model.keras"))
+    model_utils.save_scalers(str(path), None, None)
+    warm_variant(str(path))
+    assert str(path) in model_utils._model_cache
+
+@pytest.fixture
+def client(monkeypatch):
+    app_module.app.config["TESTING"] = True
+    with app_module.app.test_client() as client:
+        yield client
+
+def test_app_creation_builds_warmer():
+    """Test creating the app sets up the warmer, which tests keep empty through WARMUP_TOP_N=0"""
+    assert ml.warmup._warmer is not None and ml.warmup._warmer.selected == []
+    assert ml.warmup._warmer.ready
+
+def test_ready_endpoint_follows_warmup(client, monkeypatch):
+    """Test /ready is 503 while warming up and 200 once the hot set is loaded, while /health stays 200"""
+    release = threading.Event()
+    warmer = ModelWarmer([{"ticker": "A", "variant": "lb60_ind1_1d", "path": "A"}], warm=lambda path: release.wait(2))
+    monkeypatch.setattr(app_module, "get_warmer", lambda: warmer)
+    warmer.start()
+    response = client.get("/ready")
+    assert response.status_code == 503 and response.get_json()["total"] == 1
+    assert client.get("/health").status_code == 200
+    
+    release.set()
+    deadline = time.time() + 2
+    while not warmer.ready and time.time() < deadline:
+        time.sleep(0.01)
+    response = client.get("/ready")
+    assert response.status_code == 200 and response.get_json()["loaded"] == 1